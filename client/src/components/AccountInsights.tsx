@@ -24,11 +24,14 @@ import {
     Lightbulb,
     ChevronDown,
     ChevronUp,
+    RefreshCw,
 } from "lucide-react";
 import { useState } from "react";
 import axios from "axios";
 import { toast } from "sonner";
 
+const ANALYSIS_POLL_INTERVAL_MS = 2000;
+
 interface AccountInsightsProps {
     accountId: string;
 }
@@ -78,6 +81,13 @@ interface AIAnalysis {
     strategic_insights: string[];
 }
 
+interface AnalysisCacheInfo {
+    status: "hit" | "miss" | "bypass";
+    fingerprint: string;
+    created_at: string | null;
+    expires_at: string | null;
+}
+
 interface IntelligenceData {
     risks: RiskItem[];
     opportunities: OpportunityItem[];
@@ -100,6 +110,7 @@ export default function AccountInsights({ accountId }: AccountInsightsProps) {
     const [analyzing, setAnalyzing] = useState(false);
     const [intelligence, setIntelligence] = useState<IntelligenceData | null>(null);
     const [aiAnalysis, setAiAnalysis] = useState<AIAnalysis | null>(null);
+    const [analysisCache, setAnalysisCache] = useState<AnalysisCacheInfo | null>(null);
     const [error, setError] = useState<string | null>(null);
     const [isOpen, setIsOpen] = useState(false); // Accordion state - starts closed
 
@@ -119,15 +130,34 @@ export default function AccountInsights({ accountId }: AccountInsightsProps) {
         }
     };
 
-    const analyzeWithAI = async () => {
+    const analyzeWithAI = async (force = false) => {
         setAnalyzing(true);
         setError(null);
 
         try {
-            const response = await axios.post(`/api/v1/accounts/${accountId}/analyze`);
-            setAiAnalysis(response.data.ai_analysis);
-            setIntelligence(response.data.context);
-            toast.success("Análise de IA concluída!");
+            // A análise roda em background; acompanhamos o job até terminar
+            const submitted = await axios.post(`/api/v1/accounts/${accountId}/analysis-jobs`, null, {
+                params: force ? { force: true } : undefined,
+            });
+            let job = submitted.data;
+            while (job.status === "queued" || job.status === "running") {
+                await new Promise((resolve) => setTimeout(resolve, ANALYSIS_POLL_INTERVAL_MS));
+                const response = await axios.get(`/api/v1/accounts/analysis-jobs/${job.id}`);
+                job = response.data;
+            }
+            if (job.status === "failed") {
+                throw { response: { data: { detail: job.error } } };
+            }
+
+            const result = job.result;
+            setAiAnalysis(result.ai_analysis);
+            setIntelligence(result.context);
+            setAnalysisCache(result.cache ?? null);
+            toast.success(
+                result.cache?.status === "hit"
+                    ? "Análise recuperada (dados sem alteração)"
+                    : "Análise de IA concluída!"
+            );
         } catch (err: any) {
             console.error("Error analyzing with AI:", err);
             const errorMsg = err.response?.data?.detail || "Erro ao analisar com IA";
@@ -284,6 +314,25 @@ export default function AccountInsights({ accountId }: AccountInsightsProps) {
                         <div className="flex items-center gap-2">
                             <Sparkles className="w-5 h-5 text-blue-600" />
                             <h3 className="text-lg font-bold text-blue-900">Análise de IA</h3>
+                            {analysisCache?.status === "hit" && analysisCache.created_at && (
+                                <span className="text-xs text-muted-foreground">
+                                    gerada em {new Date(analysisCache.created_at).toLocaleString("pt-BR")}
+                                </span>
+                            )}
+                            <Button
+                                variant="ghost"
+                                size="sm"
+                                className="ml-auto"
+                                onClick={() => analyzeWithAI(true)}
+                                disabled={analyzing}
+                            >
+                                {analyzing ? (
+                                    <Loader2 className="w-4 h-4 mr-2 animate-spin" />
+                                ) : (
+                                    <RefreshCw className="w-4 h-4 mr-2" />
+                                )}
+                                Reanalisar
+                            </Button>
                         </div>
 
                         {/* Summary */}
@@ -383,7 +432,7 @@ export default function AccountInsights({ accountId }: AccountInsightsProps) {
                 <div className="relative">
                     <div className="absolute inset-0 bg-gradient-to-r from-purple-500/10 via-blue-500/10 to-purple-500/10 blur-xl" />
                     <Button
-                        onClick={analyzeWithAI}
+                        onClick={() => analyzeWithAI()}
                         disabled={analyzing}
                         className="relative w-full h-16 bg-gradient-to-r from-purple-600 to-blue-600 hover:from-purple-700 hover:to-blue-700 text-white shadow-lg hover:shadow-xl transition-all duration-200 text-lg font-semibold"
                         size="lg"
@@ -1,4 +1,5 @@
 import { useMetrics } from '@/hooks/useMetrics';
+import { useHealthTrends } from '@/hooks/useHealthTrends';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import {
     DollarSign,
@@ -15,6 +16,7 @@ import {
 
 export function ExecutiveDashboard() {
     const metrics = useMetrics();
+    const { trends } = useHealthTrends();
 
     const formatCurrency = (value: number) => {
         return new Intl.NumberFormat('pt-BR', {
@@ -202,6 +204,46 @@ export function ExecutiveDashboard() {
                     </Card>
                 </div>
 
+                {/* Tendência de Health Scores */}
+                {trends && trends.summary.accounts > 0 && (
+                    <Card className="mt-4">
+                        <CardHeader>
+                            <CardTitle>Tendência de Health Scores</CardTitle>
+                            <CardDescription>Direção dos scores nos últimos 90 dias</CardDescription>
+                        </CardHeader>
+                        <CardContent>
+                            <div className="grid gap-4 md:grid-cols-4">
+                                <div>
+                                    <div className="flex items-center gap-1 text-2xl font-bold text-green-600">
+                                        <TrendingUp className="h-5 w-5" />
+                                        {trends.summary.improving}
+                                    </div>
+                                    <p className="text-xs text-muted-foreground">Em melhora</p>
+                                </div>
+                                <div>
+                                    <div className="text-2xl font-bold">{trends.summary.stable}</div>
+                                    <p className="text-xs text-muted-foreground">Estáveis</p>
+                                </div>
+                                <div>
+                                    <div className="flex items-center gap-1 text-2xl font-bold text-red-600">
+                                        <TrendingDown className="h-5 w-5" />
+                                        {trends.summary.declining}
+                                    </div>
+                                    <p className="text-xs text-muted-foreground">Em queda</p>
+                                </div>
+                                <div>
+                                    <div className="text-2xl font-bold">
+                                        {trends.summary.avgDelta30d !== null
+                                            ? `${trends.summary.avgDelta30d > 0 ? '+' : ''}${trends.summary.avgDelta30d.toFixed(1)}`
+                                            : '—'}
+                                    </div>
+                                    <p className="text-xs text-muted-foreground">Variação média (30 dias)</p>
+                                </div>
+                            </div>
+                        </CardContent>
+                    </Card>
+                )}
+
                 {/* Distribuição de Health Scores */}
                 <Card className="mt-4">
                     <CardHeader>
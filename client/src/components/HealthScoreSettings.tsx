@@ -2,7 +2,7 @@
  * HealthScoreSettings Component
  * Configuração de perguntas e pesos do Health Score
  */
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { Button } from "@/components/ui/button";
 import { Label } from "@/components/ui/label";
 import {
@@ -14,6 +14,7 @@ import {
 import { Separator } from "@/components/ui/separator";
 import { toast } from "sonner";
 import { HelpCircle, RotateCcw } from "lucide-react";
+import { getDefaultTenant, updateTenant, Tenant } from "@/api";
 
 // Perguntas padrão com pesos (10 perguntas do Manus)
 const DEFAULT_QUESTIONS = [
@@ -29,6 +30,17 @@ const DEFAULT_QUESTIONS = [
   { id: 10, text: "Indicação de NPS (Net Promoter Score)", category: "Crescimento", weight: 5 },
 ];
 
+// Pilar (usado no cálculo do backend) de cada categoria
+const CATEGORY_PILLARS: Record<string, string> = {
+  "Adoção": "Adoção e Engajamento",
+  "Valor": "Percepção de Valor",
+  "Relacionamento": "Relacionamento e Satisfação",
+  "Operacional": "Saúde Operacional",
+  "Crescimento": "Potencial de Crescimento",
+};
+
+const DEFAULT_THRESHOLDS = { champion: 90, healthy: 70, attention: 50, "at-risk": 30 };
+
 // Perfis pré-configurados
 const PROFILES = {
   balanced: {
@@ -62,6 +74,29 @@ export default function HealthScoreSettings() {
   const [questions, setQuestions] = useState(DEFAULT_QUESTIONS);
   const [selectedProfile, setSelectedProfile] = useState<string>("balanced");
   const [showExplanation, setShowExplanation] = useState(false);
+  const [tenant, setTenant] = useState<Tenant | null>(null);
+
+  useEffect(() => {
+    const loadSettings = async () => {
+      try {
+        const data = await getDefaultTenant();
+        setTenant(data);
+
+        const saved = data.settings?.healthScore?.questions as { id: string; weight: number }[] | undefined;
+        if (saved && saved.length > 0) {
+          const weights = Object.fromEntries(saved.map(q => [String(q.id), q.weight]));
+          setQuestions(DEFAULT_QUESTIONS.map(q => ({
+            ...q,
+            weight: weights[String(q.id)] ?? q.weight,
+          })));
+        }
+      } catch (error) {
+        console.error("Error loading health score settings:", error);
+      }
+    };
+
+    loadSettings();
+  }, []);
 
   const totalWeight = questions.reduce((sum, q) => sum + q.weight, 0);
 
@@ -89,10 +124,36 @@ export default function HealthScoreSettings() {
     toast.success("Configurações restauradas para o padrão!");
   };
 
-  const handleSave = () => {
+  const handleSave = async () => {
     // Salvar no localStorage
     localStorage.setItem("healthScoreQuestions", JSON.stringify(questions));
-    toast.success("Configurações de Health Score salvas!");
+
+    if (!tenant) {
+      toast.success("Configurações de Health Score salvas!");
+      return;
+    }
+
+    try {
+      // Questionário do tenant: usado pelo backend no cálculo das avaliações
+      const updatedSettings = {
+        ...tenant.settings,
+        healthScore: {
+          questions: questions.map(q => ({
+            id: String(q.id),
+            pillar: CATEGORY_PILLARS[q.category],
+            weight: q.weight,
+          })),
+          thresholds: tenant.settings?.healthScore?.thresholds ?? DEFAULT_THRESHOLDS,
+        },
+      };
+
+      const updated = await updateTenant(tenant.tenant_id, { settings: updatedSettings });
+      setTenant(updated);
+      toast.success("Configurações de Health Score salvas!");
+    } catch (error) {
+      console.error("Error saving health score settings:", error);
+      toast.error("Erro ao salvar configurações");
+    }
   };
 
   return (
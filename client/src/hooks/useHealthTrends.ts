@@ -0,0 +1,59 @@
+import { useState, useEffect } from 'react';
+import axios from 'axios';
+
+export interface HealthTrendPoint {
+    date: string;
+    score: number;
+}
+
+export interface HealthTrend {
+    accountId: string;
+    direction: 'improving' | 'stable' | 'declining';
+    evaluations: number;
+    currentScore: number | null;
+    lastEvaluation: string | null;
+    slope30d: number | null;
+    delta30d: number | null;
+    delta90d: number | null;
+    volatility: number | null;
+    series: HealthTrendPoint[];
+}
+
+export interface PortfolioHealthTrends {
+    summary: {
+        accounts: number;
+        improving: number;
+        stable: number;
+        declining: number;
+        avgDelta30d: number | null;
+    };
+    accounts: HealthTrend[];
+}
+
+// Tendências do portfólio inteiro, calculadas pelo backend em uma única query
+export function useHealthTrends() {
+    const [trends, setTrends] = useState<PortfolioHealthTrends | null>(null);
+    const [loading, setLoading] = useState<boolean>(true);
+    const [error, setError] = useState<string | null>(null);
+
+    useEffect(() => {
+        const fetchTrends = async () => {
+            try {
+                setLoading(true);
+                const response = await axios.get<PortfolioHealthTrends>('/api/v1/health-scores/trends');
+                setTrends(response.data);
+                setError(null);
+            } catch (err) {
+                console.error('Error fetching health trends:', err);
+                setError('Failed to fetch health trends');
+                setTrends(null);
+            } finally {
+                setLoading(false);
+            }
+        };
+
+        fetchTrends();
+    }, []);
+
+    return { trends, loading, error };
+}
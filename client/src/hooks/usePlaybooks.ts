@@ -15,7 +15,10 @@ export interface PlaybookDoc {
     id: string;
     name: string;
     description: string;
+    // Apenas no GET /playbooks/{id}; a listagem traz somente excerpt e wordCount
     content: string;
+    excerpt?: string;
+    wordCount?: number;
     category: string;
     tags: string[];
     version: string;
@@ -45,7 +48,7 @@ export function usePlaybooks() {
             const response = await axios.get(`${API_URL}/playbooks`, {
                 headers,
             });
-            console.log("🟢 Fetched playbooks response:", response.data);
+            console.log("🟢 Fetched playbooks:", response.data.length);
             setPlaybooks(response.data);
         } catch (err: any) {
             console.error("🔴 Erro ao carregar playbooks:", err);
@@ -0,0 +1,44 @@
+export interface ServerSentEvent {
+  event: string;
+  data: any;
+}
+
+/**
+ * Lê uma resposta text/event-stream (POST via fetch) evento a evento.
+ * Cada `data` é JSON em uma linha.
+ */
+export async function* readEventStream(response: Response): AsyncGenerator<ServerSentEvent> {
+  if (!response.body) return;
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let separator = buffer.indexOf("\n\n");
+      while (separator !== -1) {
+        const message = buffer.slice(0, separator);
+        buffer = buffer.slice(separator + 2);
+        separator = buffer.indexOf("\n\n");
+
+        let event = "message";
+        const dataLines: string[] = [];
+        for (const line of message.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) dataLines.push(line.slice(5).trimStart());
+        }
+        if (dataLines.length) {
+          yield { event, data: JSON.parse(dataLines.join("\n")) };
+        }
+      }
+    }
+  } finally {
+    // Interrompido antes do fim: fecha a conexão (o servidor cancela a geração)
+    reader.cancel().catch(() => undefined);
+  }
+}
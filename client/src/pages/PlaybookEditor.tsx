@@ -33,6 +33,7 @@ import {
   DialogTitle,
 } from "@/components/ui/dialog";
 import { Progress } from "@/components/ui/progress";
+import { readEventStream } from "@/lib/sse";
 
 interface PlaybookEditorProps {
   id?: string; // Se fornecido, modo de edição
@@ -108,7 +109,7 @@ export default function PlaybookEditor({ id }: PlaybookEditorProps) {
     setIsGenerating(true);
 
     try {
-      const response = await fetch("/api/v1/accounts/playbook/generate", {
+      const response = await fetch("/api/v1/accounts/playbook/generate/stream", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -124,16 +125,28 @@ export default function PlaybookEditor({ id }: PlaybookEditorProps) {
         throw new Error(errorData.detail || "Erro ao gerar playbook");
       }
 
-      const data = await response.json();
-
-      // Update form data with generated content
       setFormData(prev => ({
         ...prev,
-        content: data.content,
+        content: "",
         name: prev.name || generationTopic, // Use topic as name if empty
         description: prev.description || `Playbook gerado por IA sobre: ${generationTopic}`,
       }));
 
+      // Content is written into the editor as the model generates it
+      let generated = "";
+      for await (const { event, data } of readEventStream(response)) {
+        if (event === "token") {
+          if (!generated) setGenerationDialogOpen(false);
+          generated += data.text;
+          const partial = generated.replace(/^```(?:html)?\s*/, "");
+          setFormData(prev => ({ ...prev, content: partial }));
+        } else if (event === "done") {
+          setFormData(prev => ({ ...prev, content: data.content }));
+        } else if (event === "error") {
+          throw new Error(data.detail || "Erro ao gerar playbook");
+        }
+      }
+
       setGenerationDialogOpen(false);
       toast.success("Playbook gerado com sucesso! 🚀");
 
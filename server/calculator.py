@@ -2,21 +2,33 @@
 Health Score Calculator
 Lógica de cálculo de health scores baseada em scorecards configuráveis
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from uuid import UUID
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import json
 import httpx
 import logging
+import numpy as np
+
+from models import Account
 
 logger = logging.getLogger(__name__)
 
+# Peso de cada tipo de activity na frequência de engajamento
+ENGAGEMENT_TYPE_WEIGHTS = {"meeting": 3.0, "call": 2.0, "email": 1.0, "note": 0.5}
+
+# Composição do score de engajamento
+ENGAGEMENT_MIX = {"recency": 0.4, "frequency": 0.4, "cadence": 0.2}
+
 
 class HealthScoreCalculator:
     """Calculadora de Health Score"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, reference_time: Optional[datetime] = None):
         self.db = db
+        self._reference_time = reference_time
     
     async def calculate_score(
         self,
@@ -31,26 +43,10 @@ class HealthScoreCalculator:
         total_score = 0.0
         total_weight = 0.0
         
-        # Calcular score para cada componente
+        # Componentes em sequência: todos consultam a mesma Session (síncrona)
         for component in scorecard.components:
             try:
-                component_value = await self._calculate_component_score(
-                    account_id,
-                    tenant_id,
-                    component
-                )
-                
-                # Aplicar peso
-                weighted_score = component_value * (component.weight / 100.0)
-                total_score += weighted_score
-                total_weight += component.weight
-                
-                component_scores[component.name] = {
-                    "value": component_value,
-                    "weight": component.weight,
-                    "weighted_score": weighted_score
-                }
-            
+                result = await self._calculate_component_score(account_id, tenant_id, component)
             except Exception as e:
                 logger.error(f"Erro ao calcular componente {component.name}: {e}")
                 component_scores[component.name] = {
@@ -58,6 +54,18 @@ class HealthScoreCalculator:
                     "weight": component.weight,
                     "error": str(e)
                 }
+                continue
+            
+            # Aplicar peso
+            weighted_score = result * (component.weight / 100.0)
+            total_score += weighted_score
+            total_weight += component.weight
+            
+            component_scores[component.name] = {
+                "value": result,
+                "weight": component.weight,
+                "weighted_score": weighted_score
+            }
         
         # Normalizar score final (0-100)
         if total_weight > 0:
@@ -78,6 +86,134 @@ class HealthScoreCalculator:
             "calculated_at": datetime.utcnow()
         }
     
+    async def calculate_scores_batch(
+        self,
+        tenant_id: UUID,
+        scorecard: Any,
+        account_ids: Optional[List[str]] = None,
+        persist: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Recalcular o health score de várias accounts (ou de todo o portfólio)
+        
+        Cada componente é calculado para todas as accounts de uma vez
+        (consultas set-based), a ponderação é feita com NumPy sobre a
+        matriz accounts x componentes e o resultado é gravado em lote.
+        """
+        if account_ids is None:
+            account_ids = [row[0] for row in self.db.query(Account.id).order_by(Account.id).all()]
+        else:
+            account_ids = list(account_ids)
+        
+        if not account_ids:
+            return []
+        
+        components = list(scorecard.components)
+        n_accounts, n_components = len(account_ids), len(components)
+        
+        values = np.zeros((n_accounts, n_components), dtype=np.float64)
+        valid = np.ones(n_components, dtype=bool)
+        errors: Dict[int, str] = {}
+        
+        # Componentes em sequência: todos consultam a mesma Session (síncrona)
+        for index, component in enumerate(components):
+            try:
+                values[:, index] = await self._calculate_component_scores_batch(account_ids, tenant_id, component)
+            except Exception as e:
+                logger.error(f"Erro ao calcular componente {component.name} em lote: {e}")
+                valid[index] = False
+                errors[index] = str(e)
+        
+        weights = np.array([component.weight for component in components], dtype=np.float64)
+        effective_weights = np.where(valid, weights, 0.0)
+        weighted = values * (effective_weights / 100.0)
+        
+        # Normalizar score final (0-100)
+        total_weight = effective_weights.sum()
+        if total_weight > 0:
+            final_scores = weighted.sum(axis=1) / total_weight * 100
+        else:
+            final_scores = np.zeros(n_accounts)
+        
+        # Status pelo score sem arredondar, como em calculate_score
+        statuses = self._determine_statuses(final_scores)
+        final_scores = np.round(final_scores, 2)
+        calculated_at = datetime.utcnow()
+        
+        scores = []
+        for row, account_id in enumerate(account_ids):
+            component_scores = {}
+            for index, component in enumerate(components):
+                if not valid[index]:
+                    component_scores[component.name] = {
+                        "value": 0,
+                        "weight": component.weight,
+                        "error": errors[index]
+                    }
+                else:
+                    component_scores[component.name] = {
+                        "value": float(values[row, index]),
+                        "weight": component.weight,
+                        "weighted_score": float(weighted[row, index])
+                    }
+            
+            scores.append({
+                "account_id": account_id,
+                "tenant_id": tenant_id,
+                "scorecard_id": scorecard.scorecard_id,
+                "score_value": float(final_scores[row]),
+                "status": str(statuses[row]),
+                "component_scores": component_scores,
+                "calculated_at": calculated_at
+            })
+        
+        if persist:
+            self.save_scores(scores)
+        
+        return scores
+    
+    def save_scores(self, scores: List[Dict[str, Any]], chunk_size: int = 5000) -> int:
+        """
+        Gravar resultados em lote (um upsert por bloco de accounts)
+        """
+        for start in range(0, len(scores), chunk_size):
+            chunk = scores[start:start + chunk_size]
+            self.db.execute(text("""
+                INSERT INTO account_health_scores (
+                    account_id, scorecard_id, score_value, status, component_scores, calculated_at
+                )
+                SELECT v.account_id, v.scorecard_id, v.score_value, v.status,
+                       CAST(v.component_scores AS json), v.calculated_at
+                FROM unnest(
+                    CAST(:account_ids AS text[]),
+                    CAST(:scorecard_ids AS text[]),
+                    CAST(:score_values AS numeric[]),
+                    CAST(:statuses AS text[]),
+                    CAST(:component_scores AS text[]),
+                    CAST(:calculated_ats AS timestamptz[])
+                ) AS v(account_id, scorecard_id, score_value, status, component_scores, calculated_at)
+                ON CONFLICT (account_id) DO UPDATE SET
+                    scorecard_id = EXCLUDED.scorecard_id,
+                    score_value = EXCLUDED.score_value,
+                    status = EXCLUDED.status,
+                    component_scores = EXCLUDED.component_scores,
+                    calculated_at = EXCLUDED.calculated_at
+            """), {
+                "account_ids": [str(score["account_id"]) for score in chunk],
+                "scorecard_ids": [
+                    str(score["scorecard_id"]) if score["scorecard_id"] is not None else None
+                    for score in chunk
+                ],
+                "score_values": [score["score_value"] for score in chunk],
+                "statuses": [score["status"] for score in chunk],
+                "component_scores": [json.dumps(score["component_scores"]) for score in chunk],
+                "calculated_ats": [score["calculated_at"] for score in chunk],
+            })
+        
+        self.db.commit()
+        logger.info(f"Health scores gravados em lote: {len(scores)} account(s)")
+        return len(scores)
+    
     async def _calculate_component_score(
         self,
         account_id: UUID,
@@ -155,20 +291,12 @@ class HealthScoreCalculator:
         logic: Dict
     ) -> float:
         """
-        Calcular score de engajamento
-        Busca dados do servico-atividades
+        Calcular score de engajamento a partir das activities
+        (recência, frequência ponderada por tipo e cadência de interações)
         """
         try:
-            # TODO: Fazer chamada HTTP para servico-atividades
-            # Verificar:
-            # - Última interação (email, chamada, reunião)
-            # - Frequência de interações
-            # - Resposta a outreach
-            
-            max_days_since_contact = logic.get("max_days_since_contact", 14)
-            
-            # Mock: assumir 70% de engajamento
-            return 70.0
+            scores = self._engagement_scores([str(account_id)], logic)
+            return float(scores[0])
         
         except Exception as e:
             logger.error(f"Erro ao calcular engagement score: {e}")
@@ -222,19 +350,201 @@ class HealthScoreCalculator:
         logic: Dict
     ) -> float:
         """
-        Obter score manual (CSM Pulse)
+        Obter score manual (última avaliação de health score do CSM)
         """
         try:
-            # TODO: Buscar último score manual registrado pelo CSM
-            # Retornar valor padrão se não houver
-            
-            default_value = logic.get("default_value", 50.0)
-            return default_value
+            scores = self._manual_scores([str(account_id)], logic)
+            return float(scores[0])
         
         except Exception as e:
             logger.error(f"Erro ao obter manual score: {e}")
             return 50.0
     
+    async def _calculate_component_scores_batch(
+        self,
+        account_ids: List[str],
+        tenant_id: UUID,
+        component: Any
+    ) -> np.ndarray:
+        """
+        Calcular o score de um componente para várias accounts
+        
+        Returns:
+            Array com um valor por account, na ordem de account_ids
+        """
+        metric_source = component.metric_source
+        calculation_logic = component.calculation_logic
+        
+        if metric_source == "product_events":
+            value = await self._calculate_adoption_score(None, tenant_id, calculation_logic)
+        elif metric_source == "activities":
+            return await self._calculate_engagement_scores_batch(
+                account_ids, tenant_id, calculation_logic
+            )
+        elif metric_source == "surveys":
+            value = await self._calculate_feedback_score(None, tenant_id, calculation_logic)
+        elif metric_source == "support":
+            value = await self._calculate_support_score(None, tenant_id, calculation_logic)
+        elif metric_source == "manual":
+            return await self._get_manual_scores_batch(
+                account_ids, tenant_id, calculation_logic
+            )
+        else:
+            logger.warning(f"Metric source desconhecido: {metric_source}")
+            value = 50.0  # Score neutro
+        
+        # Fontes ainda sem dados por account retornam o mesmo valor para todas
+        return np.full(len(account_ids), value, dtype=np.float64)
+    
+    async def _calculate_engagement_scores_batch(
+        self,
+        account_ids: List[str],
+        tenant_id: UUID,
+        logic: Dict
+    ) -> np.ndarray:
+        """
+        Versão em lote de _calculate_engagement_score (uma query para todas as accounts)
+        """
+        try:
+            return self._engagement_scores(account_ids, logic)
+        except Exception as e:
+            logger.error(f"Erro ao calcular engagement score em lote: {e}")
+            return np.full(len(account_ids), 50.0, dtype=np.float64)
+    
+    async def _get_manual_scores_batch(
+        self,
+        account_ids: List[str],
+        tenant_id: UUID,
+        logic: Dict
+    ) -> np.ndarray:
+        """
+        Versão em lote de _get_manual_score (uma query para todas as accounts)
+        """
+        try:
+            return self._manual_scores(account_ids, logic)
+        except Exception as e:
+            logger.error(f"Erro ao obter manual score em lote: {e}")
+            return np.full(len(account_ids), 50.0, dtype=np.float64)
+    
+    def _engagement_scores(self, account_ids: List[str], logic: Dict) -> np.ndarray:
+        """
+        Score de engajamento (0-100) por account, na ordem de account_ids
+        
+        Usado tanto pelo caminho individual quanto pelo lote, garantindo
+        resultados idênticos. Componentes:
+        - recência: 100 até max_days_since_contact, caindo a 0 no dobro do prazo
+        - frequência: interações no período ponderadas por tipo vs. meta
+        - cadência: intervalo médio entre interações vs. cadência esperada
+        """
+        period_days = logic.get("period_days", 30)
+        max_days = max(float(logic.get("max_days_since_contact", 14)), 1.0)
+        target = float(logic.get("target_interactions", 8))
+        expected_cadence = float(logic.get("expected_cadence_days", 7))
+        type_weights = {**ENGAGEMENT_TYPE_WEIGHTS, **logic.get("type_weights", {})}
+        mix = {**ENGAGEMENT_MIX, **logic.get("mix", {})}
+        
+        rows = self.db.execute(text("""
+            SELECT
+                account_id,
+                EXTRACT(EPOCH FROM (:now - MAX(created_at))) / 86400.0 AS days_since_last,
+                COUNT(*) FILTER (WHERE created_at >= :since AND type = 'meeting') AS meetings,
+                COUNT(*) FILTER (WHERE created_at >= :since AND type = 'call') AS calls,
+                COUNT(*) FILTER (WHERE created_at >= :since AND type = 'email') AS emails,
+                COUNT(*) FILTER (WHERE created_at >= :since AND type = 'note') AS notes,
+                COUNT(*) FILTER (WHERE created_at >= :since) AS period_total,
+                EXTRACT(EPOCH FROM (
+                    MAX(created_at) FILTER (WHERE created_at >= :since)
+                    - MIN(created_at) FILTER (WHERE created_at >= :since)
+                )) / 86400.0 AS period_span_days
+            FROM activities
+            WHERE account_id = ANY(CAST(:account_ids AS text[]))
+              AND type <> 'system'
+              AND created_at <= :now
+            GROUP BY account_id
+        """), {
+            "account_ids": list(account_ids),
+            "now": self._now(),
+            "since": self._now() - timedelta(days=period_days),
+        }).fetchall()
+        
+        index = {account_id: i for i, account_id in enumerate(account_ids)}
+        n = len(account_ids)
+        days_since = np.full(n, np.inf)
+        weighted_count = np.zeros(n)
+        period_total = np.zeros(n)
+        span_days = np.zeros(n)
+        
+        for row in rows:
+            i = index[row[0]]
+            days_since[i] = float(row[1]) if row[1] is not None else np.inf
+            weighted_count[i] = (
+                row[2] * type_weights["meeting"]
+                + row[3] * type_weights["call"]
+                + row[4] * type_weights["email"]
+                + row[5] * type_weights["note"]
+            )
+            period_total[i] = row[6]
+            span_days[i] = float(row[7]) if row[7] is not None else 0.0
+        
+        # Recência
+        recency = np.clip(1.0 - (days_since - max_days) / max_days, 0.0, 1.0) * 100
+        
+        # Frequência
+        frequency = np.clip(weighted_count / target, 0.0, 1.0) * 100 if target > 0 else np.zeros(n)
+        
+        # Cadência: 2+ interações no período -> intervalo médio; 1 -> meio termo
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_gap = np.where(period_total >= 2, span_days / np.maximum(period_total - 1, 1), np.inf)
+            cadence = np.where(
+                avg_gap <= expected_cadence,
+                100.0,
+                np.clip(expected_cadence / avg_gap, 0.0, 1.0) * 100
+            )
+        cadence = np.where(period_total == 1, 50.0, cadence)
+        cadence = np.where(period_total == 0, 0.0, cadence)
+        
+        total_mix = mix["recency"] + mix["frequency"] + mix["cadence"]
+        scores = (
+            recency * mix["recency"]
+            + frequency * mix["frequency"]
+            + cadence * mix["cadence"]
+        ) / total_mix
+        return np.round(scores, 2)
+    
+    def _manual_scores(self, account_ids: List[str], logic: Dict) -> np.ndarray:
+        """
+        Score manual por account: total_score da avaliação mais recente
+        (default_value quando a account não tem avaliações)
+        """
+        default_value = float(logic.get("default_value", 50.0))
+        
+        # Avaliação mais recente via ponteiro desnormalizado em accounts (lookup por PK)
+        rows = self.db.execute(text("""
+            SELECT a.id, e.total_score
+            FROM accounts a
+            JOIN health_score_evaluations e ON e.id = a.latest_evaluation_id
+            WHERE a.id = ANY(CAST(:account_ids AS text[]))
+        """), {"account_ids": list(account_ids)}).fetchall()
+        
+        index = {account_id: i for i, account_id in enumerate(account_ids)}
+        scores = np.full(len(account_ids), default_value, dtype=np.float64)
+        for account_id, latest_score in rows:
+            if latest_score is not None:
+                scores[index[account_id]] = float(latest_score)
+        return scores
+    
+    def _now(self) -> datetime:
+        # Fixado por instância para que lote e individual usem a mesma referência
+        if self._reference_time is None:
+            self._reference_time = datetime.now(timezone.utc)
+        return self._reference_time
+    
+    def _determine_statuses(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Versão vetorizada de _determine_status
+        """
+        return np.select([scores >= 75, scores >= 50], ["green", "yellow"], default="red")
+    
     def _determine_status(self, score: float) -> str:
         """
         Determinar status categórico baseado no score
@@ -27,6 +27,41 @@ class Settings(BaseSettings):
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     CACHE_TTL: int = 300  # 5 minutos
     
+    # Cache do contexto de intelligence por account
+    CONTEXT_CACHE_ENABLED: bool = os.getenv("CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+    CONTEXT_CACHE_BACKEND: str = os.getenv("CONTEXT_CACHE_BACKEND", "memory")  # memory, redis
+    CONTEXT_CACHE_MAX_ENTRIES: int = 1000
+    
+    # Análises de IA persistidas (account_analyses)
+    ANALYSIS_CACHE_TTL_HOURS: float = float(os.getenv("ANALYSIS_CACHE_TTL_HOURS", "24"))
+    ANALYSIS_JOB_CONCURRENCY: int = int(os.getenv("ANALYSIS_JOB_CONCURRENCY", "4"))
+    ANALYSIS_JOB_TIMEOUT_MINUTES: float = 10
+    # Heartbeat dos jobs ativos; sem heartbeat por STALE_SECONDS o job é dado como interrompido
+    ANALYSIS_JOB_HEARTBEAT_SECONDS: float = float(os.getenv("ANALYSIS_JOB_HEARTBEAT_SECONDS", "30"))
+    ANALYSIS_JOB_STALE_SECONDS: float = float(os.getenv("ANALYSIS_JOB_STALE_SECONDS", "120"))
+    # Análise noturna do portfólio (limites da conta no provedor)
+    PORTFOLIO_ANALYSIS_RPM: float = float(os.getenv("PORTFOLIO_ANALYSIS_RPM", "60"))
+    PORTFOLIO_ANALYSIS_TPM: float = float(os.getenv("PORTFOLIO_ANALYSIS_TPM", "150000"))
+    PORTFOLIO_ANALYSIS_CONCURRENCY: int = int(os.getenv("PORTFOLIO_ANALYSIS_CONCURRENCY", "4"))
+    ANALYSIS_PROMPT_TOKEN_BUDGET: int = int(os.getenv("ANALYSIS_PROMPT_TOKEN_BUDGET", "1000"))
+    
+    # Refresh de notícias em lote (Radar CS)
+    NEWS_REFRESH_CONCURRENCY: int = int(os.getenv("NEWS_REFRESH_CONCURRENCY", "4"))
+    NEWS_OPENAI_RPM: float = float(os.getenv("NEWS_OPENAI_RPM", "60"))
+    NEWS_PERPLEXITY_RPM: float = float(os.getenv("NEWS_PERPLEXITY_RPM", "50"))
+    
+    # Clientes de LLM (OpenAI/Perplexity) compartilhados por worker
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_PROVIDER_CONCURRENCY: int = int(os.getenv("LLM_PROVIDER_CONCURRENCY", "4"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_MAX_RETRIES: int = 3
+    # openai = provedores reais; fake = backend local simulado (benchmarks/testes offline)
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "openai")
+    LLM_FAKE_LATENCY_MS: float = float(os.getenv("LLM_FAKE_LATENCY_MS", "500"))
+    LLM_FAKE_TOKENS_PER_SECOND: float = float(os.getenv("LLM_FAKE_TOKENS_PER_SECOND", "80"))
+    LLM_FAKE_ERROR_RATE: float = float(os.getenv("LLM_FAKE_ERROR_RATE", "0"))
+    LLM_FAKE_SEED: int = 0
+    
     # RabbitMQ (Message Broker)
     RABBITMQ_URL: str = os.getenv(
         "RABBITMQ_URL",
@@ -73,7 +108,14 @@ class Settings(BaseSettings):
     # Paginação
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
-    
+
+    # Playbooks
+    PLAYBOOK_VIEWS_FLUSH_INTERVAL: int = 10  # segundos
+
+    # Snapshots diários de accounts
+    SNAPSHOT_JOB_ENABLED: bool = os.getenv("SNAPSHOT_JOB_ENABLED", "true").lower() == "true"
+    SNAPSHOT_JOB_INTERVAL_HOURS: float = 6
+
     # Ambiente
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")  # development, staging, production
     
@@ -10,6 +10,7 @@ import logging
 import models, schemas
 import models, schemas
 import uuid
+from services.context_cache import account_context_cache
 
 logger = logging.getLogger(__name__)
 
@@ -145,6 +146,7 @@ def update_account(
         setattr(db_account, field, value)
     
     db.commit()
+    account_context_cache.invalidate(db_account.id)
     db.refresh(db_account)
     return db_account
 
@@ -155,8 +157,10 @@ def delete_account(db: Session, account_id: UUID, tenant_id: UUID) -> bool:
     if not db_account:
         return False
     
+    account_id = db_account.id
     db.delete(db_account)
     db.commit()
+    account_context_cache.invalidate(account_id)
     return True
 
 
@@ -367,6 +371,7 @@ def create_activity(db: Session, activity: schemas.ActivityCreate, organization_
     )
     db.add(db_activity)
     db.commit()
+    account_context_cache.invalidate(activity.account_id)
     db.refresh(db_activity)
     return db_activity
 
@@ -376,12 +381,15 @@ def update_activity(db: Session, activity_id: str, activity_update: schemas.Acti
     db_activity = db.query(models.Activity).filter(models.Activity.id == activity_id).first()
     if not db_activity:
         return None
+    previous_account_id = db_activity.account_id
     
     update_data = activity_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_activity, field, value)
     
+    current_account_id = db_activity.account_id
     db.commit()
+    account_context_cache.invalidate(previous_account_id, current_account_id)
     db.refresh(db_activity)
     return db_activity
 
@@ -392,8 +400,10 @@ def delete_activity(db: Session, activity_id: str, organization_id: str) -> bool
     if not db_activity:
         return False
     
+    account_id = db_activity.account_id
     db.delete(db_activity)
     db.commit()
+    account_context_cache.invalidate(account_id)
     return True
 
 
@@ -446,6 +456,7 @@ def create_task(db: Session, task: schemas.TaskCreate, organization_id: str, tas
     )
     db.add(db_task)
     db.commit()
+    account_context_cache.invalidate(task.account_id)
     db.refresh(db_task)
     return db_task
 
@@ -455,12 +466,15 @@ def update_task(db: Session, task_id: str, task_update: schemas.TaskUpdate) -> O
     db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
     if not db_task:
         return None
+    previous_account_id = db_task.account_id
     
     update_data = task_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_task, field, value)
     
+    current_account_id = db_task.account_id
     db.commit()
+    account_context_cache.invalidate(previous_account_id, current_account_id)
     db.refresh(db_task)
     return db_task
 
@@ -471,8 +485,10 @@ def delete_task(db: Session, task_id: str, organization_id: str) -> bool:
     if not db_task:
         return False
     
+    account_id = db_task.account_id
     db.delete(db_task)
     db.commit()
+    account_context_cache.invalidate(account_id)
     return True
 
 
@@ -501,15 +517,21 @@ def create_health_score_evaluation(
         pilar_scores=pilar_scores
     )
     db.add(db_evaluation)
+    # Grava a avaliação antes de apontar a account para ela (FK circular)
+    db.flush()
     
-    # Update account health score
+    # Update account health score and latest evaluation pointer (same transaction)
     account = db.query(models.Account).filter(models.Account.id == account_id).first()
     if account:
         account.health_score = total_score
+        account.latest_evaluation_id = evaluation_id
+        account.latest_classification = classification
+        account.latest_pilar_scores = pilar_scores
         # Update status based on classification if needed
         # account.health_status = classification
         
     db.commit()
+    account_context_cache.invalidate(account_id)
     db.refresh(db_evaluation)
     return db_evaluation
 
@@ -532,6 +554,9 @@ def get_latest_health_score_evaluation(
     account_id: str
 ) -> Optional[models.HealthScoreEvaluation]:
     """Buscar a avaliação mais recente de health score para um account"""
+    account = db.query(models.Account).filter(models.Account.id == account_id).first()
+    if account and account.latest_evaluation_id:
+        return get_latest_health_score_evaluation_for(db, account)
     return db.query(models.HealthScoreEvaluation).filter(
         models.HealthScoreEvaluation.account_id == account_id
     ).order_by(
@@ -539,6 +564,16 @@ def get_latest_health_score_evaluation(
     ).first()
 
 
+def get_latest_health_score_evaluation_for(
+    db: Session,
+    account: models.Account
+) -> Optional[models.HealthScoreEvaluation]:
+    """Avaliação mais recente a partir do ponteiro desnormalizado da account (busca por PK)"""
+    if not account.latest_evaluation_id:
+        return None
+    return db.get(models.HealthScoreEvaluation, account.latest_evaluation_id)
+
+
 # ============================================================================
 # INVITE CRUD
 # ============================================================================
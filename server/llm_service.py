@@ -5,7 +5,8 @@ Integração com OpenAI para IA Generativa
 import os
 import logging
 from typing import Dict, Any, List
-from openai import OpenAI
+
+from services.llm_clients import llm_clients
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +17,12 @@ class LLMService:
     """
     
     def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
+        self.api_key = os.getenv("OPENAI_API_KEY") or llm_clients.default_api_key
         if not self.api_key:
             logger.warning("OPENAI_API_KEY não configurada")
-            self.client = None
-        else:
-            self.client = OpenAI(api_key=self.api_key)
+        
+        # Cliente compartilhado (pool de conexões, retentativas, limite de concorrência)
+        self.client = llm_clients.client(self.api_key) if self.api_key else None
         
         # Configurações
         self.model = "gpt-4.1-mini"  # Modelo configurado no ambiente
@@ -46,7 +47,8 @@ class LLMService:
             prompt = self._build_nba_prompt(context)
             
             # Chamar LLM
-            response = self.client.chat.completions.create(
+            response = await llm_clients.chat(
+                self.api_key,
                 model=self.model,
                 messages=[
                     {
@@ -97,7 +99,8 @@ class LLMService:
             prompt = self._build_summarization_prompt(activities)
             
             # Chamar LLM
-            response = self.client.chat.completions.create(
+            response = await llm_clients.chat(
+                self.api_key,
                 model=self.model,
                 messages=[
                     {
@@ -131,7 +134,8 @@ class LLMService:
             return {"sentiment": "neutral", "score": 0.5}
         
         try:
-            response = self.client.chat.completions.create(
+            response = await llm_clients.chat(
+                self.api_key,
                 model=self.model,
                 messages=[
                     {
@@ -10,18 +10,34 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime, timedelta
+import asyncio
 import logging
 import traceback
 import csv
 import io
 import codecs
 import codecs
+from fastapi import Request, Response
 from fastapi.responses import StreamingResponse
+from starlette.middleware.gzip import GZipMiddleware
 import pandas as pd
 
 from config import settings
 from database import get_db, check_database_health, init_db
 from auth import get_current_user, CurrentUser
+from services.view_counter import playbook_view_counter
+from services.daily_snapshots import daily_snapshot_job
+from services.playbook_content import summarize_content
+from services.playbook_revisions import PlaybookRevisionService
+from services.health_trends import HealthTrendService
+from services.health_questionnaire import scoring_plan_cache, recalculate_evaluations
+from services.context_cache import account_context_cache
+from services.analysis_jobs import analysis_job_runner
+from services.llm_clients import llm_clients
+from services.portfolio_analysis import portfolio_analysis_scheduler
+from services.tenant_settings import tenant_settings_cache, tenant_settings_listener
+from serialization import FastJSONResponse, orm_response
+from sse import sse_response
 import crud, schemas, models
 
 # Configurar logging
@@ -38,6 +54,7 @@ app = FastAPI(
     description="Microsserviço de CRM - Gerenciamento de Contas, Contatos e Assinaturas",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
 )
 
 # --- CORS para frontend local ---
@@ -52,6 +69,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 # --- fim CORS ---
+
+# Compressão de respostas grandes (ex: content HTML de playbooks)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 # Force reload
 
 # EVENTOS DE INICIALIZAÇÃO E SHUTDOWN
@@ -62,12 +82,24 @@ async def startup_event():
     """Executado ao iniciar a aplicação"""
     logger.info(f"Iniciando {settings.SERVICE_NAME} v{settings.SERVICE_VERSION}")
     init_db()
+    playbook_view_counter.start()
+    if settings.SNAPSHOT_JOB_ENABLED:
+        daily_snapshot_job.start()
+    analysis_job_runner.start()
+    tenant_settings_listener.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Executado ao desligar a aplicação"""
     logger.info(f"Desligando {settings.SERVICE_NAME}")
+    # Persistir views pendentes antes de encerrar o worker
+    await playbook_view_counter.stop()
+    await daily_snapshot_job.stop()
+    await analysis_job_runner.stop()
+    await portfolio_analysis_scheduler.stop()
+    await llm_clients.aclose()
+    tenant_settings_listener.stop()
 
 
 # ============================================================================
@@ -95,26 +127,26 @@ def health_check(db: Session = Depends(get_db)):
 def debug_perplexity_check(db: Session = Depends(get_db)):
     """DEBUG: Verificar se a chave Perplexity pode ser lida"""
     try:
-        tenant = db.query(models.Tenant).first()
+        tenant = tenant_settings_cache.get(db)
         
         if not tenant:
             return {"error": "No tenant found", "configured": False}
         
-        ai_settings = tenant.settings.get('ai', {}) if tenant.settings else {}
-        perplexity_key = ai_settings.get('perplexityApiKey', '')
-        openai_key = ai_settings.get('openaiApiKey', '')
+        ai_settings = tenant.ai
+        perplexity_key = ai_settings.perplexity_api_key
+        openai_key = ai_settings.openai_api_key
         
         return {
             "tenant_id": tenant.tenant_id,
             "has_settings": bool(tenant.settings),
-            "ai_settings_keys": list(ai_settings.keys()),
+            "ai_settings_keys": list((tenant.settings.get('ai') or {}).keys()),
             "openai_configured": bool(openai_key),
             "openai_key_length": len(openai_key) if openai_key else 0,
             "perplexity_configured": bool(perplexity_key),
             "perplexity_key_length": len(perplexity_key) if perplexity_key else 0,
             "perplexity_preview": perplexity_key[:30] + "..." if perplexity_key else None,
-            "perplexity_valid": len(str(perplexity_key).strip()) > 10 if perplexity_key else False,
-            "would_use_perplexity": bool(perplexity_key and len(str(perplexity_key).strip()) > 10)
+            "perplexity_valid": ai_settings.perplexity_enabled,
+            "would_use_perplexity": ai_settings.perplexity_enabled
         }
     except Exception as e:
         logger.error(f"Debug endpoint error: {str(e)}")
@@ -150,7 +182,7 @@ async def list_users(
     """Lista todos os usuários"""
     try:
         users = db.query(models.User).offset(skip).limit(limit).all()
-        return users
+        return orm_response(schemas.UserResponse, users)
     except Exception as e:
         logger.error(f"Erro ao listar usuários: {str(e)}")
         raise HTTPException(
@@ -418,9 +450,10 @@ async def validate_invite_token(
 # ROTAS DE CLIENTS
 # ============================================================================
 
-from routers import tenants, intelligence
+from routers import tenants, intelligence, portfolio
 app.include_router(tenants.router, prefix=settings.API_PREFIX)
 app.include_router(intelligence.router)
+app.include_router(portfolio.router)
 
 @app.get(
     f"{settings.API_PREFIX}/clients",
@@ -434,7 +467,7 @@ async def list_clients(
     """Lista todos os clients"""
     try:
         clients = db.query(models.Client).all()
-        return clients
+        return orm_response(schemas.ClientResponse, clients)
     except Exception as e:
         logger.error(f"Erro ao listar clients: {str(e)}")
         logger.error(traceback.format_exc())
@@ -462,7 +495,7 @@ async def get_client(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Client {client_id} não encontrado"
             )
-        return client
+        return orm_response(schemas.ClientResponse, client)
     except HTTPException:
         raise
     except Exception as e:
@@ -816,7 +849,7 @@ async def list_accounts(
     """Lista todos os accounts"""
     try:
         accounts = db.query(models.Account).all()
-        return accounts
+        return orm_response(schemas.AccountResponse, accounts)
     except Exception as e:
         logger.error(f"Erro ao listar accounts: {str(e)}")
         logger.error(traceback.format_exc())
@@ -844,7 +877,7 @@ async def get_account(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Account {account_id} não encontrado"
             )
-        return account
+        return orm_response(schemas.AccountResponse, account)
     except HTTPException:
         raise
     except Exception as e:
@@ -940,6 +973,7 @@ async def update_account(
         db_account.updated_at = datetime.utcnow()
         
         db.commit()
+        account_context_cache.invalidate(account_id)
         db.refresh(db_account)
         
         logger.info(f"Account atualizado com sucesso: {account_id}")
@@ -978,6 +1012,7 @@ async def delete_account(
         
         db.delete(db_account)
         db.commit()
+        account_context_cache.invalidate(account_id)
         
         logger.info(f"Account deletado com sucesso: {account_id}")
         return None
@@ -1272,6 +1307,34 @@ async def list_news(
         )
 
 
+@app.get(
+    f"{settings.API_PREFIX}/news/{{news_id}}/affected-accounts",
+    summary="Accounts Afetadas por uma Notícia",
+    description="Todas as accounts que receberam o mesmo artigo, com relevância e insights de cada uma"
+)
+async def get_news_affected_accounts(
+    news_id: str,
+    db: Session = Depends(get_db)
+):
+    """Quem mais é afetado pela mesma notícia (id do item do Radar CS ou do artigo)"""
+    from services.news_service import NewsService
+    
+    try:
+        result = NewsService(db).get_affected_accounts(news_id)
+    except Exception as e:
+        logger.error(f"Erro ao buscar accounts afetadas pela notícia {news_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar accounts afetadas: {str(e)}"
+        )
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Notícia {news_id} não encontrada"
+        )
+    return result
+
+
 @app.post(
     f"{settings.API_PREFIX}/news/refresh/{{account_id}}",
     summary="Buscar Notícias para Account",
@@ -1329,13 +1392,23 @@ async def refresh_all_news(
         from services.news_service import NewsService
         
         news_service = NewsService(db)
-        results = await news_service.fetch_news_for_all_accounts(csm_filter=csm)
+        batch = await news_service.fetch_news_for_all_accounts(
+            csm_filter=csm,
+            on_progress=lambda p: logger.info(
+                f"Refresh de notícias: {p['done']}/{p['total']} ({p['account_id']}"
+                f"{', erro' if p['error'] else ''})"
+            )
+        )
+        results = batch["results"]
         
         total_news = sum(len(items) for items in results.values())
         
         return {
             "accounts_processed": len(results),
             "total_news_fetched": total_news,
+            "failed_accounts": len(batch["failures"]),
+            "failures": batch["failures"],
+            "duration_seconds": batch["duration_seconds"],
             "results": results
         }
         
@@ -1348,6 +1421,59 @@ async def refresh_all_news(
         )
 
 
+@app.post(
+    f"{settings.API_PREFIX}/news/refresh-all/stream",
+    summary="Buscar Notícias para Todos os Accounts (progresso via SSE)",
+    description="Mesmo que /news/refresh-all, com um evento de progresso por account"
+)
+async def refresh_all_news_stream(
+    request: Request,
+    csm: Optional[str] = Query(None, description="Filtrar por CSM (opcional)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Eventos: start, progress ({"done", "total", "account_id", "news_count",
+    "cached", "error"}), done (resumo sem a lista de notícias) e error.
+    Fechar a conexão cancela as buscas em andamento.
+    """
+    from services.news_service import NewsService
+    
+    news_service = NewsService(db)
+    
+    async def events():
+        progress: asyncio.Queue = asyncio.Queue()
+        batch_task = asyncio.create_task(
+            news_service.fetch_news_for_all_accounts(csm_filter=csm, on_progress=progress.put_nowait)
+        )
+        try:
+            while not batch_task.done() or not progress.empty():
+                get_event = asyncio.ensure_future(progress.get())
+                await asyncio.wait({get_event, batch_task}, return_when=asyncio.FIRST_COMPLETED)
+                if get_event.done():
+                    yield "progress", get_event.result()
+                else:
+                    get_event.cancel()
+            batch = batch_task.result()
+            yield "done", {
+                "accounts_processed": len(batch["results"]),
+                "total_news_fetched": sum(len(items) for items in batch["results"].values()),
+                "failed_accounts": len(batch["failures"]),
+                "failures": batch["failures"],
+                "cached": batch["cached"],
+                "fetched": batch["fetched"],
+                "duration_seconds": batch["duration_seconds"],
+            }
+        finally:
+            if not batch_task.done():
+                batch_task.cancel()
+                try:
+                    await batch_task
+                except asyncio.CancelledError:
+                    pass
+    
+    return sse_response(request, events())
+
+
 # ============================================================================
 # ACTIVITIES ROUTES
 # ============================================================================
@@ -1380,6 +1506,7 @@ async def create_activity(
         
         db.add(db_activity)
         db.commit()
+        account_context_cache.invalidate(activity_dict.get("account_id"))
         db.refresh(db_activity)
         
         return db_activity
@@ -1405,7 +1532,7 @@ async def list_activities(
     """Lista todas as activities"""
     try:
         activities = db.query(models.Activity).offset(skip).limit(limit).all()
-        return activities
+        return orm_response(schemas.ActivityResponse, activities)
     except Exception as e:
         logger.error(f"Erro ao listar activities: {str(e)}")
         raise HTTPException(
@@ -1520,6 +1647,7 @@ async def create_task(
         
         db.add(db_task)
         db.commit()
+        account_context_cache.invalidate(task_dict.get("account_id"))
         db.refresh(db_task)
         
         logger.info(f"Task criada com sucesso: {task_id}")
@@ -1546,7 +1674,7 @@ async def list_tasks(
     """Lista todas as tasks"""
     try:
         tasks = db.query(models.Task).offset(skip).limit(limit).all()
-        return tasks
+        return orm_response(schemas.TaskResponse, tasks)
     except Exception as e:
         logger.error(f"Erro ao listar tasks: {str(e)}")
         raise HTTPException(
@@ -1640,11 +1768,10 @@ async def delete_task(
 async def list_playbooks(
     db: Session = Depends(get_db)
 ):
-    """Listar todos os playbooks"""
+    """Listar playbooks (projeção resumida, sem o content completo)"""
     try:
-        logger.info("🔵 Listando playbooks...")
         result = db.execute(text("""
-            SELECT id, name, description, content, category, tags, version, 
+            SELECT id, name, description, excerpt, word_count, category, tags, version, 
                    author, views, is_active, created_at, updated_at
             FROM playbooks
             ORDER BY created_at DESC
@@ -1655,18 +1782,18 @@ async def list_playbooks(
                 "id": str(row[0]),
                 "name": row[1],
                 "description": row[2],
-                "content": row[3],
-                "category": row[4],
-                "tags": row[5] if row[5] else [],
-                "version": row[6],
-                "author": row[7],
-                "views": row[8],
-                "is_active": row[9],
-                "createdAt": row[10].isoformat() if row[10] else None,
-                "updatedAt": row[11].isoformat() if row[11] else None,
+                "excerpt": row[3] or "",
+                "wordCount": row[4] or 0,
+                "category": row[5],
+                "tags": row[6] if row[6] else [],
+                "version": row[7],
+                "author": row[8],
+                "views": (row[9] or 0) + playbook_view_counter.pending(row[0]),
+                "is_active": row[10],
+                "createdAt": row[11].isoformat() if row[11] else None,
+                "updatedAt": row[12].isoformat() if row[12] else None,
             })
-        logger.info(f"🟢 Playbooks encontrados: {len(playbooks)}")
-        logger.info(f"🟢 Dados: {playbooks}")
+        logger.debug(f"Playbooks encontrados: {len(playbooks)}")
         return playbooks
     except Exception as e:
         logger.error(f"Erro ao listar playbooks: {str(e)}")
@@ -1679,14 +1806,30 @@ async def list_playbooks(
 )
 async def get_playbook(
     playbook_id: int,
+    request: Request,
     current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Obter um playbook específico"""
+    """Obter um playbook específico (com content completo e ETag)"""
     try:
+        # Verificação barata de versão antes de carregar o content
+        result = db.execute(text("""
+            SELECT updated_at FROM playbooks WHERE id = :playbook_id
+        """), {"playbook_id": playbook_id})
+        
+        version_row = result.fetchone()
+        if not version_row:
+            raise HTTPException(status_code=404, detail="Playbook não encontrado")
+        
+        # ETag fraco: views mudam a cada acesso e não invalidam o corpo
+        updated_at = version_row[0]
+        etag = f'W/"{playbook_id}-{int(updated_at.timestamp() * 1000000) if updated_at else 0}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
         result = db.execute(text("""
             SELECT id, name, description, content, category, tags, version, 
-                   author, views, is_active, created_at, updated_at
+                   author, views, is_active, created_at, updated_at, excerpt, word_count
             FROM playbooks
             WHERE id = :playbook_id
         """), {"playbook_id": playbook_id})
@@ -1695,20 +1838,25 @@ async def get_playbook(
         if not row:
             raise HTTPException(status_code=404, detail="Playbook não encontrado")
         
-        return {
-            "id": str(row[0]),
-            "name": row[1],
-            "description": row[2],
-            "content": row[3],
-            "category": row[4],
-            "tags": row[5] if row[5] else [],
-            "version": row[6],
-            "author": row[7],
-            "views": row[8],
-            "is_active": row[9],
-            "createdAt": row[10].isoformat() if row[10] else None,
-            "updatedAt": row[11].isoformat() if row[11] else None,
-        }
+        return FastJSONResponse(
+            content={
+                "id": str(row[0]),
+                "name": row[1],
+                "description": row[2],
+                "content": row[3],
+                "category": row[4],
+                "tags": row[5] if row[5] else [],
+                "version": row[6],
+                "author": row[7],
+                "views": (row[8] or 0) + playbook_view_counter.pending(row[0]),
+                "is_active": row[9],
+                "createdAt": row[10].isoformat() if row[10] else None,
+                "updatedAt": row[11].isoformat() if row[11] else None,
+                "excerpt": row[12] or "",
+                "wordCount": row[13] or 0,
+            },
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -1730,26 +1878,39 @@ async def create_playbook(
     try:
         import json
         
+        content = playbook_data.get("content", "")
+        excerpt, word_count = summarize_content(content)
+        
         result = db.execute(text("""
             INSERT INTO playbooks (
-                name, description, content, category, tags, version, author, is_active
+                name, description, content, excerpt, word_count, category, tags, version, author, is_active
             ) VALUES (
-                :name, :description, :content, :category, :tags, :version, :author, :is_active
+                :name, :description, :content, :excerpt, :word_count, :category, :tags, :version, :author, :is_active
             ) RETURNING id, name, description, content, category, tags, version, 
-                        author, views, is_active, created_at, updated_at
+                        author, views, is_active, created_at, updated_at, excerpt, word_count
         """), {
             "name": playbook_data.get("name"),
             "description": playbook_data.get("description", ""),
-            "content": playbook_data.get("content", ""),
+            "content": content,
+            "excerpt": excerpt,
+            "word_count": word_count,
             "category": playbook_data.get("category", ""),
             "tags": json.dumps(playbook_data.get("tags", [])),
             "version": playbook_data.get("version", "1.0"),
             "author": playbook_data.get("author", current_user.email),
             "is_active": playbook_data.get("is_active", True),
         })
+        row = result.fetchone()
         
+        # Revisão inicial (mesma transação do insert)
+        PlaybookRevisionService(db).record_revision(
+            playbook_id=row[0],
+            content=row[3],
+            author=current_user.email,
+            name=row[1],
+            version=row[6],
+        )
         db.commit()
-        row = result.fetchone()
         
         return {
             "id": str(row[0]),
@@ -1764,6 +1925,8 @@ async def create_playbook(
             "is_active": row[9],
             "createdAt": row[10].isoformat() if row[10] else None,
             "updatedAt": row[11].isoformat() if row[11] else None,
+            "excerpt": row[12] or "",
+            "wordCount": row[13] or 0,
         }
     except Exception as e:
         db.rollback()
@@ -1797,7 +1960,10 @@ async def update_playbook(
             params["description"] = playbook_data["description"]
         if "content" in playbook_data:
             update_fields.append("content = :content")
+            update_fields.append("excerpt = :excerpt")
+            update_fields.append("word_count = :word_count")
             params["content"] = playbook_data["content"]
+            params["excerpt"], params["word_count"] = summarize_content(playbook_data["content"])
         if "category" in playbook_data:
             update_fields.append("category = :category")
             params["category"] = playbook_data["category"]
@@ -1821,16 +1987,25 @@ async def update_playbook(
             SET {', '.join(update_fields)}
             WHERE id = :playbook_id
             RETURNING id, name, description, content, category, tags, version, 
-                      author, views, is_active, created_at, updated_at
+                      author, views, is_active, created_at, updated_at, excerpt, word_count
         """
         
         result = db.execute(text(query), params)
-        db.commit()
-        
         row = result.fetchone()
         if not row:
+            db.rollback()
             raise HTTPException(status_code=404, detail="Playbook não encontrado")
         
+        if "content" in playbook_data:
+            PlaybookRevisionService(db).record_revision(
+                playbook_id=row[0],
+                content=row[3],
+                author=current_user.email,
+                name=row[1],
+                version=row[6],
+            )
+        db.commit()
+        
         return {
             "id": str(row[0]),
             "name": row[1],
@@ -1844,6 +2019,8 @@ async def update_playbook(
             "is_active": row[9],
             "createdAt": row[10].isoformat() if row[10] else None,
             "updatedAt": row[11].isoformat() if row[11] else None,
+            "excerpt": row[12] or "",
+            "wordCount": row[13] or 0,
         }
     except HTTPException:
         raise
@@ -1881,6 +2058,71 @@ async def delete_playbook(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get(
+    f"{settings.API_PREFIX}/playbooks/{{playbook_id}}/revisions",
+    tags=["Playbooks"]
+)
+async def list_playbook_revisions(
+    playbook_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Listar revisões de um playbook (sem content)"""
+    try:
+        return PlaybookRevisionService(db).list_revisions(playbook_id)
+    except Exception as e:
+        logger.error(f"Erro ao listar revisões do playbook: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get(
+    f"{settings.API_PREFIX}/playbooks/{{playbook_id}}/revisions/{{revision_number}}",
+    tags=["Playbooks"]
+)
+async def get_playbook_revision(
+    playbook_id: int,
+    revision_number: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Obter uma revisão específica com o content reconstruído"""
+    try:
+        revision = PlaybookRevisionService(db).get_revision(playbook_id, revision_number)
+        if not revision:
+            raise HTTPException(status_code=404, detail="Revisão não encontrada")
+        return revision
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao buscar revisão do playbook: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get(
+    f"{settings.API_PREFIX}/playbooks/{{playbook_id}}/revisions/{{revision_number}}/diff",
+    tags=["Playbooks"]
+)
+async def diff_playbook_revision(
+    playbook_id: int,
+    revision_number: int,
+    against: Optional[int] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Diff de uma revisão contra outra (padrão: revisão anterior)"""
+    try:
+        base_number = against if against is not None else revision_number - 1
+        diff = PlaybookRevisionService(db).diff_revisions(playbook_id, base_number, revision_number)
+        if not diff:
+            raise HTTPException(status_code=404, detail="Revisão não encontrada")
+        return diff
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao comparar revisões do playbook: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post(
     f"{settings.API_PREFIX}/playbooks/{{playbook_id}}/increment-views",
     tags=["Playbooks"]
@@ -1890,26 +2132,22 @@ async def increment_playbook_views(
     current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Incrementar contador de visualizações"""
+    """Incrementar contador de visualizações (persistido em lote)"""
     try:
         result = db.execute(text("""
-            UPDATE playbooks 
-            SET views = views + 1
-            WHERE id = :playbook_id
-            RETURNING views
+            SELECT views FROM playbooks WHERE id = :playbook_id
         """), {"playbook_id": playbook_id})
         
-        db.commit()
         row = result.fetchone()
-        
         if not row:
             raise HTTPException(status_code=404, detail="Playbook não encontrado")
         
-        return {"views": row[0]}
+        # Contagem aproximada: persistido + pendente neste worker
+        pending = playbook_view_counter.increment(playbook_id)
+        return {"views": (row[0] or 0) + pending}
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         logger.error(f"Erro ao incrementar views: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1940,36 +2178,10 @@ async def create_health_score_evaluation(
                 detail="Account não encontrado"
             )
         
-        # Calcular scores
-        responses_dict = evaluation.responses
-        scores = list(responses_dict.values())
-        total_score = round(sum(scores) / len(scores)) if scores else 0
-        
-        # Calcular scores por pilar (baseado nas questions do frontend)
-        pilar_questions = {
-            "Adoção e Engajamento": [1, 2],
-            "Percepção de Valor": [3, 4],
-            "Relacionamento e Satisfação": [5, 6],
-            "Saúde Operacional": [7, 8],
-            "Potencial de Crescimento": [9, 10],
-        }
-        
-        pilar_scores = {}
-        for pilar, question_ids in pilar_questions.items():
-            pilar_score_values = [responses_dict.get(q_id, 0) for q_id in question_ids if q_id in responses_dict]
-            if pilar_score_values:
-                pilar_scores[pilar] = round(sum(pilar_score_values) / len(pilar_score_values))
-        
-        # Determinar classificação
-        classification = 'critical'
-        if total_score >= 90:
-            classification = 'champion'
-        elif total_score >= 70:
-            classification = 'healthy'
-        elif total_score >= 50:
-            classification = 'attention'
-        elif total_score >= 30:
-            classification = 'at-risk'
+        # Calcular scores com o questionário do tenant (plano compilado em cache)
+        responses_dict = {str(q_id): score for q_id, score in evaluation.responses.items()}
+        plan = scoring_plan_cache.get(db)
+        total_score, pilar_scores, classification = plan.score(responses_dict)
         
         # Criar avaliação
         evaluation_id = str(uuid4())
@@ -2003,6 +2215,49 @@ async def create_health_score_evaluation(
         )
 
 
+@app.get(
+    f"{settings.API_PREFIX}/health-scores/questionnaire",
+    tags=["Health Scores"]
+)
+async def get_health_score_questionnaire(
+    db: Session = Depends(get_db)
+):
+    """Obter o questionário de health score em uso (pilares, pesos e faixas)"""
+    try:
+        return scoring_plan_cache.get(db).to_dict()
+    except Exception as e:
+        logger.error(f"Erro ao carregar questionário de health score: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao carregar questionário: {str(e)}"
+        )
+
+
+@app.post(
+    f"{settings.API_PREFIX}/health-scores/recalculate",
+    tags=["Health Scores"]
+)
+async def recalculate_health_score_evaluations(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recalcular todas as avaliações com o questionário atual (em lote)"""
+    try:
+        tenant_settings_cache.invalidate()
+        plan = scoring_plan_cache.get(db)
+        count = recalculate_evaluations(db, plan)
+        account_context_cache.clear()
+        logger.info(f"Health score evaluations recalculadas: {count}")
+        return {"recalculated": count}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro ao recalcular health scores: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao recalcular health scores: {str(e)}"
+        )
+
+
 @app.get(
     f"{settings.API_PREFIX}/accounts/{{account_id}}/health-scores",
     response_model=List[schemas.HealthScoreEvaluationResponse],
@@ -2024,7 +2279,7 @@ async def get_account_health_score_history(
             )
         
         evaluations = crud.get_health_score_evaluations(db, account_id, limit)
-        return evaluations
+        return orm_response(schemas.HealthScoreEvaluationResponse, evaluations)
         
     except HTTPException:
         raise
@@ -2036,6 +2291,61 @@ async def get_account_health_score_history(
         )
 
 
+@app.get(
+    f"{settings.API_PREFIX}/accounts/{{account_id}}/health-scores/trend",
+    response_model=schemas.HealthTrendResponse,
+    tags=["Health Scores"]
+)
+async def get_account_health_score_trend(
+    account_id: str,
+    points: int = Query(12, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Obter tendência de health score de um account (slope, deltas, volatilidade e série)"""
+    try:
+        account = db.query(models.Account).filter(models.Account.id == account_id).first()
+        if not account:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Account não encontrado"
+            )
+        
+        return HealthTrendService(db).get_account_trend(account_id, points)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao calcular tendência de health score: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao calcular tendência: {str(e)}"
+        )
+
+
+@app.get(
+    f"{settings.API_PREFIX}/health-scores/trends",
+    response_model=schemas.PortfolioHealthTrendsResponse,
+    tags=["Health Scores"]
+)
+async def get_portfolio_health_score_trends(
+    points: int = Query(12, ge=1, le=100),
+    direction: Optional[str] = Query(None, pattern="^(improving|stable|declining)$"),
+    db: Session = Depends(get_db)
+):
+    """Tendências de health score de todo o portfólio (uma única query)"""
+    try:
+        trends = HealthTrendService(db).get_portfolio_trends(points)
+        if direction:
+            trends["accounts"] = [t for t in trends["accounts"] if t["direction"] == direction]
+        return trends
+    except Exception as e:
+        logger.error(f"Erro ao calcular tendências do portfólio: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao calcular tendências: {str(e)}"
+        )
+
+
 if __name__ == "__main__":
 
     import uvicorn
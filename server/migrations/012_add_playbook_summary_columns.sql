@@ -0,0 +1,26 @@
+-- Migration: Add summary columns to playbooks
+-- Description: Precomputed excerpt and word count so the library listing does not load full HTML content
+
+BEGIN;
+
+-- 1. Add columns
+ALTER TABLE playbooks ADD COLUMN IF NOT EXISTS excerpt TEXT;
+ALTER TABLE playbooks ADD COLUMN IF NOT EXISTS word_count INTEGER DEFAULT 0;
+
+-- 2. Backfill existing playbooks (strip tags and collapse whitespace)
+UPDATE playbooks
+SET excerpt = LEFT(plain_text, 280),
+    word_count = COALESCE(array_length(regexp_split_to_array(NULLIF(plain_text, ''), ' '), 1), 0)
+FROM (
+    SELECT id AS playbook_id,
+           TRIM(regexp_replace(regexp_replace(COALESCE(content, ''), '<[^>]*>', ' ', 'g'), '\s+', ' ', 'g')) AS plain_text
+    FROM playbooks
+) AS src
+WHERE playbooks.id = src.playbook_id
+  AND playbooks.excerpt IS NULL;
+
+-- 3. Comments
+COMMENT ON COLUMN playbooks.excerpt IS 'Plain-text excerpt of content, computed on write';
+COMMENT ON COLUMN playbooks.word_count IS 'Word count of content, computed on write';
+
+COMMIT;
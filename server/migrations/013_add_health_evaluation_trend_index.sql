@@ -0,0 +1,10 @@
+-- Migration: Composite index for health score trend queries
+-- Description: Window functions partition by account_id and order by evaluation_date;
+-- this index lets the portfolio trend query and "latest evaluation" lookups avoid sorts
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_health_evaluations_account_date
+    ON health_score_evaluations(account_id, evaluation_date DESC, created_at DESC);
+
+COMMIT;
@@ -0,0 +1,20 @@
+-- Migration: Add account_health_scores table
+-- Description: Latest scorecard-based health score per account, written in bulk by the calculator batch mode
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS account_health_scores (
+    account_id VARCHAR(255) PRIMARY KEY REFERENCES accounts(id) ON DELETE CASCADE,
+    scorecard_id VARCHAR(255),
+    score_value NUMERIC(5, 2) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    component_scores JSON,
+    calculated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_account_health_scores_status ON account_health_scores(status);
+
+COMMENT ON TABLE account_health_scores IS 'Scorecard-based health score per account (one row, overwritten on re-score)';
+COMMENT ON COLUMN account_health_scores.component_scores IS 'JSON object with value, weight and weighted score per component';
+
+COMMIT;
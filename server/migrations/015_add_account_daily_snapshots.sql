@@ -0,0 +1,54 @@
+-- Migration: Add account_daily_snapshots table and carry-forward view
+-- Description: Compact per-account daily history (health, status, MRR, tasks, activities).
+-- The snapshot job only writes a row when something changed; the view fills the gaps.
+
+BEGIN;
+
+-- 1. Snapshot table (one row per account per day, only on change)
+CREATE TABLE IF NOT EXISTS account_daily_snapshots (
+    account_id VARCHAR(255) NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    snapshot_date DATE NOT NULL,
+    health_score INTEGER,
+    status VARCHAR(50),
+    mrr NUMERIC(10, 2),
+    open_tasks INTEGER NOT NULL DEFAULT 0,
+    overdue_tasks INTEGER NOT NULL DEFAULT 0,
+    activities_30d INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (account_id, snapshot_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_account_daily_snapshots_date ON account_daily_snapshots(snapshot_date);
+
+-- 2. Carry-forward view: one row per account per day since its first snapshot
+CREATE OR REPLACE VIEW account_daily_snapshots_filled AS
+SELECT
+    f.account_id,
+    d.day::date AS snapshot_date,
+    s.health_score,
+    s.status,
+    s.mrr,
+    s.open_tasks,
+    s.overdue_tasks,
+    s.activities_30d,
+    s.snapshot_date AS source_date
+FROM (
+    SELECT account_id, MIN(snapshot_date) AS first_date
+    FROM account_daily_snapshots
+    GROUP BY account_id
+) f
+CROSS JOIN LATERAL generate_series(f.first_date, CURRENT_DATE, INTERVAL '1 day') AS d(day)
+CROSS JOIN LATERAL (
+    SELECT *
+    FROM account_daily_snapshots s
+    WHERE s.account_id = f.account_id
+      AND s.snapshot_date <= d.day::date
+    ORDER BY s.snapshot_date DESC
+    LIMIT 1
+) s;
+
+-- 3. Comments
+COMMENT ON TABLE account_daily_snapshots IS 'Per-account daily metrics; a row is written only when values changed since the previous snapshot';
+COMMENT ON VIEW account_daily_snapshots_filled IS 'account_daily_snapshots with the last known values carried forward to every day';
+
+COMMIT;
@@ -0,0 +1,22 @@
+-- Migration: Add latest health score evaluation pointer to accounts
+-- Description: Denormalized copy of the latest evaluation, kept in sync when an evaluation is created
+-- Backfill existing accounts with: python scripts/backfill_latest_evaluations.py
+
+BEGIN;
+
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS latest_evaluation_id VARCHAR(255);
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS latest_classification VARCHAR(50);
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS latest_pilar_scores JSON;
+
+ALTER TABLE accounts DROP CONSTRAINT IF EXISTS fk_accounts_latest_evaluation;
+ALTER TABLE accounts
+    ADD CONSTRAINT fk_accounts_latest_evaluation
+    FOREIGN KEY (latest_evaluation_id) REFERENCES health_score_evaluations(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_accounts_latest_classification ON accounts(latest_classification);
+
+COMMENT ON COLUMN accounts.latest_evaluation_id IS 'Most recent health_score_evaluations row for the account';
+COMMENT ON COLUMN accounts.latest_classification IS 'Classification of the most recent evaluation';
+COMMENT ON COLUMN accounts.latest_pilar_scores IS 'Pilar scores of the most recent evaluation';
+
+COMMIT;
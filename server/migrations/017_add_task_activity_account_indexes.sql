@@ -0,0 +1,9 @@
+-- Migration: Add per-account indexes on tasks and activities
+-- Description: Support the aggregated context query (counts per account, last 30 days of activities, top overdue tasks)
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_tasks_account_status_due ON tasks(account_id, status, due_date);
+CREATE INDEX IF NOT EXISTS idx_activities_account_created ON activities(account_id, created_at DESC);
+
+COMMIT;
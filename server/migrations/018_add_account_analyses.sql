@@ -0,0 +1,23 @@
+-- Migration: Add account_analyses table
+-- Description: Persisted AI account analyses, reused while the context fingerprint, prompt version and model match
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS account_analyses (
+    id SERIAL PRIMARY KEY,
+    account_id VARCHAR(255) NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    fingerprint VARCHAR(64) NOT NULL,
+    prompt_version VARCHAR(50) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    analysis JSON NOT NULL,
+    tokens_used INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_account_analyses_key UNIQUE (account_id, fingerprint, prompt_version, model)
+);
+
+CREATE INDEX IF NOT EXISTS idx_account_analyses_account_created ON account_analyses(account_id, created_at DESC);
+
+COMMENT ON TABLE account_analyses IS 'AI analyses per account, keyed by a hash of the analysis context and prompt settings';
+COMMENT ON COLUMN account_analyses.fingerprint IS 'sha256 of the canonical context JSON plus system prompt and temperature';
+
+COMMIT;
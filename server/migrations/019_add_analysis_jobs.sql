@@ -0,0 +1,29 @@
+-- Migration: Add analysis_jobs table
+-- Description: Background AI account analyses; status and result are polled by job id from any worker
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    account_id VARCHAR(255) NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    tenant_id VARCHAR(255),
+    force BOOLEAN NOT NULL DEFAULT FALSE,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, completed, failed
+    result JSON,
+    error TEXT,
+    error_code VARCHAR(50),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- At most one active job per account: duplicate requests attach to it
+CREATE UNIQUE INDEX IF NOT EXISTS uq_analysis_jobs_active_account
+    ON analysis_jobs(account_id)
+    WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_created ON analysis_jobs(created_at);
+
+COMMENT ON TABLE analysis_jobs IS 'Background AI analysis jobs (result holds the same payload as POST /analyze)';
+
+COMMIT;
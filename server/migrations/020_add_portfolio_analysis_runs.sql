@@ -0,0 +1,36 @@
+-- Migration: Add portfolio analysis runs
+-- Description: Checkpoint of the nightly AI analysis of the portfolio (one row per account per run, processed by priority)
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS portfolio_analysis_runs (
+    id VARCHAR(36) PRIMARY KEY,
+    tenant_id VARCHAR(255),
+    status VARCHAR(20) NOT NULL DEFAULT 'running',  -- running, completed, interrupted, failed
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS portfolio_analysis_items (
+    run_id VARCHAR(36) NOT NULL REFERENCES portfolio_analysis_runs(id) ON DELETE CASCADE,
+    account_id VARCHAR(255) NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    priority DOUBLE PRECISION NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, analyzed, skipped, failed
+    fingerprint VARCHAR(64),
+    tokens_used INTEGER,
+    error TEXT,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (run_id, account_id)
+);
+
+-- Próximas accounts de uma execução (retomada após interrupção)
+CREATE INDEX IF NOT EXISTS idx_portfolio_analysis_items_pending
+    ON portfolio_analysis_items(run_id, priority DESC)
+    WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_portfolio_analysis_runs_created ON portfolio_analysis_runs(created_at);
+
+COMMENT ON TABLE portfolio_analysis_items IS 'Per-account progress of a portfolio analysis run (checkpoint)';
+
+COMMIT;
@@ -0,0 +1,19 @@
+-- Migration: Add industry_news table
+-- Description: Industry-level news searched once per (industry, day) and shared by every account of the industry
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS industry_news (
+    industry_key VARCHAR(255) NOT NULL,  -- normalized industry name (lowercase, single spaces)
+    news_date DATE NOT NULL,             -- UTC day of the search
+    industry VARCHAR(255) NOT NULL,
+    news_items JSON NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (industry_key, news_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_industry_news_date ON industry_news(news_date);
+
+COMMENT ON TABLE industry_news IS 'Shared industry news per day (fanned out to the accounts of the industry on news refresh)';
+
+COMMIT;
@@ -0,0 +1,43 @@
+-- Migration: Add articles and account_news tables
+-- Description: Radar CS news stored once per article (dedup by canonical URL or title hash) and linked to accounts
+-- Existing news_items rows are copied by scripts/backfill_news_articles.py; news_items is kept for rollback
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS articles (
+    id UUID PRIMARY KEY,
+    dedup_key VARCHAR(64) NOT NULL,  -- sha256 of the canonical URL, or of the normalized title without URL
+    canonical_url VARCHAR(1000),
+    title VARCHAR(500) NOT NULL,
+    summary TEXT,
+    content TEXT,
+    news_type VARCHAR(50) NOT NULL,
+    category VARCHAR(100),
+    source_type VARCHAR(50) DEFAULT 'openai',
+    source_name VARCHAR(255),
+    source_url VARCHAR(1000),
+    published_date TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_articles_dedup_key UNIQUE (dedup_key)
+);
+
+CREATE TABLE IF NOT EXISTS account_news (
+    id UUID PRIMARY KEY,
+    account_id VARCHAR(255) NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    article_id UUID NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+    relevance_score INTEGER DEFAULT 50,
+    insights TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),  -- last fetch that returned the article for the account
+    CONSTRAINT uq_account_news_account_article UNIQUE (account_id, article_id)
+);
+
+-- Listing (last 7 days per account) and cache lookups (last 24h)
+CREATE INDEX IF NOT EXISTS idx_account_news_account_created ON account_news(account_id, created_at DESC);
+-- "Who else is affected" by an article
+CREATE INDEX IF NOT EXISTS idx_account_news_article ON account_news(article_id);
+
+COMMENT ON TABLE articles IS 'Radar CS articles, stored once regardless of how many accounts or refreshes return them';
+COMMENT ON TABLE account_news IS 'Per-account link to an article with account-specific relevance and insights';
+
+COMMIT;
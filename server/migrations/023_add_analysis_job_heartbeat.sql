@@ -0,0 +1,16 @@
+-- Migration: Add owner and heartbeat to analysis_jobs
+-- Description: Each worker refreshes heartbeat_at of the jobs it owns; jobs whose heartbeat stops (worker died) are reaped periodically
+
+BEGIN;
+
+ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS worker_id VARCHAR(100);
+ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE;
+
+UPDATE analysis_jobs SET heartbeat_at = COALESCE(started_at, created_at)
+WHERE heartbeat_at IS NULL AND status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_active_heartbeat
+    ON analysis_jobs(heartbeat_at)
+    WHERE status IN ('queued', 'running');
+
+COMMIT;
@@ -0,0 +1,44 @@
+-- Migration: Validity ranges for account_daily_snapshots
+-- Description: Each snapshot row is valid from its snapshot_date until the account's next snapshot (LEAD).
+-- Readers expand only the requested window against these ranges instead of filling every day since the first snapshot.
+
+BEGIN;
+
+-- 1. Ranges view (valid_until is exclusive; NULL = still current)
+CREATE OR REPLACE VIEW account_daily_snapshot_ranges AS
+SELECT
+    s.account_id,
+    s.snapshot_date AS valid_from,
+    LEAD(s.snapshot_date) OVER (PARTITION BY s.account_id ORDER BY s.snapshot_date) AS valid_until,
+    s.health_score,
+    s.status,
+    s.mrr,
+    s.open_tasks,
+    s.overdue_tasks,
+    s.activities_30d
+FROM account_daily_snapshots s;
+
+-- 2. Carry-forward view rebuilt on the ranges (same columns as before)
+CREATE OR REPLACE VIEW account_daily_snapshots_filled AS
+SELECT
+    r.account_id,
+    d.day::date AS snapshot_date,
+    r.health_score,
+    r.status,
+    r.mrr,
+    r.open_tasks,
+    r.overdue_tasks,
+    r.activities_30d,
+    r.valid_from AS source_date
+FROM account_daily_snapshot_ranges r
+CROSS JOIN LATERAL generate_series(
+    r.valid_from,
+    COALESCE(r.valid_until - 1, CURRENT_DATE),
+    INTERVAL '1 day'
+) AS d(day);
+
+-- 3. Comments
+COMMENT ON VIEW account_daily_snapshot_ranges IS 'account_daily_snapshots as validity ranges [valid_from, valid_until) per account';
+COMMENT ON VIEW account_daily_snapshots_filled IS 'account_daily_snapshots with the last known values carried forward to every day (prefer joining the ranges against the requested window)';
+
+COMMIT;
@@ -0,0 +1,98 @@
+"""
+Database Migration: Add playbook revision history (content-addressed blobs + revisions)
+"""
+from sqlalchemy import text
+from database import get_db
+from services.playbook_revisions import PlaybookRevisionService
+
+def upgrade():
+    """Apply migration"""
+    db = next(get_db())
+
+    try:
+        # Conteúdo endereçado por hash (snapshot ou delta sobre base_hash)
+        db.execute(text("""
+            CREATE TABLE IF NOT EXISTS playbook_content_blobs (
+                content_hash VARCHAR(64) PRIMARY KEY,
+                base_hash VARCHAR(64) REFERENCES playbook_content_blobs(content_hash),
+                chain_depth INTEGER NOT NULL DEFAULT 0,
+                data BYTEA NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+
+        db.execute(text("""
+            CREATE TABLE IF NOT EXISTS playbook_revisions (
+                id SERIAL PRIMARY KEY,
+                playbook_id INTEGER NOT NULL REFERENCES playbooks(id) ON DELETE CASCADE,
+                revision_number INTEGER NOT NULL,
+                content_hash VARCHAR(64) NOT NULL REFERENCES playbook_content_blobs(content_hash),
+                name VARCHAR(255),
+                version VARCHAR(50),
+                author VARCHAR(255),
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                CONSTRAINT uq_playbook_revisions_number UNIQUE (playbook_id, revision_number)
+            )
+        """))
+
+        # Create index on playbook_id for history queries
+        db.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_playbook_revisions_playbook_id
+            ON playbook_revisions(playbook_id)
+        """))
+
+        # Backfill: revisão inicial para cada playbook existente
+        service = PlaybookRevisionService(db)
+        playbooks = db.execute(text("""
+            SELECT p.id, p.content, p.author, p.name, p.version
+            FROM playbooks p
+            WHERE NOT EXISTS (
+                SELECT 1 FROM playbook_revisions r WHERE r.playbook_id = p.id
+            )
+            ORDER BY p.id
+        """)).fetchall()
+
+        for playbook_id, content, author, name, version in playbooks:
+            service.record_revision(
+                playbook_id=playbook_id,
+                content=content,
+                author=author,
+                name=name,
+                version=version,
+            )
+
+        db.commit()
+        print(f"✅ Migration applied: playbook revisions created ({len(playbooks)} playbooks backfilled)")
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+def downgrade():
+    """Revert migration"""
+    db = next(get_db())
+
+    try:
+        db.execute(text("DROP INDEX IF EXISTS idx_playbook_revisions_playbook_id"))
+        db.execute(text("DROP TABLE IF EXISTS playbook_revisions"))
+        db.execute(text("DROP TABLE IF EXISTS playbook_content_blobs"))
+
+        db.commit()
+        print("✅ Migration reverted: playbook revision tables dropped successfully")
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Migration revert failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Running migration: add_playbook_revisions")
+    upgrade()
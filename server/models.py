@@ -5,7 +5,7 @@ SQLAlchemy ORM Models
 from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Integer, Numeric, Date, Text, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Integer, Numeric, Date, Text, JSON, LargeBinary, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
@@ -114,6 +114,14 @@ class Account(Base):
     # Internal Kickoff - Sales to CS handoff information
     internal_kickoff = Column(JSON, default={})
     
+    # Última avaliação de health score (desnormalizada, atualizada em crud.create_health_score_evaluation)
+    latest_evaluation_id = Column(
+        String(255),
+        ForeignKey("health_score_evaluations.id", ondelete="SET NULL", use_alter=True, name="fk_accounts_latest_evaluation")
+    )
+    latest_classification = Column(String(50))
+    latest_pilar_scores = Column(JSON)
+    
     # Metadados
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -226,6 +234,8 @@ class Playbook(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text)
     content = Column(Text)
+    excerpt = Column(Text)  # Calculado na escrita a partir do content
+    word_count = Column(Integer, default=0)
     category = Column(String(100))
     tags = Column(JSON, default=[])
     version = Column(String(50), default="1.0")
@@ -238,6 +248,38 @@ class Playbook(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+class PlaybookContentBlob(Base):
+    """Conteúdo de playbook endereçado por hash (snapshot completo ou delta)"""
+    __tablename__ = "playbook_content_blobs"
+    
+    content_hash = Column(String(64), primary_key=True)  # sha256 do conteúdo reconstruído
+    base_hash = Column(String(64), ForeignKey("playbook_content_blobs.content_hash"), nullable=True)  # NULL = snapshot
+    chain_depth = Column(Integer, nullable=False, default=0)  # Deltas até o snapshot mais próximo
+    data = Column(LargeBinary, nullable=False)  # zlib(conteúdo) ou zlib(delta JSON)
+    size = Column(Integer, nullable=False, default=0)  # Tamanho do conteúdo reconstruído
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PlaybookRevision(Base):
+    """Revisão de um playbook (aponta para o conteúdo por hash)"""
+    __tablename__ = "playbook_revisions"
+    __table_args__ = (
+        UniqueConstraint("playbook_id", "revision_number", name="uq_playbook_revisions_number"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    playbook_id = Column(Integer, ForeignKey("playbooks.id", ondelete="CASCADE"), nullable=False, index=True)
+    revision_number = Column(Integer, nullable=False)
+    content_hash = Column(String(64), ForeignKey("playbook_content_blobs.content_hash"), nullable=False)
+    
+    # Metadados da revisão
+    name = Column(String(255))
+    version = Column(String(50))
+    author = Column(String(255))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class HealthScoreEvaluation(Base):
     """Modelo de Avaliação de Health Score"""
     __tablename__ = "health_score_evaluations"
@@ -261,6 +303,60 @@ class HealthScoreEvaluation(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class AccountHealthScore(Base):
+    """Health score calculado pelo scorecard (um registro por account)"""
+    __tablename__ = "account_health_scores"
+    
+    account_id = Column(String(255), ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    scorecard_id = Column(String(255))
+    
+    # Resultado
+    score_value = Column(Numeric(5, 2), nullable=False)  # 0-100
+    status = Column(String(20), nullable=False)  # green, yellow, red
+    component_scores = Column(JSON)  # {component_name: {value, weight, weighted_score}}
+    
+    calculated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AccountDailySnapshot(Base):
+    """Snapshot diário de métricas do account (gravado apenas quando há mudança)"""
+    __tablename__ = "account_daily_snapshots"
+    
+    account_id = Column(String(255), ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    snapshot_date = Column(Date, primary_key=True)
+    
+    # Métricas do dia
+    health_score = Column(Integer)
+    status = Column(String(50))
+    mrr = Column(Numeric(10, 2))
+    open_tasks = Column(Integer, nullable=False, default=0)
+    overdue_tasks = Column(Integer, nullable=False, default=0)
+    activities_30d = Column(Integer, nullable=False, default=0)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AccountAnalysis(Base):
+    """Análise de IA persistida, reaproveitada enquanto o contexto não muda"""
+    __tablename__ = "account_analyses"
+    __table_args__ = (
+        UniqueConstraint("account_id", "fingerprint", "prompt_version", "model", name="uq_account_analyses_key"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    account_id = Column(String(255), ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    
+    # Chave do cache
+    fingerprint = Column(String(64), nullable=False)  # sha256 do contexto + configurações do prompt
+    prompt_version = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    
+    analysis = Column(JSON, nullable=False)
+    tokens_used = Column(Integer)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Invite(Base):
     """Modelo de Convite"""
     __tablename__ = "invites"
@@ -281,7 +377,12 @@ class Invite(Base):
 
 
 class NewsItem(Base):
-    """Modelo de Item de Notícia para Radar CS"""
+    """
+    Modelo de Item de Notícia para Radar CS
+    
+    Legado: substituído por Article + AccountNews (migration 022); mantido
+    para o backfill e para rollback.
+    """
     __tablename__ = "news_items"
     
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
@@ -305,3 +406,44 @@ class NewsItem(Base):
     # Metadados
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class Article(Base):
+    """Notícia única (deduplicada por URL canônica ou hash do título) do Radar CS"""
+    __tablename__ = "articles"
+    
+    id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
+    dedup_key = Column(String(64), nullable=False, unique=True)  # sha256 da URL canônica ou do título normalizado
+    canonical_url = Column(String(1000))
+    
+    # Dados da Notícia
+    title = Column(String(500), nullable=False)
+    summary = Column(Text)
+    content = Column(Text)
+    news_type = Column(String(50), nullable=False)  # 'company', 'industry', 'market'
+    category = Column(String(100))
+    source_type = Column(String(50), default="openai")  # 'openai', 'perplexity'
+    source_name = Column(String(255))
+    source_url = Column(String(1000))
+    published_date = Column(DateTime(timezone=True))
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class AccountNews(Base):
+    """Vínculo account x notícia, com relevância e insights próprios da account"""
+    __tablename__ = "account_news"
+    __table_args__ = (
+        UniqueConstraint("account_id", "article_id", name="uq_account_news_account_article"),
+    )
+    
+    id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
+    account_id = Column(String(255), ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    article_id = Column(PGUUID(as_uuid=True), ForeignKey("articles.id", ondelete="CASCADE"), nullable=False)
+    
+    relevance_score = Column(Integer, default=50)  # 0-100
+    insights = Column(Text)
+    
+    # Última busca que trouxe a notícia para a account (janelas de 24h/7 dias)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
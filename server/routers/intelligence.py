@@ -2,32 +2,113 @@
 Account Intelligence Router
 API endpoints for account analysis and insights
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
 
 
 from database import get_db
 from services.account_intelligence import AccountIntelligenceService
 from services.openai_service import OpenAIService
+from services.context_cache import account_context_cache
+from services.analysis_jobs import analysis_job_runner, analyze_account, stream_account_analysis
+from sse import sse_response
 
 router = APIRouter(prefix="/api/v1/accounts", tags=["intelligence"])
 
 
+@router.get("/intelligence/cache-stats")
+async def get_context_cache_stats():
+    """Hit/miss metrics of the intelligence context cache (this worker)"""
+    return account_context_cache.stats()
+
+
+class AnalysisJobBatchRequest(BaseModel):
+    account_ids: List[str] = Field(..., alias="accountIds", min_length=1, max_length=500)
+    tenant_id: Optional[str] = Field(None, alias="tenantId")
+    force: bool = False
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+@router.post("/analysis-jobs", status_code=202)
+async def submit_analysis_jobs(
+    request: AnalysisJobBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Queue AI analysis for many accounts at once
+
+    Accounts with a queued/running job reuse it (deduplicated=true)
+    """
+    try:
+        return analysis_job_runner.submit(db, request.account_ids, request.tenant_id, request.force)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error queuing analyses: {str(e)}")
+
+
+@router.get("/analysis-jobs")
+async def list_analysis_jobs(
+    ids: str = Query(..., description="Comma-separated job ids"),
+    include_result: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Status of several jobs (polling for batch analyses)"""
+    job_ids = [job_id for job_id in ids.split(",") if job_id]
+    return {"jobs": analysis_job_runner.get_many(db, job_ids, include_result)}
+
+
+@router.get("/analysis-jobs/{job_id}")
+async def get_analysis_job(
+    job_id: str,
+    db: Session = Depends(get_db)
+):
+    """Status of an analysis job; result has the same payload as POST /analyze"""
+    job = analysis_job_runner.get(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Analysis job {job_id} not found")
+    return job
+
+
+@router.post("/{account_id}/analysis-jobs", status_code=202)
+async def submit_analysis_job(
+    account_id: str,
+    tenant_id: Optional[str] = None,
+    force: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Queue AI analysis for an account and return the job
+
+    Poll GET /analysis-jobs/{job_id} for status and result
+    """
+    try:
+        submitted = analysis_job_runner.submit(db, [account_id], tenant_id, force)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error queuing analysis: {str(e)}")
+    if not submitted["jobs"]:
+        raise HTTPException(status_code=404, detail=f"Account {account_id} not found")
+    return submitted["jobs"][0]
+
+
 @router.get("/{account_id}/intelligence")
 async def get_account_intelligence(
     account_id: str,
+    refresh: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Get aggregated intelligence data for an account
     
     Returns complete context with metrics, risks, and opportunities
+    (cached per account; refresh=true rebuilds it)
     """
     try:
         service = AccountIntelligenceService(db)
-        context = await service.build_account_context(account_id)
+        context = await service.build_account_context(account_id, use_cache=not refresh)
         return context
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -39,6 +120,7 @@ async def get_account_intelligence(
 async def analyze_account_with_ai(
     account_id: str,
     tenant_id: Optional[str] = None,
+    force: bool = False,
     db: Session = Depends(get_db)
 ):
     """
@@ -49,22 +131,12 @@ async def analyze_account_with_ai(
     - Expansion opportunities
     - Next best actions
     - Strategic insights
+    
+    The analysis is reused while the context fingerprint, prompt version and
+    model match and it is younger than the TTL; force=true always calls the model.
     """
     try:
-        # Build context
-        intelligence_service = AccountIntelligenceService(db)
-        context = await intelligence_service.build_account_context(account_id)
-        
-        # Analyze with AI
-        ai_service = OpenAIService(db, tenant_id)
-        analysis = await ai_service.analyze_account(context)
-        
-        # Combine context and analysis
-        return {
-            "context": context,
-            "ai_analysis": analysis,
-            "analyzed_at": context.get("account", {}).get("id")  # TODO: Add timestamp
-        }
+        return await analyze_account(db, account_id, tenant_id, force)
         
     except ValueError as e:
         error_msg = str(e)
@@ -77,6 +149,35 @@ async def analyze_account_with_ai(
         raise HTTPException(status_code=500, detail=f"Error analyzing account: {str(e)}")
 
 
+@router.post("/{account_id}/analyze/stream")
+async def analyze_account_with_ai_stream(
+    account_id: str,
+    request: Request,
+    tenant_id: Optional[str] = None,
+    force: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Streaming variant of /analyze (Server-Sent Events)
+    
+    Events: start, context, token (as the model writes), done (same payload
+    as /analyze) and error. Closing the connection cancels the model call.
+    """
+    try:
+        context = await AccountIntelligenceService(db).build_account_context(account_id)
+        ai_service = OpenAIService(db, tenant_id)
+        ai_service.require_api_key()
+    except ValueError as e:
+        error_msg = str(e)
+        if "not found" in error_msg.lower():
+            raise HTTPException(status_code=404, detail=error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing account: {str(e)}")
+    
+    return sse_response(request, stream_account_analysis(db, account_id, context, ai_service, force))
+
+
 class PlaybookGenerationRequest(BaseModel):
     topic: str
     category: str
@@ -92,7 +193,7 @@ async def generate_playbook_with_ai(
     """
     try:
         ai_service = OpenAIService(db)
-        content = ai_service.generate_playbook(request.topic, request.category)
+        content = await ai_service.generate_playbook(request.topic, request.category)
         return {"content": content}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -100,3 +201,31 @@ async def generate_playbook_with_ai(
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating playbook: {str(e)}")
+
+
+@router.post("/playbook/generate/stream")
+async def generate_playbook_with_ai_stream(
+    playbook_request: PlaybookGenerationRequest,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Streaming variant of /playbook/generate (Server-Sent Events)
+    
+    Events: start, token ({"text"} HTML fragments), done ({"content"} with the
+    cleaned HTML) and error. Closing the connection cancels the model call.
+    """
+    ai_service = OpenAIService(db)
+    try:
+        ai_service.require_api_key()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def events():
+        parts = []
+        async for token in ai_service.stream_playbook(playbook_request.topic, playbook_request.category):
+            parts.append(token)
+            yield "token", {"text": token}
+        yield "done", {"content": ai_service.strip_code_fences("".join(parts))}
+    
+    return sse_response(request, events())
@@ -0,0 +1,153 @@
+"""
+Portfolio Router
+API endpoints for portfolio-wide views
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from database import get_db
+from services.daily_snapshots import DailySnapshotService
+from services.portfolio_analysis import portfolio_analysis_scheduler
+from services.portfolio_risks import PortfolioRiskService
+from services.risk_rules import OPPORTUNITY_TYPES, RISK_TYPES
+
+router = APIRouter(prefix="/api/v1/portfolio", tags=["portfolio"])
+
+
+def _resolve_period(start: Optional[date], end: Optional[date]):
+    end = end or date.today()
+    start = start or end - timedelta(days=90)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+
+@router.get("/health-history")
+async def get_portfolio_health_history(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Daily portfolio health history (default: last 90 days)
+
+    Reads the pre-aggregated daily snapshots instead of the live tables
+    """
+    start, end = _resolve_period(start, end)
+    try:
+        return DailySnapshotService(db).get_portfolio_history(start, end)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading portfolio history: {str(e)}")
+
+
+@router.get("/accounts/{account_id}/history")
+async def get_account_daily_history(
+    account_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Daily history of a single account (values carried forward between changes)"""
+    start, end = _resolve_period(start, end)
+    try:
+        return DailySnapshotService(db).get_account_history(account_id, start, end)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading account history: {str(e)}")
+
+
+@router.get("/risks")
+async def get_portfolio_risks(
+    csm: Optional[str] = None,
+    risk_type: Optional[str] = Query(None, alias="type"),
+    severity: Optional[str] = None,
+    opportunity: Optional[str] = None,
+    include_without_risks: bool = Query(False, alias="includeAll"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Risks and opportunities of every account, ranked by risk score
+
+    Same rules as the per-account intelligence context, evaluated for the
+    whole portfolio from set-based aggregates.
+    """
+    if risk_type and risk_type not in RISK_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown risk type: {risk_type}")
+    if severity and severity not in ("high", "medium"):
+        raise HTTPException(status_code=400, detail=f"Unknown severity: {severity}")
+    if opportunity and opportunity not in OPPORTUNITY_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown opportunity type: {opportunity}")
+
+    try:
+        return PortfolioRiskService(db).scan(
+            csm=csm,
+            risk_type=risk_type,
+            severity=severity,
+            opportunity_type=opportunity,
+            include_without_risks=include_without_risks,
+            limit=limit,
+            offset=offset,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error scanning portfolio risks: {str(e)}")
+
+
+@router.post("/snapshots/run")
+async def run_daily_snapshots(
+    snapshot_date: Optional[date] = Query(None, alias="date"),
+    db: Session = Depends(get_db)
+):
+    """
+    Run the incremental daily snapshot job now
+
+    Only today's snapshot can be written (it stores the current values);
+    any other date is rejected with 400.
+    """
+    try:
+        written = DailySnapshotService(db).run(snapshot_date)
+        if written is None:
+            raise HTTPException(status_code=409, detail="Snapshot job already running")
+        return {"written": written}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error running snapshot job: {str(e)}")
+
+
+@router.post("/analysis-runs", status_code=status.HTTP_202_ACCEPTED)
+async def start_portfolio_analysis(
+    tenant_id: Optional[str] = None,
+    new: bool = Query(False, description="Start a new run instead of resuming the last unfinished one"),
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze the whole portfolio in the background (highest risk first),
+    within the configured RPM/TPM limits. Resumes the last unfinished run
+    unless new=true.
+    """
+    if portfolio_analysis_scheduler.running:
+        raise HTTPException(status_code=409, detail="Portfolio analysis already running")
+    try:
+        run_id = None if new else portfolio_analysis_scheduler.resumable_run(db)
+        run_id = run_id or portfolio_analysis_scheduler.create_run(db, tenant_id)
+        portfolio_analysis_scheduler.start(run_id, tenant_id)
+        return portfolio_analysis_scheduler.progress(db, run_id)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error starting portfolio analysis: {str(e)}")
+
+
+@router.get("/analysis-runs/{run_id}")
+async def get_portfolio_analysis_run(run_id: str, db: Session = Depends(get_db)):
+    """Progress of a portfolio analysis run"""
+    progress = portfolio_analysis_scheduler.progress(db, run_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Analysis run not found")
+    return progress
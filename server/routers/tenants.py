@@ -9,6 +9,7 @@ from auth import get_current_user, CurrentUser
 import crud
 import schemas
 import models
+from services import health_questionnaire, tenant_settings
 
 router = APIRouter(
     prefix="/tenants",
@@ -80,6 +81,18 @@ async def update_tenant(
             
         # Update fields
         update_data = tenant_update.model_dump(exclude_unset=True)
+        
+        # Validar questionário de health score antes de salvar
+        questionnaire = (update_data.get('settings') or {}).get(health_questionnaire.SETTINGS_KEY)
+        if questionnaire:
+            try:
+                health_questionnaire.compile_plan(questionnaire)
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
+        
         logger.info(f"Updating tenant {tenant_id} with data: {update_data}")
         
         for field, value in update_data.items():
@@ -90,10 +103,15 @@ async def update_tenant(
             from sqlalchemy.orm.attributes import flag_modified
             flag_modified(db_tenant, "settings")
             logger.info(f"Settings updated to: {update_data['settings']}")
+            tenant_settings.notify_tenant_settings_changed(db, tenant_id)
             
         db.commit()
         db.refresh(db_tenant)
         
+        if 'settings' in update_data:
+            health_questionnaire.scoring_plan_cache.invalidate()
+            tenant_settings.tenant_settings_cache.invalidate()
+        
         return db_tenant
     except HTTPException:
         raise
@@ -2,7 +2,7 @@
 Schemas Pydantic para Validação e Serialização
 """
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from decimal import Decimal
@@ -205,6 +205,9 @@ class AccountUpdate(BaseModel):
 class AccountResponse(AccountBase):
     """Schema de resposta para Account"""
     id: str
+    latest_evaluation_id: Optional[str] = Field(None, alias="latestEvaluationId")
+    latest_classification: Optional[str] = Field(None, alias="latestClassification")
+    latest_pilar_scores: Optional[Dict[str, float]] = Field(None, alias="latestPilarScores")
     created_at: datetime = Field(..., alias="createdAt")
     updated_at: datetime = Field(..., alias="updatedAt")
     
@@ -536,6 +539,45 @@ class HealthScoreEvaluationResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
 
+class HealthTrendPoint(BaseModel):
+    """Ponto da série reduzida de health score"""
+    date: datetime
+    score: int
+
+
+class HealthTrendResponse(BaseModel):
+    """Tendência de health score de um account"""
+    account_id: str = Field(..., alias="accountId")
+    direction: str  # improving, stable, declining
+    evaluations: int
+    current_score: Optional[int] = Field(None, alias="currentScore")
+    last_evaluation: Optional[datetime] = Field(None, alias="lastEvaluation")
+    slope_30d: Optional[float] = Field(None, alias="slope30d")  # pontos a cada 30 dias
+    delta_30d: Optional[int] = Field(None, alias="delta30d")
+    delta_90d: Optional[int] = Field(None, alias="delta90d")
+    volatility: Optional[float] = None
+    series: List[HealthTrendPoint] = Field(default=[])
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class HealthTrendSummary(BaseModel):
+    """Resumo das tendências do portfólio"""
+    accounts: int
+    improving: int
+    stable: int
+    declining: int
+    avg_delta_30d: Optional[float] = Field(None, alias="avgDelta30d")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class PortfolioHealthTrendsResponse(BaseModel):
+    """Tendências de health score de todo o portfólio"""
+    summary: HealthTrendSummary
+    accounts: List[HealthTrendResponse]
+
+
 # ============================================================================
 # INVITE SCHEMAS
 # ============================================================================
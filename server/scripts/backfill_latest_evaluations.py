@@ -0,0 +1,53 @@
+"""
+Preenche accounts.latest_evaluation_id, latest_classification e
+latest_pilar_scores a partir de health_score_evaluations
+
+Rodar uma vez após a migration 016 (é idempotente).
+
+Uso:
+    python scripts/backfill_latest_evaluations.py
+"""
+import os
+import sys
+
+# Add parent directory to path so we can import from server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from database import SessionLocal
+
+
+BACKFILL_SQL = """
+    WITH latest AS (
+        SELECT DISTINCT ON (account_id)
+            account_id, id, classification, pilar_scores
+        FROM health_score_evaluations
+        ORDER BY account_id, evaluation_date DESC, created_at DESC
+    )
+    UPDATE accounts a
+    SET latest_evaluation_id = l.id,
+        latest_classification = l.classification,
+        latest_pilar_scores = l.pilar_scores
+    FROM latest l
+    WHERE a.id = l.account_id
+      AND a.latest_evaluation_id IS DISTINCT FROM l.id
+"""
+
+
+def main():
+    db = SessionLocal()
+    try:
+        updated = db.execute(text(BACKFILL_SQL)).rowcount
+        db.commit()
+        print(f"✅ Accounts atualizadas: {updated}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro no backfill: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
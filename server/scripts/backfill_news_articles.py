@@ -0,0 +1,91 @@
+"""
+Copia news_items para articles + account_news (deduplicando os artigos)
+
+Rodar uma vez após a migration 022 (é idempotente: artigos e vínculos já
+copiados são atualizados, não duplicados). Só os últimos 7 dias são
+copiados; o Radar CS não mostra notícias mais antigas.
+
+Uso:
+    python scripts/backfill_news_articles.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path so we can import from server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from database import SessionLocal
+from models import NewsItem
+from services.news_articles import NEWS_RETENTION_DAYS, article_dedup_key, canonical_url
+
+
+def main():
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=NEWS_RETENTION_DAYS)
+        items = db.query(NewsItem).filter(NewsItem.created_at >= cutoff).order_by(NewsItem.created_at).all()
+
+        articles = set()
+        for item in items:
+            metadata = item.news_metadata or {}
+            source_url = metadata.get("source_url")
+            article_id = db.execute(text("""
+                INSERT INTO articles (
+                    id, dedup_key, canonical_url, title, summary, content, news_type, category,
+                    source_type, source_name, source_url, published_date, created_at
+                )
+                VALUES (
+                    :id, :dedup_key, :canonical_url, :title, :summary, :content, :news_type, :category,
+                    :source_type, :source_name, :source_url, :published_date, :created_at
+                )
+                ON CONFLICT (dedup_key) DO UPDATE SET updated_at = NOW()
+                RETURNING id
+            """), {
+                "id": str(item.id),
+                "dedup_key": article_dedup_key(item.title, source_url),
+                "canonical_url": canonical_url(source_url),
+                "title": item.title,
+                "summary": item.summary,
+                "content": item.content,
+                "news_type": item.news_type,
+                "category": item.category,
+                "source_type": item.source_type,
+                "source_name": metadata.get("source_name"),
+                "source_url": source_url,
+                "published_date": item.published_date,
+                "created_at": item.created_at,
+            }).scalar()
+            articles.add(article_id)
+
+            # Mais recente por último: o vínculo fica com a relevância e a data da última busca
+            db.execute(text("""
+                INSERT INTO account_news (id, account_id, article_id, relevance_score, insights, created_at)
+                VALUES (:id, :account_id, :article_id, :relevance_score, :insights, :created_at)
+                ON CONFLICT (account_id, article_id) DO UPDATE SET
+                    relevance_score = EXCLUDED.relevance_score,
+                    insights = EXCLUDED.insights,
+                    created_at = GREATEST(account_news.created_at, EXCLUDED.created_at)
+            """), {
+                "id": str(item.id),
+                "account_id": item.account_id,
+                "article_id": article_id,
+                "relevance_score": item.relevance_score,
+                "insights": metadata.get("insights", ""),
+                "created_at": item.created_at,
+            })
+
+        db.commit()
+        print(f"✅ news_items copiados: {len(items)} -> {len(articles)} artigo(s)")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro no backfill: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
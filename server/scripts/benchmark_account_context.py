@@ -0,0 +1,188 @@
+"""
+Benchmark do build_account_context (endpoints de intelligence)
+
+Cria uma account temporária com muitas tasks e activities, executa o
+caminho antigo (todas as tasks/activities carregadas e contadas em
+Python) e o atual (agregados em SQL com COUNT FILTER) e mostra latência
+e número de queries. Confere que os dois caminhos geram o mesmo dict.
+
+Tudo roda em uma transação que é desfeita no final: nada fica no banco.
+
+Uso:
+    python scripts/benchmark_account_context.py --tasks 10000 --activities 2000 --repeat 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+# Add parent directory to path so we can import from server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, event, text
+
+from database import SessionLocal, engine
+from models import Account, Activity, Task
+from services.account_intelligence import ACTIVITY_TYPES, AccountIntelligenceService
+
+
+class LegacyAccountIntelligenceService(AccountIntelligenceService):
+    """Caminho anterior: carrega as linhas e filtra/conta em Python"""
+
+    async def _get_task_and_activity_metrics(self, account_id: str) -> Tuple[Dict, Dict]:
+        now = datetime.now(timezone.utc)
+
+        tasks = self.db.query(Task).filter(Task.account_id == account_id).all()
+        open_tasks = [t for t in tasks if t.status in ['todo', 'in-progress']]
+        completed = [t for t in tasks if t.status == 'completed']
+        overdue = [t for t in open_tasks if t.due_date and t.due_date < now]
+
+        cutoff = now - timedelta(days=30)
+        recent_tasks = [t for t in tasks if t.created_at and t.created_at >= cutoff]
+        completed_recent = len([t for t in recent_tasks if t.status == 'completed'])
+
+        task_metrics = {
+            "total": len(tasks),
+            "open": len(open_tasks),
+            "completed": len(completed),
+            "overdue": len(overdue),
+            "completion_rate_30d": self._calculate_completion_rate(len(recent_tasks), completed_recent),
+            "by_priority": {
+                priority: len([t for t in open_tasks if t.priority == priority])
+                for priority in ["urgent", "high", "medium", "low"]
+            },
+            "overdue_details": [
+                {
+                    "title": t.title,
+                    "priority": t.priority,
+                    "days_overdue": (now - t.due_date).days if t.due_date else 0
+                }
+                for t in sorted(overdue, key=lambda x: x.due_date if x.due_date else now)[:5]
+            ],
+        }
+
+        activities = self.db.query(Activity).filter(
+            and_(Activity.account_id == account_id, Activity.created_at >= cutoff)
+        ).all()
+        last_interaction = None
+        days_ago = None
+        if activities:
+            latest = max(activities, key=lambda a: a.created_at)
+            last_interaction = {
+                "type": latest.type,
+                "date": latest.created_at.isoformat(),
+                "title": latest.title,
+            }
+            days_ago = (now - latest.created_at).days
+
+        activity_metrics = {
+            "total_30d": len(activities),
+            "by_type": {
+                f"{activity_type}s": len([a for a in activities if a.type == activity_type])
+                for activity_type in ACTIVITY_TYPES
+            },
+            "last_interaction": last_interaction,
+            "days_since_last_interaction": days_ago,
+            "interaction_frequency": self._classify_frequency(len(activities)),
+        }
+
+        return task_metrics, activity_metrics
+
+
+def seed(db, account_id: str, tasks: int, activities: int):
+    db.add(Account(id=account_id, client_id="benchmark", name="Benchmark", mrr=5000))
+    db.flush()
+    # Datas distintas por linha para que a ordenação dos dois caminhos coincida
+    db.execute(text("""
+        INSERT INTO tasks (id, account_id, title, status, priority, due_date, created_at)
+        SELECT
+            :account_id || '-task-' || i,
+            :account_id,
+            'Task ' || i,
+            (ARRAY['todo', 'in-progress', 'completed', 'cancelled'])[1 + i % 4],
+            (ARRAY['urgent', 'high', 'medium', 'low'])[1 + (i / 4) % 4],
+            NOW() - INTERVAL '60 days' + i * INTERVAL '17 minutes',
+            NOW() - i * INTERVAL '7 minutes'
+        FROM generate_series(1, :count) AS i
+    """), {"account_id": account_id, "count": tasks})
+    db.execute(text("""
+        INSERT INTO activities (id, account_id, title, type, created_at)
+        SELECT
+            :account_id || '-activity-' || i,
+            :account_id,
+            'Activity ' || i,
+            (ARRAY['call', 'meeting', 'email', 'note', 'system'])[1 + i % 5],
+            NOW() - i * INTERVAL '31 minutes'
+        FROM generate_series(1, :count) AS i
+    """), {"account_id": account_id, "count": activities})
+    db.execute(text("ANALYZE tasks"))
+    db.execute(text("ANALYZE activities"))
+
+
+def strip_volatile(context: Dict) -> Dict:
+    """Remove timestamps de detecção (diferem entre execuções)"""
+    for risk in context.get("risks", []):
+        risk.pop("detected_at", None)
+    return context
+
+
+def measure(service, account_id: str, repeat: int) -> Tuple[float, float, Dict]:
+    queries = []
+
+    def count(*_args, **_kwargs):
+        queries.append(1)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        timings = []
+        context = None
+        for _ in range(repeat):
+            service.db.expunge_all()
+            start = time.perf_counter()
+            context = asyncio.run(service.build_account_context(account_id))
+            timings.append(time.perf_counter() - start)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, len(queries) / repeat, strip_volatile(context)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--activities", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    account_id = f"benchmark-{uuid.uuid4()}"
+    try:
+        seed(db, account_id, args.tasks, args.activities)
+
+        legacy_ms, legacy_queries, legacy_context = measure(
+            LegacyAccountIntelligenceService(db), account_id, args.repeat
+        )
+        current_ms, current_queries, current_context = measure(
+            AccountIntelligenceService(db), account_id, args.repeat
+        )
+
+        if legacy_context != current_context:
+            print("⚠️  Contextos divergentes")
+
+        print(f"{args.tasks} tasks, {args.activities} activities, mediana de {args.repeat} execuções")
+        print(f"{'caminho':<10} {'latência (ms)':>14} {'queries':>8}")
+        print(f"{'anterior':<10} {legacy_ms:>14.2f} {legacy_queries:>8.0f}")
+        print(f"{'SQL':<10} {current_ms:>14.2f} {current_queries:>8.0f}")
+        print(f"speedup: {legacy_ms / current_ms:.1f}x")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Benchmark do prompt da análise de accounts (offline, sem chamar a OpenAI)
+
+Monta o prompt anterior (template completo) e o compacto com orçamento de
+tokens para as accounts do banco (ou contextos sintéticos com
+--synthetic) e compara o número de tokens. A latência é estimada por um
+modelo de LLM simulado: rtt + prefill por token de entrada + decode por
+token de saída (saída fixa, então só a entrada muda entre os dois).
+
+Uso:
+    python scripts/benchmark_analysis_prompt.py --limit 200
+    python scripts/benchmark_analysis_prompt.py --synthetic 200 --budget 1200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+from datetime import date, timedelta
+from typing import Dict, List
+
+# Add parent directory to path so we can import from server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from services.analysis_prompt import AnalysisPromptBuilder, count_tokens, tiktoken
+from services.openai_service import ANALYSIS_MODEL
+
+
+class LegacyPrompt:
+    """Caminho anterior: OpenAIService._build_analysis_prompt antes do builder compacto"""
+
+    def build(self, context: Dict) -> str:
+        """Template anterior (todos os campos, "N/A" e schema JSON indentado)"""
+        account = context.get("account", {})
+        financial = context.get("financial", {})
+        health = context.get("health", {})
+        tasks = context.get("tasks", {})
+        activities = context.get("activities", {})
+        risks = context.get("risks", [])
+        opportunities = context.get("opportunities", [])
+        
+        # Format risks
+        risks_str = "\n".join([
+            f"  - [{r['severity'].upper()}] {r['description']}"
+            for r in risks
+        ]) if risks else "  Nenhum risco detectado automaticamente"
+        
+        # Format opportunities
+        opps_str = "\n".join([
+            f"  - [{o['confidence'].upper()}] {o['description']}"
+            for o in opportunities
+        ]) if opportunities else "  Nenhuma oportunidade detectada automaticamente"
+        
+        # Format overdue tasks
+        overdue_str = "\n".join([
+            f"  - [{t['priority'].upper()}] {t['title']} ({t['days_overdue']} dias)"
+            for t in tasks.get("overdue_details", [])[:3]
+        ]) if tasks.get("overdue", 0) > 0 else "  Sem tarefas atrasadas"
+        
+        # Format Kickoff Data
+        kickoff = context.get("kickoff", {})
+        spiced = kickoff.get("spiced", {})
+        negotiation = kickoff.get("negotiation", {})
+        expectations = kickoff.get("expectations", {})
+        
+        kickoff_str = f"""
+### Kick Off Interno & SPICED
+- Vendedor: {kickoff.get('sales_rep', 'N/A')}
+- Origem: {kickoff.get('origin', 'N/A')} {f"({kickoff.get('origin_other')})" if kickoff.get('origin') == 'outro' else ''}
+- Champion Identificado: {kickoff.get('champion', 'N/A')}
+
+#### SPICED Framework:
+- Situation: {spiced.get('situation', 'N/A')}
+- Pain: {spiced.get('pain', 'N/A')}
+- Impact: {spiced.get('impact', 'N/A')}
+- Critical Event: {spiced.get('critical_event', 'N/A')}
+- Decision: {spiced.get('decision', 'N/A')}
+
+#### Negociação e Expectativas:
+- Negociado com: {negotiation.get('negotiated_with', 'N/A')}
+- Detalhes: {negotiation.get('details', 'N/A')}
+- Promessas: {negotiation.get('promises', 'N/A')}
+- Expectativas: {expectations.get('outcomes', 'N/A')}
+- Critérios de Sucesso: {expectations.get('success_criteria', 'N/A')}
+- Riscos/Red Flags: {kickoff.get('risks', 'N/A')}
+"""
+
+        prompt = f"""Analise profundamente este cliente B2B SaaS e forneça a saída em JSON:
+
+## DADOS DO CLIENTE
+
+### Informações Básicas
+- Nome: {account.get('name', 'N/A')}
+- Indústria: {account.get('industry', 'N/A')}
+- Tipo: {account.get('type', 'N/A')}
+- Status de Saúde: {account.get('health_status', 'N/A')}
+- CSM Responsável: {account.get('csm', 'N/A')}
+
+{kickoff_str}
+
+### Financeiro
+- MRR Atual: R$ {financial.get('current_mrr', 0):,.2f}
+- ARR: R$ {financial.get('arr', 0):,.2f}
+- Início do Contrato: {financial.get('contract_start', 'N/A')}
+- Fim do Contrato: {financial.get('contract_end', 'N/A')}
+- Dias até Renovação: {financial.get('days_to_renewal', 'N/A')}
+
+### Health Score
+- Score Atual: {health.get('current_score', 75)}/100
+- Status: {health.get('status', 'N/A')}
+- Tendência: {health.get('trend', 'N/A')}
+- Variação 30d / 90d: {health.get('trend_details', {}).get('delta_30d', 'N/A')} / {health.get('trend_details', {}).get('delta_90d', 'N/A')} pontos
+
+### Atividades (Últimos 30 dias)
+- Total de Interações: {activities.get('total_30d', 0)}
+- Calls: {activities.get('by_type', {}).get('calls', 0)}
+- Meetings: {activities.get('by_type', {}).get('meetings', 0)}
+- Emails: {activities.get('by_type', {}).get('emails', 0)}
+- Última Interação: {activities.get('days_since_last_interaction', 'N/A')} dia(s) atrás
+- Frequência: {activities.get('interaction_frequency', 'N/A')}
+
+### Tasks
+- Total de Tasks: {tasks.get('total', 0)}
+- Abertas: {tasks.get('open', 0)}
+- Concluídas: {tasks.get('completed', 0)}
+- Atrasadas: {tasks.get('overdue', 0)}
+- Taxa de Conclusão (30d): {tasks.get('completion_rate_30d', 0)}%
+
+#### Tasks Atrasadas (Top 3):
+{overdue_str}
+
+#### Distribuição por Prioridade:
+- Urgente: {tasks.get('by_priority', {}).get('urgent', 0)}
+- Alta: {tasks.get('by_priority', {}).get('high', 0)}
+- Média: {tasks.get('by_priority', {}).get('medium', 0)}
+- Baixa: {tasks.get('by_priority', {}).get('low', 0)}
+
+### Sinais de Risco Detectados (Automático)
+{risks_str}
+
+### Oportunidades Detectadas (Automático)
+{opps_str}
+
+## ANÁLISE SOLICITADA
+
+Com base nestes dados, forneça uma análise COMPLETA em formato JSON com a seguinte estrutura:
+
+{{
+  "summary": "Resumo executivo da situação do cliente (2-3 parágrafos)",
+  
+  "health_assessment": {{
+    "overall_health": "healthy|at_risk|critical",
+    "key_strengths": ["força 1", "força 2", "força 3"],
+    "key_concerns": ["preocupação 1", "preocupação 2"]
+  }},
+  
+  "churn_risk": {{
+    "score": 0-100,
+    "level": "low|medium|high|critical",
+    "primary_factors": [
+      {{"factor": "nome do fator", "impact": "alto|médio|baixo", "description": "detalhes"}}
+    ],
+    "mitigationactions": [
+      {{"action": "ação específica", "priority": "urgent|high|medium", "expected_impact": "descrição"}}
+    ]
+  }},
+  
+  "expansion_opportunities": [
+    {{
+      "type": "upsell|cross-sell|expansion",
+      "description": "descrição detalhada",
+      "estimated_value": 1000,
+      "confidence": "high|medium|low",
+      "next_steps": ["passo 1", "passo 2"]
+    }}
+  ],
+  
+  "next_best_actions": [
+    {{
+      "action": "ação específica e clara",
+      "rationale": "porque esta ação é importante agora",
+      "timeline": "imediato|esta semana|este mês",
+      "expected_outcome": "resultado esperado"
+    }}
+  ],
+  
+  "strategic_insights": [
+    "insight estratégico 1 baseado em padrões dos dados",
+    "insight estratégico 2 que o CSM pode não ter percebido",
+    "insight estratégico 3 relacionando múltiplas dimensões"
+  ]
+}}
+
+IMPORTANTE: Retorne APENAS o JSON, sem texto adicional antes ou depois."""
+        return prompt
+
+
+def load_contexts(limit: int) -> List[Dict]:
+    """Contexto real (sem cache) das accounts do banco"""
+    from database import SessionLocal
+    from models import Account
+    from services.account_intelligence import AccountIntelligenceService
+
+    db = SessionLocal()
+    try:
+        service = AccountIntelligenceService(db)
+        account_ids = [row[0] for row in db.query(Account.id).order_by(Account.id).limit(limit).all()]
+
+        async def build_all():
+            return [await service.build_account_context(account_id, use_cache=False) for account_id in account_ids]
+
+        return asyncio.run(build_all())
+    finally:
+        db.close()
+
+
+def synthetic_contexts(count: int, seed: int = 42) -> List[Dict]:
+    """Contextos no formato de build_account_context, com e sem kickoff/tasks"""
+    rng = random.Random(seed)
+    contexts = []
+    for i in range(count):
+        score = rng.randint(20, 100)
+        mrr = rng.choice([0.0, 1500.0, 4200.0, 12000.0])
+        overdue = rng.choice([0, 0, 1, 4])
+        has_kickoff = rng.random() < 0.5
+        contexts.append({
+            "account": {
+                "id": f"acc-{i}", "name": f"Cliente {i}", "industry": rng.choice(["SaaS", "Varejo", None]),
+                "type": "customer", "health_status": "healthy" if score >= 70 else "at-risk", "csm": "Ana",
+            },
+            "financial": {
+                "current_mrr": mrr, "arr": mrr * 12,
+                "contract_start": str(date.today() - timedelta(days=300)) if mrr else None,
+                "contract_end": str(date.today() + timedelta(days=60)) if mrr else None,
+                "days_to_renewal": 60 if mrr else None,
+            },
+            "health": {
+                "current_score": score, "status": "healthy" if score >= 70 else "at_risk", "trend": "stable",
+                "trend_details": {"delta_30d": rng.randint(-10, 10), "delta_90d": None},
+            },
+            "tasks": {
+                "total": overdue * 3, "open": overdue * 2, "completed": overdue, "overdue": overdue,
+                "completion_rate_30d": 50 if overdue else 0,
+                "by_priority": {"urgent": 0, "high": overdue, "medium": overdue, "low": 0},
+                "overdue_details": [
+                    {"title": f"Follow-up {n}", "priority": "high", "days_overdue": n + 2} for n in range(overdue)
+                ],
+            },
+            "activities": {
+                "total_30d": rng.randint(0, 12), "by_type": {"calls": 1, "meetings": 0, "emails": 3},
+                "days_since_last_interaction": rng.choice([None, 3, 25]), "interaction_frequency": "low",
+            },
+            "kickoff": {
+                "sales_rep": "Bruno", "origin": "inbound", "champion": "Carla",
+                "spiced": {
+                    "situation": "Operação com planilhas e retrabalho entre times. " * 4,
+                    "pain": "Falta de visibilidade do funil. " * 3, "impact": None,
+                    "critical_event": "Auditoria no fim do trimestre", "decision": None,
+                },
+                "negotiation": {"negotiated_with": "Diretoria", "details": None, "promises": "Onboarding em 30 dias"},
+                "expectations": {"outcomes": "Reduzir churn em 10%", "success_criteria": None},
+                "risks": None,
+            } if has_kickoff else {},
+            "risks": [
+                {"type": "low_health_score", "severity": "high", "description": f"Health score está em {score}/100"}
+            ] if score < 70 else [],
+            "opportunities": [
+                {"type": "upsell", "confidence": "medium", "description": "Uso alto do plano atual"}
+            ] if score >= 80 else [],
+        })
+    return contexts
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=200, help="accounts lidas do banco")
+    parser.add_argument("--synthetic", type=int, default=0, help="usar N contextos sintéticos (sem banco)")
+    parser.add_argument("--budget", type=int, default=settings.ANALYSIS_PROMPT_TOKEN_BUDGET)
+    parser.add_argument("--rtt-ms", type=float, default=300, help="latência fixa por chamada")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=150, help="custo por 1k tokens de entrada")
+    parser.add_argument("--decode-ms-per-token", type=float, default=20, help="custo por token de saída")
+    parser.add_argument("--output-tokens", type=int, default=900, help="tamanho fixo da resposta")
+    args = parser.parse_args()
+
+    contexts = synthetic_contexts(args.synthetic) if args.synthetic else load_contexts(args.limit)
+    if not contexts:
+        print("Nenhuma account encontrada (rode scripts/seed_demo_data.py ou use --synthetic)")
+        return
+
+    legacy = LegacyPrompt()
+    builder = AnalysisPromptBuilder(args.budget, ANALYSIS_MODEL)
+
+    def latency_ms(input_tokens: int) -> float:
+        return args.rtt_ms + input_tokens / 1000 * args.prefill_ms_per_1k + args.output_tokens * args.decode_ms_per_token
+
+    legacy_tokens, compact_tokens, dropped, truncated = [], [], 0, 0
+    for context in contexts:
+        legacy_tokens.append(count_tokens(legacy.build(context), ANALYSIS_MODEL))
+        built = builder.build(context)
+        compact_tokens.append(built.tokens)
+        dropped += bool(built.dropped_sections)
+        truncated += bool(built.truncated_sections)
+
+    print(f"Contas: {len(contexts)}  orçamento: {args.budget} tokens  "
+          f"contagem: {'tiktoken' if tiktoken is not None else 'estimativa (caracteres/4)'}")
+    print(f"{'':10} {'média':>8} {'p50':>8} {'p95':>8} {'máx':>8} {'latência média (ms)':>22}")
+    for label, tokens in (("anterior", legacy_tokens), ("compacto", compact_tokens)):
+        print(
+            f"{label:10} {statistics.mean(tokens):8.0f} {percentile(tokens, 50):8.0f} "
+            f"{percentile(tokens, 95):8.0f} {max(tokens):8.0f} "
+            f"{statistics.mean(latency_ms(t) for t in tokens):22.0f}"
+        )
+    saved = 1 - sum(compact_tokens) / sum(legacy_tokens)
+    print(f"Redução de tokens de entrada: {saved:.1%}")
+    print(f"Prompts com seções removidas: {dropped}  com listas encurtadas: {truncated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark dos endpoints de IA com o backend de LLM simulado
+
+Sobe a aplicação em processo com LLM_BACKEND=fake (latência e velocidade
+de tokens fixas, sem chamar OpenAI/Perplexity) e chama os endpoints de
+análise, geração de playbook e notícias para as accounts do banco. O
+tempo de relógio em que havia chamada ao LLM simulado em andamento (esperas
+concorrentes contadas uma vez) é descontado do tempo total, então o
+resultado é o overhead do nosso código (banco, montagem de contexto,
+prompt, parsing, serialização) por endpoint.
+
+Uso:
+    python scripts/benchmark_llm_endpoints.py --accounts 20 --repeat 3
+    python scripts/benchmark_llm_endpoints.py --latency-ms 50 --error-rate 0.1
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=2000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# O backend é escolhido na importação de services.llm_clients
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["LLM_FAKE_LATENCY_MS"] = str(args.latency_ms)
+os.environ["LLM_FAKE_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+os.environ["LLM_FAKE_ERROR_RATE"] = str(args.error_rate)
+
+# Add parent directory to path so we can import from server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from database import SessionLocal
+from main import app
+from models import Account
+from services.llm_clients import llm_clients
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(client: TestClient, call: Callable[[TestClient], object], repeat: int) -> Dict:
+    stats = llm_clients.fake.stats
+    totals, overheads, failures = [], [], 0
+    for _ in range(repeat):
+        before = stats.snapshot()["wall_seconds"]
+        started = time.perf_counter()
+        response = call(client)
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            failures += 1
+        simulated = stats.snapshot()["wall_seconds"] - before
+        totals.append(elapsed * 1000)
+        overheads.append(max(0.0, elapsed - simulated) * 1000)
+    return {"totals": totals, "overheads": overheads, "failures": failures}
+
+
+def main():
+    db = SessionLocal()
+    try:
+        account_ids = [row[0] for row in db.query(Account.id).order_by(Account.id).limit(args.accounts).all()]
+    finally:
+        db.close()
+    if not account_ids:
+        print("Nenhuma account encontrada (rode scripts/seed_demo_data.py)")
+        return
+
+    endpoints = {
+        "analyze": lambda account_id: lambda c: c.post(f"/api/v1/accounts/{account_id}/analyze", params={"force": True}),
+        "analyze (cache)": lambda account_id: lambda c: c.post(f"/api/v1/accounts/{account_id}/analyze"),
+        "playbook": lambda account_id: lambda c: c.post(
+            "/api/v1/accounts/playbook/generate", json={"topic": "Onboarding", "category": "onboarding"}
+        ),
+        "news refresh": lambda account_id: lambda c: c.post(f"/api/v1/news/refresh/{account_id}", params={"force": True}),
+    }
+
+    print(f"Backend fake: latência {args.latency_ms:.0f} ms, {args.tokens_per_second:.0f} tokens/s, "
+          f"erros {args.error_rate:.0%}; {len(account_ids)} account(s) x {args.repeat}")
+    print(f"{'endpoint':18} {'total p50':>10} {'overhead p50':>13} {'overhead p95':>13} {'média':>8} {'falhas':>7}")
+
+    with TestClient(app) as client:
+        for name, build_call in endpoints.items():
+            totals, overheads, failures = [], [], 0
+            for account_id in account_ids:
+                result = measure(client, build_call(account_id), args.repeat)
+                totals.extend(result["totals"])
+                overheads.extend(result["overheads"])
+                failures += result["failures"]
+            print(
+                f"{name:18} {percentile(totals, 50):10.1f} {percentile(overheads, 50):13.1f} "
+                f"{percentile(overheads, 95):13.1f} {statistics.mean(overheads):8.1f} {failures:7d}"
+            )
+
+    print(f"Chamadas ao LLM simulado: {llm_clients.fake.stats.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark de serialização dos endpoints de listagem
+
+Compara o caminho padrão do FastAPI (validação pelo response_model +
+json stdlib) com o caminho direto (projeção do ORM + orjson) para
+accounts, clients e tasks. Não precisa de banco: as linhas são objetos
+do ORM montados em memória com o mesmo formato dos dados de demo.
+
+Uso:
+    python scripts/benchmark_serialization.py --rows 2000 --repeat 20
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+# Add parent directory to path so we can import from server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+
+import schemas
+from models import Account, Client, Task
+from serialization import dumps, serialize_rows
+
+
+def _now():
+    return datetime.now(timezone.utc) - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+
+
+def build_accounts(count: int) -> List[Account]:
+    kickoff_fields = list(schemas.InternalKickoff.model_fields.keys())
+    rows = []
+    for i in range(count):
+        rows.append(Account(
+            id=f"acc-{i}",
+            client_id=f"client-{i % 50}",
+            name=f"Conta {i}",
+            industry=random.choice(["Varejo", "Saúde", "Tecnologia", "Educação"]),
+            type="enterprise",
+            status="active",
+            health_status=random.choice(["healthy", "attention", "critical"]),
+            health_score=random.randint(0, 100),
+            mrr=Decimal(random.randint(1000, 50000)) / Decimal(10),
+            contract_start=date(2024, 1, 1),
+            contract_end=date(2025, 12, 31),
+            csm="user1",
+            website="https://example.com",
+            internal_kickoff={field: f"{field} texto de exemplo " * 3 for field in kickoff_fields},
+            created_at=_now(),
+            updated_at=_now(),
+        ))
+    return rows
+
+
+def build_clients(count: int) -> List[Client]:
+    rows = []
+    for i in range(count):
+        rows.append(Client(
+            id=f"client-{i}",
+            name=f"Cliente {i}",
+            legal_name=f"Cliente {i} LTDA",
+            cnpj="00.000.000/0001-00",
+            industry="Tecnologia",
+            website="https://example.com",
+            company_size="51-200",
+            power_map=[{
+                "id": str(uuid.uuid4()), "name": f"Contato {j}", "role": "Diretor",
+                "department": "TI", "influence": "champion", "email": "a@b.com",
+                "phone": "+55 11 99999-0000", "notes": "Observações " * 5,
+            } for j in range(5)],
+            contacts=[{
+                "id": str(uuid.uuid4()), "type": "email", "value": "a@b.com",
+                "label": "Principal", "isPrimary": j == 0,
+            } for j in range(3)],
+            notes="Notas do cliente",
+            tags=["vip", "onboarding"],
+            created_by="user1",
+            created_at=_now(),
+            updated_at=_now(),
+        ))
+    return rows
+
+
+def build_tasks(count: int) -> List[Task]:
+    rows = []
+    for i in range(count):
+        rows.append(Task(
+            id=str(uuid.uuid4()),
+            account_id=f"acc-{i % 500}",
+            title=f"Task {i}",
+            description="Descrição da task " * 4,
+            status=random.choice(["todo", "in-progress", "completed"]),
+            priority=random.choice(["urgent", "high", "medium", "low"]),
+            assignee="user1",
+            due_date=_now(),
+            completed_at=None,
+            created_at=_now(),
+            updated_at=_now(),
+            created_by="user1",
+        ))
+    return rows
+
+
+def default_path(adapter: TypeAdapter, rows) -> bytes:
+    """response_model: valida cada linha, serializa e codifica com json stdlib"""
+    validated = adapter.validate_python(rows, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(schema, rows) -> bytes:
+    """Projeção direta do ORM + orjson"""
+    return dumps(serialize_rows(schema, rows))
+
+
+def timeit(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("accounts", schemas.AccountResponse, build_accounts(args.rows)),
+        ("clients", schemas.ClientResponse, build_clients(args.rows)),
+        ("tasks", schemas.TaskResponse, build_tasks(args.rows)),
+    ]
+
+    print(f"{'endpoint':<10} {'rows':>6} {'default (ms)':>14} {'orjson (ms)':>12} {'speedup':>8}")
+    for name, schema, rows in cases:
+        adapter = TypeAdapter(List[schema])
+
+        # Mesmo conteúdo nos dois caminhos
+        if json.loads(default_path(adapter, rows)) != json.loads(fast_path(schema, rows)):
+            print(f"⚠️  {name}: saídas divergentes")
+
+        before = timeit(lambda: default_path(adapter, rows), args.repeat)
+        after = timeit(lambda: fast_path(schema, rows), args.repeat)
+        print(f"{name:<10} {len(rows):>6} {before:>14.2f} {after:>12.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Grava o snapshot diário das accounts que mudaram (para uso via cron)
+
+Uso:
+    python scripts/run_daily_snapshots.py [YYYY-MM-DD]
+
+A data, se informada, precisa ser a de hoje (UTC): o snapshot grava os
+valores atuais, então backfill de dias passados não é suportado.
+"""
+import os
+import sys
+from datetime import date
+
+# Add parent directory to path so we can import from server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+from services.daily_snapshots import DailySnapshotService
+
+
+def main():
+    snapshot_date = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    db = SessionLocal()
+    try:
+        written = DailySnapshotService(db).run(snapshot_date)
+        if written is None:
+            print("Outro processo já está gravando snapshots; nada a fazer.")
+        else:
+            print(f"✅ Snapshots gravados: {written} account(s)")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro ao gravar snapshots: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
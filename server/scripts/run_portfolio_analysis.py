@@ -0,0 +1,63 @@
+"""
+Analisa todo o portfólio com IA dentro dos limites de RPM/TPM (para uso via cron)
+
+Retoma a última execução não terminada, a menos que --new seja passado.
+
+Uso:
+    python scripts/run_portfolio_analysis.py [--new] [--tenant-id ID] [--rpm 60] [--tpm 150000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add parent directory to path so we can import from server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from database import SessionLocal
+from services.llm_clients import llm_clients
+from services.portfolio_analysis import PortfolioAnalysisScheduler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--new", action="store_true", help="nova execução em vez de retomar")
+    parser.add_argument("--tenant-id", default=None)
+    parser.add_argument("--rpm", type=float, default=settings.PORTFOLIO_ANALYSIS_RPM)
+    parser.add_argument("--tpm", type=float, default=settings.PORTFOLIO_ANALYSIS_TPM)
+    parser.add_argument("--concurrency", type=int, default=settings.PORTFOLIO_ANALYSIS_CONCURRENCY)
+    return parser.parse_args()
+
+
+async def run(args) -> dict:
+    scheduler = PortfolioAnalysisScheduler(rpm=args.rpm, tpm=args.tpm, concurrency=args.concurrency)
+    run_id = None
+    if args.new:
+        db = SessionLocal()
+        try:
+            run_id = scheduler.create_run(db, args.tenant_id)
+        finally:
+            db.close()
+    try:
+        return await scheduler.run(run_id, args.tenant_id)
+    finally:
+        await llm_clients.aclose()
+
+
+def main():
+    args = parse_args()
+    result = asyncio.run(run(args))
+    if result is None:
+        print("Outra análise do portfólio já está em andamento; nada a fazer.")
+        return
+    print(
+        f"✅ Execução {result['id']}: {result['status']} — {result['analyzed']} analisada(s), "
+        f"{result['skipped']} sem mudança, {result['failed']} com erro, {result['pending']} pendente(s); "
+        f"{result['tokens_used']} tokens"
+    )
+    print(f"Rate limiter: {result['rate_limiter']}")
+
+
+if __name__ == "__main__":
+    main()
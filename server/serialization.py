@@ -0,0 +1,150 @@
+"""
+Serialização JSON rápida (orjson) para as respostas da API
+"""
+import typing
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    """Tipos não suportados nativamente pelo orjson"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa para JSON (datetime, date, UUID nativos; Decimal como número)"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """Resposta padrão da API baseada em orjson"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ============================================================================
+# SERIALIZAÇÃO DIRETA DE LINHAS DO ORM
+# ============================================================================
+#
+# Para objetos vindos do banco (confiáveis), o caminho padrão do FastAPI
+# valida cada linha com o response_model e depois passa o resultado pelo
+# jsonable_encoder. Aqui o schema é "compilado" uma única vez em uma lista
+# de (atributo, alias, conversor) e as linhas são projetadas diretamente
+# em dicts com as mesmas chaves que o response_model produziria.
+
+_Field = Tuple[str, str, Optional[Callable[[Any], Any]]]
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _converter_for(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    unwrapped = _unwrap_optional(annotation)
+    # Listas obrigatórias (default=[]) nunca são serializadas como null
+    empty = None if unwrapped is not annotation else []
+    annotation = unwrapped
+
+    if annotation is float:
+        return lambda value: float(value) if value is not None else None
+    if annotation is int:
+        return lambda value: int(value) if value is not None else None
+    if annotation is date:
+        # Colunas DateTime expostas como date
+        return lambda value: value.date() if isinstance(value, datetime) else value
+    if _is_model(annotation):
+        return _nested_converter(annotation)
+
+    if typing.get_origin(annotation) in (list, List):
+        args = typing.get_args(annotation)
+        item = _unwrap_optional(args[0]) if args else None
+        if _is_model(item):
+            nested = _nested_converter(item)
+            return lambda value: [nested(entry) for entry in value] if value is not None else empty
+
+    return None
+
+
+def _nested_converter(schema: Type[BaseModel]) -> Callable[[Any], Any]:
+    """Projeta dicts armazenados em colunas JSON (chaves snake_case ou alias)"""
+    fields = _compile_fields(schema)
+
+    def convert(value: Any) -> Any:
+        if value is None:
+            return None
+        if not isinstance(value, dict):
+            value = getattr(value, "__dict__", {})
+        result = {}
+        for name, alias, converter in fields:
+            item = value.get(name, value.get(alias))
+            result[alias] = converter(item) if converter is not None else item
+        return result
+
+    return convert
+
+
+@lru_cache(maxsize=None)
+def _compile_fields(schema: Type[BaseModel]) -> Tuple[_Field, ...]:
+    alias_generator = schema.model_config.get("alias_generator")
+    compiled = []
+    for name, field in schema.model_fields.items():
+        alias = field.alias or (alias_generator(name) if callable(alias_generator) else name)
+        compiled.append((name, alias, _converter_for(field.annotation)))
+    return tuple(compiled)
+
+
+def serialize_row(schema: Type[BaseModel], row: Any) -> Dict[str, Any]:
+    """Converte um objeto do ORM no dict que o schema produziria (by_alias)"""
+    result = {}
+    for name, alias, converter in _compile_fields(schema):
+        value = getattr(row, name, None)
+        result[alias] = converter(value) if converter is not None else value
+    return result
+
+
+def serialize_rows(schema: Type[BaseModel], rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Converte uma lista de objetos do ORM sem validação do response_model"""
+    fields = _compile_fields(schema)
+    serialized = []
+    for row in rows:
+        item = {}
+        for name, alias, converter in fields:
+            value = getattr(row, name, None)
+            item[alias] = converter(value) if converter is not None else value
+        serialized.append(item)
+    return serialized
+
+
+def orm_response(schema: Type[BaseModel], data: Any, status_code: int = 200) -> FastJSONResponse:
+    """Resposta orjson direta para linha(s) confiáveis do ORM"""
+    if isinstance(data, (list, tuple)):
+        content = serialize_rows(schema, data)
+    else:
+        content = serialize_row(schema, data)
+    return FastJSONResponse(content=content, status_code=status_code)
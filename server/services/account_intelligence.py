@@ -3,31 +3,106 @@ Account Intelligence Service
 Aggregates and prepares account data for AI analysis
 """
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from decimal import Decimal
+from sqlalchemy import text
 
-from models import Account, Task, Activity, HealthScoreEvaluation
+from models import Account
+from services.health_trends import HealthTrendService
+from services.risk_rules import detect_risks, detect_opportunities
+from services.context_cache import account_context_cache
 import crud
 
 
+ACTIVITY_TYPES = ['call', 'meeting', 'email', 'note', 'system']
+
+# Task and activity aggregates for one account (single round trip)
+_METRICS_SQL = """
+    WITH task_stats AS (
+        SELECT
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE status IN ('todo', 'in-progress')) AS open,
+            COUNT(*) FILTER (WHERE status = 'completed') AS completed,
+            COUNT(*) FILTER (WHERE status IN ('todo', 'in-progress') AND due_date < :now) AS overdue,
+            COUNT(*) FILTER (WHERE status IN ('todo', 'in-progress') AND priority = 'urgent') AS open_urgent,
+            COUNT(*) FILTER (WHERE status IN ('todo', 'in-progress') AND priority = 'high') AS open_high,
+            COUNT(*) FILTER (WHERE status IN ('todo', 'in-progress') AND priority = 'medium') AS open_medium,
+            COUNT(*) FILTER (WHERE status IN ('todo', 'in-progress') AND priority = 'low') AS open_low,
+            COUNT(*) FILTER (WHERE created_at >= :since) AS created_30d,
+            COUNT(*) FILTER (WHERE created_at >= :since AND status = 'completed') AS completed_created_30d
+        FROM tasks
+        WHERE account_id = :account_id
+    ),
+    activity_stats AS (
+        SELECT
+            COUNT(*) AS activities_30d,
+            COUNT(*) FILTER (WHERE type = 'call') AS calls,
+            COUNT(*) FILTER (WHERE type = 'meeting') AS meetings,
+            COUNT(*) FILTER (WHERE type = 'email') AS emails,
+            COUNT(*) FILTER (WHERE type = 'note') AS notes,
+            COUNT(*) FILTER (WHERE type = 'system') AS systems
+        FROM activities
+        WHERE account_id = :account_id AND created_at >= :since
+    ),
+    last_activity AS (
+        SELECT type, created_at, title
+        FROM activities
+        WHERE account_id = :account_id AND created_at >= :since
+        ORDER BY created_at DESC
+        LIMIT 1
+    )
+    SELECT
+        t.*,
+        a.*,
+        l.type AS last_type,
+        l.created_at AS last_created_at,
+        l.title AS last_title
+    FROM task_stats t
+    CROSS JOIN activity_stats a
+    LEFT JOIN last_activity l ON TRUE
+"""
+
+# Top 5 overdue open tasks (oldest due date first)
+_OVERDUE_SQL = """
+    SELECT title, priority, due_date
+    FROM tasks
+    WHERE account_id = :account_id
+      AND status IN ('todo', 'in-progress')
+      AND due_date < :now
+    ORDER BY due_date
+    LIMIT 5
+"""
+
+
 class AccountIntelligenceService:
     """Service for aggregating and preparing account data for AI analysis"""
     
     def __init__(self, db: Session):
         self.db = db
     
-    async def build_account_context(self, account_id: str) -> Dict:
+    async def build_account_context(self, account_id: str, use_cache: bool = True) -> Dict:
         """
         Builds complete context for an account
         
         Args:
             account_id: Account ID
+            use_cache: Return the cached context when available
             
         Returns:
             Dict with complete account context
         """
+        if use_cache:
+            cached = account_context_cache.get(account_id)
+            if cached is not None:
+                return cached
+        generation = account_context_cache.generation(account_id)
+        
+        context = await self._build_account_context(account_id)
+        account_context_cache.set(account_id, context, generation)
+        return context
+    
+    async def _build_account_context(self, account_id: str) -> Dict:
+        """Builds the context from the database (no cache)"""
         # Get base account data
         account = self.db.query(Account).filter(Account.id == account_id).first()
         if not account:
@@ -50,11 +125,8 @@ class AccountIntelligenceService:
             health = await self._get_health_metrics(account)
             logger.info("Got health metrics")
             
-            tasks = await self._get_task_metrics(account_id)
-            logger.info("Got task metrics")
-            
-            activities = await self._get_activity_metrics(account_id)
-            logger.info("Got activity metrics")
+            tasks, activities = await self._get_task_and_activity_metrics(account_id)
+            logger.info("Got task and activity metrics")
             
             engagement = await self._get_engagement_metrics(account_id)
             logger.info("Got engagement metrics")
@@ -150,16 +222,25 @@ class AccountIntelligenceService:
     
     async def _get_health_metrics(self, account: Account) -> Dict:
         """Get health score metrics including latest evaluation details"""
-        # Fetch latest health score evaluation
-        latest_evaluation = crud.get_latest_health_score_evaluation(self.db, account.id)
+        # Latest evaluation via the denormalized pointer on the account (PK lookup)
+        latest_evaluation = crud.get_latest_health_score_evaluation_for(self.db, account)
         
         # Use evaluation score if available, otherwise default to 75
         current_score = latest_evaluation.total_score if latest_evaluation else 75
         
+        trend = HealthTrendService(self.db).get_account_trend(account.id)
+        
         health_data = {
             "current_score": current_score,
             "status": account.health_status or "green",
-            "trend": "stable",  # TODO: Calculate from historical data
+            "trend": trend["direction"],
+            "trend_details": {
+                "slope_30d": trend["slope_30d"],
+                "delta_30d": trend["delta_30d"],
+                "delta_90d": trend["delta_90d"],
+                "volatility": trend["volatility"],
+                "evaluations": trend["evaluations"],
+            },
             "breakdown": {
                 "product_usage": current_score,
                 "engagement": current_score,
@@ -173,14 +254,15 @@ class AccountIntelligenceService:
             health_data["latest_evaluation"] = {
                 "evaluated_by": latest_evaluation.evaluated_by,
                 "evaluation_date": latest_evaluation.evaluation_date.isoformat() if latest_evaluation.evaluation_date else None,
-                "classification": latest_evaluation.classification,
+                "classification": account.latest_classification or latest_evaluation.classification,
                 "total_score": latest_evaluation.total_score,
                 "responses": latest_evaluation.responses or {},
-                "pilar_scores": latest_evaluation.pilar_scores or {},
+                "pilar_scores": account.latest_pilar_scores or latest_evaluation.pilar_scores or {},
             }
+            pilar_scores = health_data["latest_evaluation"]["pilar_scores"]
             
             # Update breakdown with pilar scores if available
-            if latest_evaluation.pilar_scores:
+            if pilar_scores:
                 pilar_mapping = {
                     "Adoção e Engajamento": "product_usage",
                     "Percepção de Valor": "engagement", 
@@ -188,90 +270,82 @@ class AccountIntelligenceService:
                     "Saúde Operacional": "financial_health",
                 }
                 for pilar_name, metric_key in pilar_mapping.items():
-                    if pilar_name in latest_evaluation.pilar_scores:
-                        health_data["breakdown"][metric_key] = latest_evaluation.pilar_scores[pilar_name]
+                    if pilar_name in pilar_scores:
+                        health_data["breakdown"][metric_key] = pilar_scores[pilar_name]
         
         return health_data
     
-    async def _get_task_metrics(self, account_id: str) -> Dict:
-        """Aggregate task metrics"""
+    async def _get_task_and_activity_metrics(self, account_id: str) -> Tuple[Dict, Dict]:
+        """
+        Aggregate task and activity metrics in a single round trip
+
+        Counts are computed in SQL with COUNT(*) FILTER; only the top overdue
+        tasks are fetched as rows (second, small query, skipped when none).
+        """
         from datetime import timezone
         now = datetime.now(timezone.utc)
+        thirty_days_ago = now - timedelta(days=30)
         
-        # Get all tasks for this account
-        tasks = self.db.query(Task).filter(Task.account_id == account_id).all()
-        
-        total = len(tasks)
-        open_tasks = [t for t in tasks if t.status in ['todo', 'in-progress']]
-        completed = [t for t in tasks if t.status == 'completed']
-        overdue = [t for t in open_tasks if t.due_date and t.due_date < now]
+        row = self.db.execute(text(_METRICS_SQL), {
+            "account_id": account_id,
+            "now": now,
+            "since": thirty_days_ago,
+        }).mappings().one()
         
-        # Count by priority
-        by_priority = {
-            "urgent": len([t for t in open_tasks if t.priority == 'urgent']),
-            "high": len([t for t in open_tasks if t.priority == 'high']),
-            "medium": len([t for t in open_tasks if t.priority == 'medium']),
-            "low": len([t for t in open_tasks if t.priority == 'low']),
-        }
-        
-        # Overdue details
-        overdue_details = [
-            {
-                "title": t.title,
-                "priority": t.priority,
-                "days_overdue": (now - t.due_date).days if t.due_date else 0
-            }
-            for t in sorted(overdue, key=lambda x: x.due_date if x.due_date else now)[:5]
-        ]
+        overdue_details = []
+        if row["overdue"]:
+            overdue_rows = self.db.execute(text(_OVERDUE_SQL), {
+                "account_id": account_id,
+                "now": now,
+            }).fetchall()
+            overdue_details = [
+                {
+                    "title": title,
+                    "priority": priority,
+                    "days_overdue": (now - due_date).days if due_date else 0
+                }
+                for title, priority, due_date in overdue_rows
+            ]
         
-        return {
-            "total": total,
-            "open": len(open_tasks),
-            "completed": len(completed),
-            "overdue": len(overdue),
-            "completion_rate_30d": self._calculate_completion_rate(tasks, 30),
-            "by_priority": by_priority,
+        tasks = {
+            "total": row["total"],
+            "open": row["open"],
+            "completed": row["completed"],
+            "overdue": row["overdue"],
+            "completion_rate_30d": self._calculate_completion_rate(
+                row["created_30d"], row["completed_created_30d"]
+            ),
+            "by_priority": {
+                "urgent": row["open_urgent"],
+                "high": row["open_high"],
+                "medium": row["open_medium"],
+                "low": row["open_low"],
+            },
             "overdue_details": overdue_details,
         }
-    
-    async def _get_activity_metrics(self, account_id: str) -> Dict:
-        """Aggregate activity metrics"""
-        from datetime import timezone
-        now = datetime.now(timezone.utc)
-        thirty_days_ago = now - timedelta(days=30)
-        
-        # Get activities from last 30 days
-        activities = self.db.query(Activity).filter(
-            and_(
-                Activity.account_id == account_id,
-                Activity.created_at >= thirty_days_ago
-            )
-        ).all()
-        
-        # Count by type
-        by_type = {}
-        for activity_type in ['call', 'meeting', 'email', 'note', 'system']:
-            by_type[f"{activity_type}s"] = len([a for a in activities if a.type == activity_type])
         
-        # Find last interaction
         last_interaction = None
         days_ago = None
-        if activities:
-            latest = max(activities, key=lambda a: a.created_at)
+        if row["last_created_at"] is not None:
             last_interaction = {
-                "type": latest.type,
-                "date": latest.created_at.isoformat(),
-                "title": latest.title,
+                "type": row["last_type"],
+                "date": row["last_created_at"].isoformat(),
+                "title": row["last_title"],
             }
-            days_ago = (now - latest.created_at).days
+            days_ago = (now - row["last_created_at"]).days
         
-        return {
-            "total_30d": len(activities),
-            "by_type": by_type,
+        activities = {
+            "total_30d": row["activities_30d"],
+            "by_type": {
+                f"{activity_type}s": row[f"{activity_type}s"]
+                for activity_type in ACTIVITY_TYPES
+            },
             "last_interaction": last_interaction,
             "days_since_last_interaction": days_ago,
-            "interaction_frequency": self._classify_frequency(len(activities)),
+            "interaction_frequency": self._classify_frequency(row["activities_30d"]),
         }
+        
+        return tasks, activities
     
     async def _get_engagement_metrics(self, account_id: str) -> Dict:
         """Get engagement metrics (placeholder for now)"""
@@ -282,104 +356,18 @@ class AccountIntelligenceService:
         }
     
     async def _detect_risks(self, context: Dict) -> List[Dict]:
-        """Detect risk signals based on heuristics"""
-        risks = []
-        
-        # Health score declining
-        health = context.get("health", {})
-        if health.get("current_score", 100) < 70:
-            risks.append({
-                "type": "low_health_score",
-                "severity": "high" if health["current_score"] < 60 else "medium",
-                "description": f"Health score está em {health['current_score']}/100",
-                "detected_at": datetime.now().isoformat()
-            })
-        
-        # Overdue tasks
-        tasks = context.get("tasks", {})
-        if tasks.get("overdue", 0) > 0:
-            severity = "high" if tasks["overdue"] > 3 else "medium"
-            risks.append({
-                "type": "overdue_tasks",
-                "severity": severity,
-                "description": f"{tasks['overdue']} task(s) atrasada(s)",
-                "detected_at": datetime.now().isoformat()
-            })
-        
-        # Low activity
-        activities = context.get("activities", {})
-        if activities.get("total_30d", 0) < 5:
-            risks.append({
-                "type": "low_engagement",
-                "severity": "medium",
-                "description": f"Apenas {activities['total_30d']} interações nos últimos 30 dias",
-                "detected_at": datetime.now().isoformat()
-            })
-        
-        # No recent interaction
-        days_since = activities.get("days_since_last_interaction")
-        if days_since and days_since > 14:
-            risks.append({
-                "type": "no_recent_contact",
-                "severity": "high",
-                "description": f"Última interação há {days_since} dias",
-                "detected_at": datetime.now().isoformat()
-            })
-        
-        # Contract renewal approaching
-        financial = context.get("financial", {})
-        days_to_renewal = financial.get("days_to_renewal")
-        if days_to_renewal and 0 < days_to_renewal < 60:
-            risks.append({
-                "type": "renewal_approaching",
-                "severity": "medium",
-                "description": f"Renovação em {days_to_renewal} dias",
-                "detected_at": datetime.now().isoformat()
-            })
-        
-        return risks
+        """Detect risk signals based on heuristics (shared with the portfolio scan)"""
+        return detect_risks(context)
     
     async def _detect_opportunities(self, context: Dict) -> List[Dict]:
-        """Detect expansion opportunities"""
-        opportunities = []
-        
-        # High health score
-        health = context.get("health", {})
-        if health.get("current_score", 0) > 85:
-            opportunities.append({
-                "type": "upsell",
-                "description": "Cliente com alta satisfação - momento ideal para upsell",
-                "confidence": "high",
-                "estimated_value": None
-            })
-        
-        # High MRR with good engagement
-        financial = context.get("financial", {})
-        activities = context.get("activities", {})
-        if financial.get("current_mrr", 0) > 3000 and activities.get("total_30d", 0) > 10:
-            opportunities.append({
-                "type": "expansion",
-                "description": "Cliente engajado com alto MRR - potencial para expansion",
-                "confidence": "medium",
-                "estimated_value": financial["current_mrr"] * 0.3  # 30% expansion potential
-            })
-        
-        return opportunities
+        """Detect expansion opportunities (shared with the portfolio scan)"""
+        return detect_opportunities(context)
     
-    def _calculate_completion_rate(self, tasks: List[Task], days: int) -> float:
-        """Calculate task completion rate for the last N days"""
-        if not tasks:
+    def _calculate_completion_rate(self, created: int, completed: int) -> float:
+        """Completion rate (%) of the tasks created in the last 30 days"""
+        if not created:
             return 0.0
-        
-        from datetime import timezone
-        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-        recent_tasks = [t for t in tasks if t.created_at and t.created_at >= cutoff]
-        
-        if not recent_tasks:
-            return 0.0
-        
-        completed = len([t for t in recent_tasks if t.status == 'completed'])
-        return round((completed / len(recent_tasks)) * 100, 1)
+        return round((completed / created) * 100, 1)
     
     def _classify_frequency(self, count: int) -> str:
         """Classify interaction frequency"""
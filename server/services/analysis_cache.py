@@ -0,0 +1,134 @@
+"""
+Account Analysis Cache
+Análises de IA persistidas em account_analyses, identificadas por um hash
+estável do contexto + versão do prompt + modelo
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import settings
+
+# Campos que mudam a cada montagem do contexto sem mudar o conteúdo
+_VOLATILE_KEYS = {"detected_at"}
+
+
+def _strip_volatile(value):
+    if isinstance(value, dict):
+        return {key: _strip_volatile(item) for key, item in value.items() if key not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(item) for item in value]
+    return value
+
+
+def context_fingerprint(context: Dict, prompt_settings: Optional[Dict] = None) -> str:
+    """
+    sha256 do contexto em JSON canônico (chaves ordenadas)
+
+    prompt_settings (system prompt, temperatura, ...) entram no hash:
+    mudar as configurações de IA do tenant gera uma nova análise.
+    """
+    payload = {
+        "context": _strip_volatile(context),
+        "prompt": prompt_settings or {},
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AccountAnalysisCache:
+    """Leitura e gravação de análises persistidas"""
+
+    def __init__(self, db: Session, ttl_hours: Optional[float] = None):
+        self.db = db
+        self.ttl = timedelta(hours=ttl_hours if ttl_hours is not None else settings.ANALYSIS_CACHE_TTL_HOURS)
+
+    def get(self, account_id: str, fingerprint: str, prompt_version: str, model: str) -> Optional[Dict]:
+        """
+        Análise com a mesma chave gravada dentro do TTL
+
+        Returns:
+            {"analysis", "tokens_used", "created_at", "expires_at"} ou None
+        """
+        row = self.db.execute(text("""
+            SELECT analysis, tokens_used, created_at
+            FROM account_analyses
+            WHERE account_id = :account_id
+              AND fingerprint = :fingerprint
+              AND prompt_version = :prompt_version
+              AND model = :model
+              AND created_at >= :since
+        """), {
+            "account_id": account_id,
+            "fingerprint": fingerprint,
+            "prompt_version": prompt_version,
+            "model": model,
+            "since": datetime.now(timezone.utc) - self.ttl,
+        }).first()
+        if not row:
+            return None
+
+        analysis, tokens_used, created_at = row
+        return {
+            "analysis": analysis,
+            "tokens_used": tokens_used,
+            "created_at": created_at,
+            "expires_at": created_at + self.ttl,
+        }
+
+    def exists(self, account_id: str, fingerprint: str, prompt_version: str, model: str) -> bool:
+        """Já existe análise para esta chave (independente do TTL)"""
+        return self.db.execute(text("""
+            SELECT 1
+            FROM account_analyses
+            WHERE account_id = :account_id
+              AND fingerprint = :fingerprint
+              AND prompt_version = :prompt_version
+              AND model = :model
+        """), {
+            "account_id": account_id,
+            "fingerprint": fingerprint,
+            "prompt_version": prompt_version,
+            "model": model,
+        }).first() is not None
+
+    def save(
+        self,
+        account_id: str,
+        fingerprint: str,
+        prompt_version: str,
+        model: str,
+        analysis: Dict,
+        tokens_used: Optional[int] = None,
+    ) -> datetime:
+        """Grava (ou renova) a análise da chave e retorna a data de gravação"""
+        created_at = self.db.execute(text("""
+            INSERT INTO account_analyses (account_id, fingerprint, prompt_version, model, analysis, tokens_used)
+            VALUES (:account_id, :fingerprint, :prompt_version, :model, CAST(:analysis AS json), :tokens_used)
+            ON CONFLICT (account_id, fingerprint, prompt_version, model) DO UPDATE SET
+                analysis = EXCLUDED.analysis,
+                tokens_used = EXCLUDED.tokens_used,
+                created_at = NOW()
+            RETURNING created_at
+        """), {
+            "account_id": account_id,
+            "fingerprint": fingerprint,
+            "prompt_version": prompt_version,
+            "model": model,
+            "analysis": json.dumps(analysis, ensure_ascii=False, default=str),
+            "tokens_used": tokens_used,
+        }).scalar()
+        self.db.commit()
+        return created_at
+
+    def purge_expired(self) -> int:
+        """Remove análises fora do TTL"""
+        deleted = self.db.execute(text("""
+            DELETE FROM account_analyses WHERE created_at < :since
+        """), {"since": datetime.now(timezone.utc) - self.ttl}).rowcount
+        self.db.commit()
+        return deleted
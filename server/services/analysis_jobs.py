@@ -0,0 +1,444 @@
+"""
+Account Analysis Jobs
+Análise de IA de accounts executada em background (pool com limite de
+concorrência), com status persistido em analysis_jobs
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from services.account_intelligence import AccountIntelligenceService
+from services.analysis_cache import AccountAnalysisCache, context_fingerprint
+from services.openai_service import OpenAIService
+
+logger = logging.getLogger(__name__)
+
+_JOB_COLUMNS = """
+    id, account_id, status, force, result, error, error_code,
+    created_at, started_at, finished_at, worker_id, heartbeat_at
+"""
+
+
+def _analyzed_at(cached: Optional[Dict]) -> str:
+    """Quando a análise foi gerada: a da análise persistida, ou agora"""
+    created_at = cached["created_at"] if cached else None
+    if isinstance(created_at, datetime):
+        return created_at.isoformat()
+    return created_at or datetime.now(timezone.utc).isoformat()
+
+
+async def analyze_account(
+    db: Session,
+    account_id: str,
+    tenant_id: Optional[str] = None,
+    force: bool = False
+) -> Dict:
+    """
+    Contexto + análise de IA (reaproveitando a análise persistida quando o
+    contexto não mudou)
+
+    Returns:
+        {"context", "ai_analysis", "analyzed_at", "cache"}
+
+    Raises:
+        ValueError: account inexistente ou OpenAI não configurada
+        RuntimeError: erro na API da OpenAI
+    """
+    intelligence_service = AccountIntelligenceService(db)
+    context = await intelligence_service.build_account_context(account_id)
+
+    ai_service = OpenAIService(db, tenant_id)
+    analysis_settings = ai_service.analysis_settings()
+    fingerprint = context_fingerprint(context, analysis_settings)
+    analysis_cache = AccountAnalysisCache(db)
+
+    cached = None
+    if not force:
+        cached = analysis_cache.get(
+            account_id, fingerprint, analysis_settings["prompt_version"], analysis_settings["model"]
+        )
+
+    if cached:
+        analysis = cached["analysis"]
+        cache_info = {
+            "status": "hit",
+            "created_at": cached["created_at"],
+            "expires_at": cached["expires_at"],
+        }
+    else:
+        analysis = await ai_service.analyze_account(context)
+        created_at = analysis_cache.save(
+            account_id,
+            fingerprint,
+            analysis_settings["prompt_version"],
+            analysis_settings["model"],
+            analysis,
+            analysis.get("_metadata", {}).get("tokens_used"),
+        )
+        cache_info = {
+            "status": "bypass" if force else "miss",
+            "created_at": created_at,
+            "expires_at": created_at + analysis_cache.ttl if created_at else None,
+        }
+    cache_info["fingerprint"] = fingerprint
+
+    return {
+        "context": context,
+        "ai_analysis": analysis,
+        "analyzed_at": _analyzed_at(cached),
+        "cache": cache_info,
+    }
+
+
+async def stream_account_analysis(
+    db: Session,
+    account_id: str,
+    context: Dict,
+    ai_service: OpenAIService,
+    force: bool = False
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Variante em streaming de analyze_account (eventos SSE)
+
+    Eventos: context (métricas, antes da IA), token ({"text"}) e done (mesmo
+    payload de analyze_account). Com a análise persistida válida, vai direto
+    para done.
+    """
+    analysis_settings = ai_service.analysis_settings()
+    fingerprint = context_fingerprint(context, analysis_settings)
+    analysis_cache = AccountAnalysisCache(db)
+
+    yield "context", context
+
+    cached = None
+    if not force:
+        cached = analysis_cache.get(
+            account_id, fingerprint, analysis_settings["prompt_version"], analysis_settings["model"]
+        )
+
+    if cached:
+        analysis = cached["analysis"]
+        cache_info = {
+            "status": "hit",
+            "created_at": cached["created_at"],
+            "expires_at": cached["expires_at"],
+        }
+    else:
+        parts = []
+        async for token in ai_service.stream_analysis(context):
+            parts.append(token)
+            yield "token", {"text": token}
+
+        analysis = ai_service.parse_analysis("".join(parts), ai_service.last_tokens_used)
+        created_at = analysis_cache.save(
+            account_id,
+            fingerprint,
+            analysis_settings["prompt_version"],
+            analysis_settings["model"],
+            analysis,
+            ai_service.last_tokens_used,
+        )
+        cache_info = {
+            "status": "bypass" if force else "miss",
+            "created_at": created_at,
+            "expires_at": created_at + analysis_cache.ttl if created_at else None,
+        }
+    cache_info["fingerprint"] = fingerprint
+
+    yield "done", {
+        "context": context,
+        "ai_analysis": analysis,
+        "analyzed_at": _analyzed_at(cached),
+        "cache": cache_info,
+    }
+
+
+def _error_code(error: Exception) -> str:
+    """Categoria do erro (mesmo mapeamento de status do endpoint síncrono)"""
+    if isinstance(error, ValueError):
+        return "not_found" if "not found" in str(error).lower() else "invalid"
+    if isinstance(error, RuntimeError):
+        return "provider_error"
+    return "internal_error"
+
+
+def _row_to_job(row) -> Dict:
+    job = dict(row._mapping)
+    for key in ("created_at", "started_at", "finished_at", "heartbeat_at"):
+        if job[key] is not None:
+            job[key] = job[key].isoformat()
+    return job
+
+
+class AnalysisJobRunner:
+    """
+    Pool de análises em background (um por worker)
+
+    O status fica no banco, então qualquer worker responde o polling; a
+    execução acontece no worker que recebeu o pedido. Pedidos para uma
+    account que já tem job na fila/em execução retornam o job existente
+    (índice único parcial em analysis_jobs).
+
+    Cada job guarda o worker dono (worker_id) e um heartbeat renovado
+    periodicamente enquanto ele está na fila ou em execução. Jobs ativos
+    sem heartbeat há mais de stale_seconds (worker caiu) são marcados como
+    interrompidos pelo loop de qualquer worker, liberando a account.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        timeout_minutes: float = 10,
+        heartbeat_seconds: float = 30,
+        stale_seconds: float = 120
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timedelta(minutes=timeout_minutes)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def submit(
+        self,
+        db: Session,
+        account_ids: Iterable[str],
+        tenant_id: Optional[str] = None,
+        force: bool = False
+    ) -> Dict:
+        """
+        Enfileira a análise das accounts
+
+        Returns:
+            {"jobs": [job, ...], "not_found": [account_id, ...]}; cada job
+            traz "deduplicated": True quando já existia
+        """
+        requested = list(dict.fromkeys(account_ids))
+        existing = {
+            row[0] for row in db.execute(text("""
+                SELECT id FROM accounts WHERE id = ANY(CAST(:account_ids AS text[]))
+            """), {"account_ids": requested}).fetchall()
+        }
+
+        jobs = []
+        created = []
+        for account_id in requested:
+            if account_id not in existing:
+                continue
+            # Segunda tentativa cobre o job existente terminar entre o INSERT e o SELECT
+            for _ in range(2):
+                job_id = db.execute(text("""
+                    INSERT INTO analysis_jobs (id, account_id, tenant_id, force, status, worker_id, heartbeat_at)
+                    VALUES (:id, :account_id, :tenant_id, :force, 'queued', :worker_id, NOW())
+                    ON CONFLICT (account_id) WHERE status IN ('queued', 'running') DO NOTHING
+                    RETURNING id
+                """), {
+                    "id": str(uuid.uuid4()),
+                    "account_id": account_id,
+                    "tenant_id": tenant_id,
+                    "force": force,
+                    "worker_id": self.worker_id,
+                }).scalar()
+                if job_id:
+                    created.append(job_id)
+                    jobs.append((job_id, False))
+                    break
+                job_id = db.execute(text("""
+                    SELECT id FROM analysis_jobs
+                    WHERE account_id = :account_id AND status IN ('queued', 'running')
+                """), {"account_id": account_id}).scalar()
+                if job_id:
+                    jobs.append((job_id, True))
+                    break
+        db.commit()
+
+        for job_id in created:
+            self._schedule(job_id)
+
+        rows = {job["id"]: job for job in self.get_many(db, [job_id for job_id, _ in jobs])}
+        result = []
+        for job_id, deduplicated in jobs:
+            job = rows.get(job_id)
+            if job:
+                job["deduplicated"] = deduplicated
+                result.append(job)
+
+        return {
+            "jobs": result,
+            "not_found": [account_id for account_id in requested if account_id not in existing],
+        }
+
+    def get(self, db: Session, job_id: str) -> Optional[Dict]:
+        row = db.execute(text(f"""
+            SELECT {_JOB_COLUMNS} FROM analysis_jobs WHERE id = :id
+        """), {"id": job_id}).first()
+        return _row_to_job(row) if row else None
+
+    def get_many(self, db: Session, job_ids: List[str], include_result: bool = True) -> List[Dict]:
+        if not job_ids:
+            return []
+        columns = _JOB_COLUMNS if include_result else _JOB_COLUMNS.replace("result,", "")
+        rows = db.execute(text(f"""
+            SELECT {columns} FROM analysis_jobs WHERE id = ANY(CAST(:ids AS text[]))
+        """), {"ids": list(job_ids)}).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def _schedule(self, job_id: str):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job_id: str):
+        async with self._semaphore:
+            db = SessionLocal()
+            try:
+                job = db.execute(text("""
+                    UPDATE analysis_jobs
+                    SET status = 'running', started_at = NOW(), heartbeat_at = NOW()
+                    WHERE id = :id AND status = 'queued' AND worker_id = :worker_id
+                    RETURNING account_id, tenant_id, force
+                """), {"id": job_id, "worker_id": self.worker_id}).first()
+                db.commit()
+                if not job:
+                    return
+                account_id, tenant_id, force = job
+
+                try:
+                    result = await asyncio.wait_for(
+                        analyze_account(db, account_id, tenant_id, force),
+                        timeout=self.timeout.total_seconds(),
+                    )
+                except asyncio.TimeoutError:
+                    db.rollback()
+                    self._finish(db, job_id, "failed", error="Tempo limite da análise excedido", error_code="timeout")
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Erro na análise do job {job_id} (account {account_id}): {str(e)}")
+                    self._finish(db, job_id, "failed", error=str(e), error_code=_error_code(e))
+                else:
+                    self._finish(db, job_id, "completed", result=result)
+            except asyncio.CancelledError:
+                db.rollback()
+                self._finish(db, job_id, "failed", error="Worker encerrado", error_code="interrupted")
+                raise
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Erro ao executar job de análise {job_id}: {str(e)}")
+            finally:
+                db.close()
+
+    @staticmethod
+    def _finish(
+        db: Session,
+        job_id: str,
+        status: str,
+        result: Optional[Dict] = None,
+        error: Optional[str] = None,
+        error_code: Optional[str] = None
+    ):
+        db.execute(text("""
+            UPDATE analysis_jobs
+            SET status = :status,
+                result = CAST(:result AS json),
+                error = :error,
+                error_code = :error_code,
+                finished_at = NOW()
+            WHERE id = :id
+        """), {
+            "id": job_id,
+            "status": status,
+            "result": json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+            "error": error,
+            "error_code": error_code,
+        })
+        db.commit()
+
+    def heartbeat(self) -> int:
+        """Renova o heartbeat dos jobs ativos deste worker (na fila ou em execução)"""
+        db = SessionLocal()
+        try:
+            updated = db.execute(text("""
+                UPDATE analysis_jobs SET heartbeat_at = NOW()
+                WHERE worker_id = :worker_id AND status IN ('queued', 'running')
+            """), {"worker_id": self.worker_id}).rowcount
+            db.commit()
+            return updated
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao renovar heartbeat dos jobs de análise: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+    def fail_stale(self) -> int:
+        """
+        Marca como interrompidos os jobs ativos cujo heartbeat parou (o
+        worker dono caiu), pelo relógio do banco
+        """
+        db = SessionLocal()
+        try:
+            updated = db.execute(text("""
+                UPDATE analysis_jobs
+                SET status = 'failed', error = 'Job interrompido', error_code = 'interrupted', finished_at = NOW()
+                WHERE status IN ('queued', 'running')
+                  AND COALESCE(heartbeat_at, started_at, created_at) < NOW() - make_interval(secs => :stale_seconds)
+            """), {"stale_seconds": self.stale_seconds}).rowcount
+            db.commit()
+            if updated:
+                logger.warning(f"Jobs de análise sem heartbeat marcados como interrompidos: {updated}")
+            return updated
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao limpar jobs de análise: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.to_thread(self.heartbeat)
+            await asyncio.to_thread(self.fail_stale)
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    def start(self):
+        """Inicia o heartbeat e a limpeza periódica no event loop atual"""
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        """Cancela os jobs em andamento deste worker (marcados como interrompidos)"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+
+# Instância global (uma por worker)
+analysis_job_runner = AnalysisJobRunner(
+    max_concurrency=settings.ANALYSIS_JOB_CONCURRENCY,
+    timeout_minutes=settings.ANALYSIS_JOB_TIMEOUT_MINUTES,
+    heartbeat_seconds=settings.ANALYSIS_JOB_HEARTBEAT_SECONDS,
+    stale_seconds=settings.ANALYSIS_JOB_STALE_SECONDS,
+)
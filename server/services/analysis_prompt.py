@@ -0,0 +1,250 @@
+"""
+Analysis Prompt Builder
+Prompt compacto da análise de accounts: omite campos e seções vazios,
+usa um formato denso (uma linha "chave=valor" por seção) e respeita um
+orçamento de tokens cortando primeiro as seções menos prioritárias
+"""
+import math
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken é opcional; sem ele, estimativa por caracteres
+    tiktoken = None
+
+# Estrutura de saída esperada (mesmas chaves do template anterior)
+OUTPUT_SCHEMA = (
+    '{"summary":"resumo executivo (2-3 parágrafos)",'
+    '"health_assessment":{"overall_health":"healthy|at_risk|critical","key_strengths":[str],"key_concerns":[str]},'
+    '"churn_risk":{"score":0-100,"level":"low|medium|high|critical",'
+    '"primary_factors":[{"factor":str,"impact":"alto|médio|baixo","description":str}],'
+    '"mitigationactions":[{"action":str,"priority":"urgent|high|medium","expected_impact":str}]},'
+    '"expansion_opportunities":[{"type":"upsell|cross-sell|expansion","description":str,"estimated_value":number,'
+    '"confidence":"high|medium|low","next_steps":[str]}],'
+    '"next_best_actions":[{"action":str,"rationale":str,"timeline":"imediato|esta semana|este mês","expected_outcome":str}],'
+    '"strategic_insights":[str]}'
+)
+
+HEADER = (
+    "Analise este cliente B2B SaaS (dados abaixo, campos ausentes = sem dado) "
+    "e responda APENAS com JSON neste formato:\n" + OUTPUT_SCHEMA
+)
+
+# Texto longo vindo do kickoff (campos livres) é cortado neste tamanho
+MAX_FIELD_CHARS = 300
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """Tokens do texto (tiktoken quando instalado; senão ~4 caracteres por token)"""
+    if tiktoken is not None:
+        return len(_encoding(model).encode(text))
+    return math.ceil(len(text) / 4)
+
+
+class BuiltPrompt(NamedTuple):
+    text: str
+    tokens: int
+    budget: int
+    dropped_sections: List[str]
+    truncated_sections: List[str]
+
+
+class _Section:
+    """
+    Bloco do prompt
+
+    priority: menor = mais importante (cortado por último)
+    items: linhas de lista que podem ser cortadas do fim antes de remover a seção
+    """
+
+    def __init__(self, name: str, priority: int, line: str = "", items: Optional[List[str]] = None):
+        self.name = name
+        self.priority = priority
+        self.line = line
+        self.items = items or []
+
+    def render(self) -> str:
+        lines = [f"[{self.name}] {self.line}".rstrip()]
+        lines.extend(f"- {item}" for item in self.items)
+        return "\n".join(lines)
+
+    @property
+    def empty(self) -> bool:
+        return not self.line and not self.items
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == "N/A" or value == [] or value == {}
+
+
+def _fields(**values) -> str:
+    """chave=valor separados por "; ", sem os vazios"""
+    parts = []
+    for key, value in values.items():
+        if _is_empty(value):
+            continue
+        if isinstance(value, float):
+            value = f"{value:.2f}".rstrip("0").rstrip(".")
+        text = " ".join(str(value).split())
+        if len(text) > MAX_FIELD_CHARS:
+            text = text[:MAX_FIELD_CHARS].rstrip() + "…"
+        parts.append(f"{key}={text}")
+    return "; ".join(parts)
+
+
+def _nonzero(values: Dict) -> Dict:
+    return {key: value for key, value in (values or {}).items() if value}
+
+
+class AnalysisPromptBuilder:
+    """
+    Monta o prompt da análise dentro de um orçamento de tokens
+
+    Ordem de corte quando passa do orçamento: kickoff, oportunidades,
+    tasks, atividades, financeiro, health, riscos. Listas são encurtadas
+    (itens do fim) antes de a seção inteira ser removida. A conta e o
+    formato de saída nunca são cortados.
+    """
+
+    def __init__(self, budget_tokens: int = 1000, model: str = "gpt-4"):
+        self.budget_tokens = budget_tokens
+        self.model = model
+
+    def build(self, context: Dict) -> BuiltPrompt:
+        sections = [section for section in self._sections(context) if not section.empty]
+        dropped: List[str] = []
+        truncated: List[str] = []
+
+        def cost(section: _Section) -> int:
+            return count_tokens(section.render() + "\n", self.model)
+
+        header_tokens = count_tokens(HEADER + "\n\n", self.model)
+        costs = {id(section): cost(section) for section in sections}
+        total = header_tokens + sum(costs.values())
+
+        for section in sorted(sections, key=lambda s: s.priority, reverse=True):
+            if total <= self.budget_tokens:
+                break
+            if section.priority == 0:
+                continue
+            while section.items and total > self.budget_tokens:
+                section.items.pop()
+                new_cost = cost(section)
+                total -= costs[id(section)] - new_cost
+                costs[id(section)] = new_cost
+                if section.name not in truncated:
+                    truncated.append(section.name)
+            if total > self.budget_tokens or section.empty:
+                total -= costs.pop(id(section))
+                sections.remove(section)
+                dropped.append(section.name)
+                if section.name in truncated:
+                    truncated.remove(section.name)
+
+        text = HEADER + "\n\n" + "\n".join(section.render() for section in sections)
+        return BuiltPrompt(
+            text=text,
+            tokens=count_tokens(text, self.model),
+            budget=self.budget_tokens,
+            dropped_sections=dropped,
+            truncated_sections=truncated,
+        )
+
+    def _sections(self, context: Dict) -> List[_Section]:
+        account = context.get("account") or {}
+        financial = context.get("financial") or {}
+        health = context.get("health") or {}
+        tasks = context.get("tasks") or {}
+        activities = context.get("activities") or {}
+        kickoff = context.get("kickoff") or {}
+        trend_details = health.get("trend_details") or {}
+
+        sections = [
+            _Section("conta", 0, _fields(
+                nome=account.get("name"),
+                industria=account.get("industry"),
+                tipo=account.get("type"),
+                status=account.get("health_status"),
+                csm=account.get("csm"),
+            )),
+            _Section("riscos_detectados", 1, items=[
+                f"{risk['severity'].upper()}: {risk['description']}"
+                for risk in context.get("risks") or []
+            ]),
+            _Section("health", 2, _fields(
+                score=health.get("current_score"),
+                status=health.get("status"),
+                tendencia=health.get("trend"),
+                delta_30d=trend_details.get("delta_30d"),
+                delta_90d=trend_details.get("delta_90d"),
+            )),
+            _Section("financeiro", 3, _fields(
+                mrr=financial.get("current_mrr") or None,
+                arr=financial.get("arr") or None,
+                inicio=financial.get("contract_start"),
+                fim=financial.get("contract_end"),
+                dias_ate_renovacao=financial.get("days_to_renewal"),
+            )),
+            _Section("atividades_30d", 4, _fields(
+                total=activities.get("total_30d"),
+                **_nonzero(activities.get("by_type")),
+                dias_desde_ultima=activities.get("days_since_last_interaction"),
+                frequencia=activities.get("interaction_frequency"),
+            )),
+            _Section("tasks", 5, _fields(
+                total=tasks.get("total") or None,
+                abertas=tasks.get("open") or None,
+                concluidas=tasks.get("completed") or None,
+                atrasadas=tasks.get("overdue") or None,
+                conclusao_30d_pct=tasks.get("completion_rate_30d") or None,
+                **{f"prioridade_{key}": value for key, value in _nonzero(tasks.get("by_priority")).items()},
+            ), items=[
+                f"atrasada {task['priority'].upper()}: {task['title']} ({task['days_overdue']}d)"
+                for task in (tasks.get("overdue_details") or [])[:3]
+            ]),
+            _Section("oportunidades_detectadas", 6, items=[
+                f"{opportunity['confidence'].upper()}: {opportunity['description']}"
+                for opportunity in context.get("opportunities") or []
+            ]),
+        ]
+
+        if kickoff:
+            spiced = kickoff.get("spiced") or {}
+            negotiation = kickoff.get("negotiation") or {}
+            expectations = kickoff.get("expectations") or {}
+            origin = kickoff.get("origin")
+            if origin == "outro" and kickoff.get("origin_other"):
+                origin = f"outro ({kickoff['origin_other']})"
+            sections.append(_Section("kickoff", 7, items=[
+                line for line in (
+                    _fields(vendedor=kickoff.get("sales_rep"), origem=origin, champion=kickoff.get("champion")),
+                    _fields(
+                        situation=spiced.get("situation"),
+                        pain=spiced.get("pain"),
+                        impact=spiced.get("impact"),
+                        critical_event=spiced.get("critical_event"),
+                        decision=spiced.get("decision"),
+                    ),
+                    _fields(
+                        negociado_com=negotiation.get("negotiated_with"),
+                        detalhes=negotiation.get("details"),
+                        promessas=negotiation.get("promises"),
+                    ),
+                    _fields(
+                        expectativas=expectations.get("outcomes"),
+                        criterios_sucesso=expectations.get("success_criteria"),
+                        red_flags=kickoff.get("risks"),
+                    ),
+                ) if line
+            ]))
+
+        return sections
@@ -0,0 +1,222 @@
+"""
+Account Context Cache
+Cache do contexto de intelligence por account (LRU em memória ou Redis),
+invalidado pelos caminhos de escrita de accounts, tasks, activities e
+avaliações de health score
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+from config import settings
+from serialization import dumps
+
+try:
+    import redis
+except ImportError:  # Redis é opcional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_REDIS_PREFIX = "intelligence:context:"
+
+
+class _MemoryBackend:
+    """LRU em memória com expiração (um por worker)"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class _RedisBackend:
+    """Redis compartilhado entre workers (invalidação vale para todos)"""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: int):
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._client.ping()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(_REDIS_PREFIX + key)
+
+    def set(self, key: str, payload: bytes):
+        self._client.setex(_REDIS_PREFIX + key, self.ttl, payload)
+
+    def delete(self, key: str):
+        self._client.delete(_REDIS_PREFIX + key)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=_REDIS_PREFIX + "*", count=500))
+        if keys:
+            self._client.delete(*keys)
+
+    def size(self) -> int:
+        return sum(1 for _ in self._client.scan_iter(match=_REDIS_PREFIX + "*", count=500))
+
+
+class AccountContextCache:
+    """
+    Cache do contexto de build_account_context
+
+    O contexto é guardado serializado (orjson), então cada leitura devolve
+    uma cópia independente. Cada invalidação incrementa a geração da
+    account: um contexto montado antes de uma escrita não é gravado depois
+    dela. O TTL cobre o que muda só com o tempo (atrasos, dias sem contato)
+    e, no backend em memória, escritas feitas por outros workers.
+    """
+
+    def __init__(
+        self,
+        backend: str = "memory",
+        ttl: int = 300,
+        max_entries: int = 1000,
+        redis_url: Optional[str] = None,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self._backend = self._create_backend(backend, ttl, max_entries, redis_url)
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._errors = 0
+
+    @staticmethod
+    def _create_backend(backend: str, ttl: int, max_entries: int, redis_url: Optional[str]):
+        if backend == "redis":
+            if redis is None:
+                logger.warning("Pacote redis não instalado; cache de contexto em memória")
+            else:
+                try:
+                    return _RedisBackend(redis_url, ttl)
+                except Exception as e:
+                    logger.warning(f"Redis indisponível ({e}); cache de contexto em memória")
+        return _MemoryBackend(max_entries, ttl)
+
+    def generation(self, account_id: str) -> int:
+        """Geração atual da account (capturar antes de montar o contexto)"""
+        with self._lock:
+            return self._generations.get(account_id, 0)
+
+    def get(self, account_id: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        try:
+            payload = self._backend.get(account_id)
+        except Exception as e:
+            self._record_error(e)
+            payload = None
+
+        with self._lock:
+            if payload is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return orjson.loads(payload)
+
+    def set(self, account_id: str, context: Dict, generation: int):
+        """Grava o contexto se a account não foi invalidada desde `generation`"""
+        if not self.enabled or self.generation(account_id) != generation:
+            return
+        try:
+            self._backend.set(account_id, dumps(context))
+        except Exception as e:
+            self._record_error(e)
+
+    def invalidate(self, *account_ids: Optional[str]):
+        """Descarta o contexto das accounts (ignora ids vazios)"""
+        for account_id in {account_id for account_id in account_ids if account_id}:
+            with self._lock:
+                self._generations[account_id] = self._generations.get(account_id, 0) + 1
+                self._invalidations += 1
+            try:
+                self._backend.delete(account_id)
+            except Exception as e:
+                self._record_error(e)
+
+    def clear(self):
+        """Descarta todos os contextos (escritas em lote)"""
+        with self._lock:
+            for account_id in self._generations:
+                self._generations[account_id] += 1
+            self._invalidations += 1
+        try:
+            self._backend.clear()
+        except Exception as e:
+            self._record_error(e)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats = {
+                "backend": self._backend.name,
+                "enabled": self.enabled,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "errors": self._errors,
+            }
+        try:
+            stats["entries"] = self._backend.size()
+        except Exception:
+            stats["entries"] = None
+        return stats
+
+    def _record_error(self, error: Exception):
+        with self._lock:
+            self._errors += 1
+        logger.warning(f"Erro no cache de contexto: {error}")
+
+
+# Instância global (uma por worker)
+account_context_cache = AccountContextCache(
+    backend=settings.CONTEXT_CACHE_BACKEND,
+    ttl=settings.CACHE_TTL,
+    max_entries=settings.CONTEXT_CACHE_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL,
+    enabled=settings.CONTEXT_CACHE_ENABLED,
+)
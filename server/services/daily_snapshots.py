@@ -0,0 +1,271 @@
+"""
+Account Daily Snapshots
+Job incremental que grava o snapshot diário apenas das accounts que mudaram
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Garante uma única execução simultânea entre workers
+_ADVISORY_LOCK_KEY = "account_daily_snapshots"
+
+_SNAPSHOT_SQL = """
+    WITH task_stats AS (
+        SELECT
+            account_id,
+            COUNT(*) FILTER (WHERE status IN ('todo', 'in-progress')) AS open_tasks,
+            COUNT(*) FILTER (WHERE status IN ('todo', 'in-progress') AND due_date < :now) AS overdue_tasks
+        FROM tasks
+        WHERE account_id IS NOT NULL
+        GROUP BY account_id
+    ),
+    activity_stats AS (
+        SELECT account_id, COUNT(*) AS activities_30d
+        FROM activities
+        WHERE created_at >= :activity_since
+        GROUP BY account_id
+    ),
+    current_values AS (
+        SELECT
+            a.id AS account_id,
+            a.health_score,
+            a.status,
+            a.mrr,
+            COALESCE(t.open_tasks, 0) AS open_tasks,
+            COALESCE(t.overdue_tasks, 0) AS overdue_tasks,
+            COALESCE(act.activities_30d, 0) AS activities_30d
+        FROM accounts a
+        LEFT JOIN task_stats t ON t.account_id = a.id
+        LEFT JOIN activity_stats act ON act.account_id = a.id
+    ),
+    previous AS (
+        SELECT DISTINCT ON (account_id)
+            account_id, health_score, status, mrr, open_tasks, overdue_tasks, activities_30d
+        FROM account_daily_snapshots
+        WHERE snapshot_date <= :snapshot_date
+        ORDER BY account_id, snapshot_date DESC
+    )
+    INSERT INTO account_daily_snapshots (
+        account_id, snapshot_date, health_score, status, mrr,
+        open_tasks, overdue_tasks, activities_30d
+    )
+    SELECT
+        c.account_id, CAST(:snapshot_date AS date), c.health_score, c.status, c.mrr,
+        c.open_tasks, c.overdue_tasks, c.activities_30d
+    FROM current_values c
+    LEFT JOIN previous p ON p.account_id = c.account_id
+    WHERE p.account_id IS NULL
+       OR (c.health_score, c.status, c.mrr, c.open_tasks, c.overdue_tasks, c.activities_30d)
+          IS DISTINCT FROM
+          (p.health_score, p.status, p.mrr, p.open_tasks, p.overdue_tasks, p.activities_30d)
+    ON CONFLICT (account_id, snapshot_date) DO UPDATE SET
+        health_score = EXCLUDED.health_score,
+        status = EXCLUDED.status,
+        mrr = EXCLUDED.mrr,
+        open_tasks = EXCLUDED.open_tasks,
+        overdue_tasks = EXCLUDED.overdue_tasks,
+        activities_30d = EXCLUDED.activities_30d,
+        created_at = NOW()
+"""
+
+
+# Valores vigentes em cada dia da janela: os snapshots até o fim da janela
+# viram intervalos [valid_from, valid_until) e só os dias pedidos são gerados
+_FILLED_WINDOW_SQL = """
+    WITH ranges AS (
+        SELECT
+            s.*,
+            LEAD(s.snapshot_date) OVER (PARTITION BY s.account_id ORDER BY s.snapshot_date) AS valid_until
+        FROM account_daily_snapshots s
+        WHERE s.snapshot_date <= :end {account_filter}
+    )
+    SELECT
+        r.account_id,
+        d.day::date AS snapshot_date,
+        r.health_score,
+        r.status,
+        r.mrr,
+        r.open_tasks,
+        r.overdue_tasks,
+        r.activities_30d
+    FROM generate_series(
+        CAST(:start AS date),
+        LEAST(CAST(:end AS date), CURRENT_DATE),
+        INTERVAL '1 day'
+    ) AS d(day)
+    JOIN ranges r
+      ON r.snapshot_date <= d.day::date
+     AND (r.valid_until IS NULL OR r.valid_until > d.day::date)
+"""
+
+
+class DailySnapshotService:
+    """Service para gravar e consultar snapshots diários de accounts"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def run(self, snapshot_date: Optional[date] = None) -> Optional[int]:
+        """
+        Grava o snapshot do dia para as accounts que mudaram desde o último
+
+        Idempotente: rodar de novo no mesmo dia atualiza apenas o que mudou.
+        Só existe o snapshot de hoje: os valores gravados são os atuais, então
+        outra data (backfill) não é suportada.
+
+        Returns:
+            Número de linhas gravadas, ou None se outro worker está executando
+
+        Raises:
+            ValueError: snapshot_date diferente de hoje (UTC)
+        """
+        now = datetime.now(timezone.utc)
+        if snapshot_date is not None and snapshot_date != now.date():
+            raise ValueError(
+                f"Snapshots só podem ser gravados para hoje ({now.date().isoformat()}); "
+                f"backfill de {snapshot_date.isoformat()} não é suportado"
+            )
+        snapshot_date = now.date()
+
+        locked = self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"),
+            {"key": _ADVISORY_LOCK_KEY}
+        ).scalar()
+        if not locked:
+            self.db.rollback()
+            return None
+
+        result = self.db.execute(text(_SNAPSHOT_SQL), {
+            "now": now,
+            "activity_since": now - timedelta(days=30),
+            "snapshot_date": snapshot_date,
+        })
+        self.db.commit()
+        return result.rowcount
+
+    def get_portfolio_history(self, start: date, end: date) -> List[Dict]:
+        """Evolução diária do portfólio (valores carregados entre mudanças)"""
+        rows = self.db.execute(text(f"""
+            WITH filtered AS ({_FILLED_WINDOW_SQL.format(account_filter="")}),
+            totals AS (
+                SELECT
+                    snapshot_date,
+                    COUNT(*) AS accounts,
+                    ROUND(AVG(health_score) FILTER (WHERE health_score > 0), 1) AS avg_health_score,
+                    COALESCE(SUM(mrr), 0) AS total_mrr,
+                    COALESCE(SUM(open_tasks), 0) AS open_tasks,
+                    COALESCE(SUM(overdue_tasks), 0) AS overdue_tasks,
+                    COALESCE(SUM(activities_30d), 0) AS activities_30d
+                FROM filtered
+                GROUP BY snapshot_date
+            ),
+            status_counts AS (
+                SELECT snapshot_date, JSON_OBJECT_AGG(status, accounts) AS by_status
+                FROM (
+                    SELECT snapshot_date, COALESCE(status, 'unknown') AS status, COUNT(*) AS accounts
+                    FROM filtered
+                    GROUP BY snapshot_date, COALESCE(status, 'unknown')
+                ) s
+                GROUP BY snapshot_date
+            )
+            SELECT
+                t.snapshot_date, t.accounts, t.avg_health_score, t.total_mrr,
+                t.open_tasks, t.overdue_tasks, t.activities_30d, sc.by_status
+            FROM totals t
+            JOIN status_counts sc ON sc.snapshot_date = t.snapshot_date
+            ORDER BY t.snapshot_date
+        """), {"start": start, "end": end}).fetchall()
+
+        return [
+            {
+                "date": row[0].isoformat(),
+                "accounts": row[1],
+                "avg_health_score": float(row[2]) if row[2] is not None else None,
+                "total_mrr": float(row[3]),
+                "open_tasks": row[4],
+                "overdue_tasks": row[5],
+                "activities_30d": row[6],
+                "by_status": row[7] or {},
+            }
+            for row in rows
+        ]
+
+    def get_account_history(self, account_id: str, start: date, end: date) -> List[Dict]:
+        """Evolução diária de uma account"""
+        rows = self.db.execute(text(f"""
+            SELECT snapshot_date, health_score, status, mrr, open_tasks, overdue_tasks, activities_30d
+            FROM ({_FILLED_WINDOW_SQL.format(account_filter="AND s.account_id = :account_id")}) filled
+            ORDER BY snapshot_date
+        """), {"account_id": account_id, "start": start, "end": end}).fetchall()
+
+        return [
+            {
+                "date": row[0].isoformat(),
+                "health_score": row[1],
+                "status": row[2],
+                "mrr": float(row[3]) if row[3] is not None else 0.0,
+                "open_tasks": row[4],
+                "overdue_tasks": row[5],
+                "activities_30d": row[6],
+            }
+            for row in rows
+        ]
+
+
+class DailySnapshotJob:
+    """
+    Execução periódica do snapshot no event loop do worker
+
+    Roda algumas vezes por dia; como o job é incremental e protegido por
+    advisory lock, execuções extras (ou vários workers) são baratas.
+    """
+
+    def __init__(self, interval_hours: float = 6):
+        self.interval = interval_hours * 3600
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self) -> Optional[int]:
+        db = SessionLocal()
+        try:
+            written = DailySnapshotService(db).run()
+            if written is not None:
+                logger.info(f"Snapshots diários gravados: {written} account(s)")
+            return written
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao gravar snapshots diários: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+    async def _loop(self):
+        while True:
+            await asyncio.to_thread(self.run_once)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Inicia a execução periódica no event loop atual"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Instância global (uma por worker)
+daily_snapshot_job = DailySnapshotJob(interval_hours=settings.SNAPSHOT_JOB_INTERVAL_HOURS)
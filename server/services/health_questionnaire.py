@@ -0,0 +1,310 @@
+"""
+Health Score Questionnaire
+Definição configurável do questionário (pilares, pesos, faixas) por tenant,
+compilada em um plano de cálculo (vetores de peso + mapas de índice)
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import Account, HealthScoreEvaluation
+from services.tenant_settings import TenantSettings, tenant_settings_cache
+
+logger = logging.getLogger(__name__)
+
+# Chave em tenant.settings
+SETTINGS_KEY = "healthScore"
+
+# Questionário padrão (mesmos pesos de HealthScoreSettings.tsx)
+DEFAULT_QUESTIONNAIRE = {
+    "questions": [
+        {"id": "1", "pillar": "Adoção e Engajamento", "weight": 10},
+        {"id": "2", "pillar": "Adoção e Engajamento", "weight": 15},
+        {"id": "3", "pillar": "Percepção de Valor", "weight": 15},
+        {"id": "4", "pillar": "Percepção de Valor", "weight": 15},
+        {"id": "5", "pillar": "Relacionamento e Satisfação", "weight": 10},
+        {"id": "6", "pillar": "Relacionamento e Satisfação", "weight": 10},
+        {"id": "7", "pillar": "Saúde Operacional", "weight": 8},
+        {"id": "8", "pillar": "Saúde Operacional", "weight": 7},
+        {"id": "9", "pillar": "Potencial de Crescimento", "weight": 5},
+        {"id": "10", "pillar": "Potencial de Crescimento", "weight": 5},
+    ],
+    "thresholds": {
+        "champion": 90,
+        "healthy": 70,
+        "attention": 50,
+        "at-risk": 30,
+    },
+}
+
+# Classificação abaixo de todas as faixas
+FALLBACK_CLASSIFICATION = "critical"
+
+
+class ScoringPlan:
+    """
+    Questionário compilado
+
+    - index: question_id -> coluna
+    - weights: vetor de pesos (q,)
+    - pillar_weights: matriz pilares x perguntas com os pesos de cada pilar
+    """
+
+    def __init__(self, definition: Dict):
+        questions = definition.get("questions") or []
+        if not questions:
+            raise ValueError("Questionário sem perguntas")
+
+        self.question_ids: List[str] = []
+        weights = []
+        pillars: List[str] = []
+        question_pillars = []
+        for question in questions:
+            question_id = str(question["id"])
+            if question_id in self.question_ids:
+                raise ValueError(f"Pergunta duplicada: {question_id}")
+            weight = float(question.get("weight", 1))
+            if weight < 0:
+                raise ValueError(f"Peso negativo na pergunta {question_id}")
+            pillar = question.get("pillar")
+            if pillar and pillar not in pillars:
+                pillars.append(pillar)
+            self.question_ids.append(question_id)
+            weights.append(weight)
+            question_pillars.append(pillar)
+
+        self.question_pillars: List[Optional[str]] = question_pillars
+        self.index: Dict[str, int] = {qid: i for i, qid in enumerate(self.question_ids)}
+        self.weights = np.array(weights, dtype=np.float64)
+        self.pillars = pillars
+        self.pillar_weights = np.zeros((len(pillars), len(self.question_ids)), dtype=np.float64)
+        for column, pillar in enumerate(question_pillars):
+            if pillar:
+                self.pillar_weights[pillars.index(pillar), column] = self.weights[column]
+
+        # Faixas em ordem decrescente de nota mínima
+        thresholds = definition.get("thresholds") or DEFAULT_QUESTIONNAIRE["thresholds"]
+        self.thresholds: List[Tuple[str, float]] = sorted(
+            ((name, float(minimum)) for name, minimum in thresholds.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+    def vectorize(self, responses: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """Converte respostas {question_id: score} em (valores, máscara de respondidas)"""
+        values = np.zeros(len(self.question_ids), dtype=np.float64)
+        answered = np.zeros(len(self.question_ids), dtype=np.float64)
+        for question_id, score in (responses or {}).items():
+            column = self.index.get(str(question_id))
+            if column is not None and score is not None:
+                values[column] = float(score)
+                answered[column] = 1.0
+        return values, answered
+
+    def score(self, responses: Dict) -> Tuple[int, Dict[str, int], str]:
+        """
+        Calcula (total_score, pilar_scores, classification) de uma avaliação
+
+        Média ponderada apenas sobre as perguntas respondidas.
+        """
+        values, answered = self.vectorize(responses)
+        totals, pillars = self._score_matrix(values[None, :], answered[None, :])
+        total_score = int(totals[0])
+        pilar_scores = {
+            pillar: int(pillars[0, i])
+            for i, pillar in enumerate(self.pillars)
+            if pillars[0, i] >= 0
+        }
+        return total_score, pilar_scores, self.classify(total_score)
+
+    def score_many(self, responses_list: List[Dict]) -> List[Tuple[int, Dict[str, int], str]]:
+        """Calcula várias avaliações de uma vez (multiplicação de matrizes)"""
+        if not responses_list:
+            return []
+
+        values = np.zeros((len(responses_list), len(self.question_ids)), dtype=np.float64)
+        answered = np.zeros_like(values)
+        for row, responses in enumerate(responses_list):
+            values[row], answered[row] = self.vectorize(responses)
+
+        totals, pillars = self._score_matrix(values, answered)
+        results = []
+        for row in range(len(responses_list)):
+            total_score = int(totals[row])
+            pilar_scores = {
+                pillar: int(pillars[row, i])
+                for i, pillar in enumerate(self.pillars)
+                if pillars[row, i] >= 0
+            }
+            results.append((total_score, pilar_scores, self.classify(total_score)))
+        return results
+
+    def classify(self, total_score: float) -> str:
+        for name, minimum in self.thresholds:
+            if total_score >= minimum:
+                return name
+        return FALLBACK_CLASSIFICATION
+
+    def _score_matrix(self, values: np.ndarray, answered: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        values/answered: matrizes (n, q)
+
+        Returns:
+            totals (n,) arredondados e pilares (n, p) arredondados; -1 = pilar sem respostas
+        """
+        answered_values = values * answered
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            total_weight = answered @ self.weights
+            totals = np.where(total_weight > 0, (answered_values @ self.weights) / total_weight, 0.0)
+
+            pillar_weight = answered @ self.pillar_weights.T
+            pillars = np.where(
+                pillar_weight > 0,
+                (answered_values @ self.pillar_weights.T) / pillar_weight,
+                -1.0,
+            )
+
+        return np.round(totals), np.where(pillars >= 0, np.round(pillars), -1.0)
+
+    def to_dict(self) -> Dict:
+        return {
+            "questions": [
+                {
+                    "id": question_id,
+                    "pillar": self.question_pillars[column],
+                    "weight": float(self.weights[column]),
+                }
+                for column, question_id in enumerate(self.question_ids)
+            ],
+            "thresholds": {name: minimum for name, minimum in self.thresholds},
+        }
+
+
+def _fingerprint(definition: Dict) -> str:
+    return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ScoringPlanCache:
+    """
+    Cache do plano compilado (um por worker)
+
+    A definição vem de tenant_settings_cache e o plano fica associado à
+    entrada de settings de onde foi compilado: quando essa entrada é
+    invalidada (atualização do tenant ou NOTIFY de outro worker), a próxima
+    leitura recompila se a definição mudou.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plan: Optional[ScoringPlan] = None
+        self._fingerprint: Optional[str] = None
+        self._source: Optional[TenantSettings] = None
+
+    def get(self, db: Session) -> ScoringPlan:
+        tenant = tenant_settings_cache.get(db)
+        with self._lock:
+            if self._plan is not None and tenant is self._source:
+                return self._plan
+
+        definition = definition_from_settings(tenant.settings if tenant else None)
+        fingerprint = _fingerprint(definition)
+
+        with self._lock:
+            if self._plan is None or fingerprint != self._fingerprint:
+                self._plan = compile_plan(definition)
+                self._fingerprint = fingerprint
+                logger.info("Plano de health score compilado")
+            self._source = tenant
+            return self._plan
+
+    def invalidate(self):
+        with self._lock:
+            self._plan = None
+            self._fingerprint = None
+            self._source = None
+
+
+def definition_from_settings(tenant_settings: Optional[Dict]) -> Dict:
+    """Definição do questionário salva nas settings do tenant (ou a padrão)"""
+    definition = (tenant_settings or {}).get(SETTINGS_KEY)
+    if not definition or not definition.get("questions"):
+        return DEFAULT_QUESTIONNAIRE
+    return definition
+
+
+def load_definition(db: Session) -> Dict:
+    """Definição do questionário do tenant padrão (via tenant_settings_cache)"""
+    tenant = tenant_settings_cache.get(db)
+    return definition_from_settings(tenant.settings if tenant else None)
+
+
+def compile_plan(definition: Dict) -> ScoringPlan:
+    """
+    Compila e valida uma definição de questionário
+
+    Raises:
+        ValueError: definição inválida (inclusive tipos errados)
+    """
+    if not isinstance(definition, dict):
+        raise ValueError("Questionário inválido: esperado um objeto com questions e thresholds")
+    questions = definition.get("questions")
+    if questions is not None and not (
+        isinstance(questions, list) and all(isinstance(question, dict) for question in questions)
+    ):
+        raise ValueError("Questionário inválido: questions deve ser uma lista de objetos")
+    thresholds = definition.get("thresholds")
+    if thresholds is not None and not isinstance(thresholds, dict):
+        raise ValueError("Questionário inválido: thresholds deve ser um objeto")
+    try:
+        return ScoringPlan(definition)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Questionário inválido: {e}")
+
+
+def recalculate_evaluations(db: Session, plan: ScoringPlan) -> int:
+    """
+    Recalcula todas as avaliações com o plano atual (em lote) e atualiza
+    o health_score das accounts com a avaliação mais recente
+
+    Returns:
+        Número de avaliações recalculadas
+    """
+    evaluations = db.query(HealthScoreEvaluation).order_by(
+        HealthScoreEvaluation.account_id,
+        HealthScoreEvaluation.evaluation_date,
+        HealthScoreEvaluation.created_at,
+    ).all()
+    if not evaluations:
+        return 0
+
+    results = plan.score_many([evaluation.responses for evaluation in evaluations])
+
+    latest: Dict[str, Dict] = {}
+    for evaluation, (total_score, pilar_scores, classification) in zip(evaluations, results):
+        evaluation.total_score = total_score
+        evaluation.pilar_scores = pilar_scores
+        evaluation.classification = classification
+        # Ordenado por data: a última atribuição é a mais recente
+        latest[evaluation.account_id] = {
+            "id": evaluation.account_id,
+            "health_score": total_score,
+            "latest_evaluation_id": evaluation.id,
+            "latest_classification": classification,
+            "latest_pilar_scores": pilar_scores,
+        }
+
+    if latest:
+        db.bulk_update_mappings(Account, list(latest.values()))
+
+    db.commit()
+    return len(evaluations)
+
+
+# Instância global (uma por worker)
+scoring_plan_cache = ScoringPlanCache()
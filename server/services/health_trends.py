@@ -0,0 +1,190 @@
+"""
+Health Trend Service
+Tendência do health score (slope, deltas, volatilidade e série reduzida)
+calculada em uma única query sobre health_score_evaluations
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Variação mínima (pontos por 30 dias) para considerar melhora/piora
+TREND_THRESHOLD = 2.0
+
+# Pontos da série reduzida por account
+SERIES_POINTS = 12
+
+_TRENDS_SQL = """
+    WITH evals AS (
+        SELECT
+            account_id,
+            total_score,
+            evaluation_date,
+            EXTRACT(EPOCH FROM evaluation_date) / 86400.0 AS day,
+            ROW_NUMBER() OVER (
+                PARTITION BY account_id ORDER BY evaluation_date DESC, created_at DESC
+            ) AS recency,
+            total_score - LAG(total_score) OVER (
+                PARTITION BY account_id ORDER BY evaluation_date, created_at
+            ) AS change,
+            NTILE(:points) OVER (
+                PARTITION BY account_id ORDER BY evaluation_date, created_at
+            ) AS bucket
+        FROM health_score_evaluations
+        WHERE evaluation_date IS NOT NULL
+          AND (CAST(:account_ids AS text[]) IS NULL OR account_id = ANY(CAST(:account_ids AS text[])))
+    ),
+    stats AS (
+        SELECT
+            account_id,
+            COUNT(*) AS evaluations,
+            MAX(total_score) FILTER (WHERE recency = 1) AS current_score,
+            MAX(evaluation_date) AS last_evaluation,
+            (ARRAY_AGG(total_score ORDER BY evaluation_date DESC)
+                FILTER (WHERE evaluation_date <= NOW() - INTERVAL '30 days'))[1] AS score_30d_ago,
+            (ARRAY_AGG(total_score ORDER BY evaluation_date DESC)
+                FILTER (WHERE evaluation_date <= NOW() - INTERVAL '90 days'))[1] AS score_90d_ago,
+            REGR_SLOPE(total_score, day)
+                FILTER (WHERE evaluation_date >= NOW() - INTERVAL '90 days') AS slope_90d,
+            REGR_SLOPE(total_score, day) AS slope_all,
+            STDDEV_POP(change) AS volatility
+        FROM evals
+        GROUP BY account_id
+    ),
+    buckets AS (
+        SELECT
+            account_id,
+            bucket,
+            MAX(evaluation_date) AS bucket_date,
+            ROUND(AVG(total_score)) AS bucket_score
+        FROM evals
+        GROUP BY account_id, bucket
+    ),
+    series AS (
+        SELECT
+            account_id,
+            JSON_AGG(
+                JSON_BUILD_OBJECT('date', bucket_date, 'score', bucket_score)
+                ORDER BY bucket
+            ) AS series
+        FROM buckets
+        GROUP BY account_id
+    )
+    SELECT
+        s.account_id,
+        s.evaluations,
+        s.current_score,
+        s.last_evaluation,
+        s.score_30d_ago,
+        s.score_90d_ago,
+        COALESCE(s.slope_90d, s.slope_all) AS slope_per_day,
+        s.volatility,
+        sr.series
+    FROM stats s
+    JOIN series sr ON sr.account_id = s.account_id
+"""
+
+
+class HealthTrendService:
+    """Service para cálculo de tendências de health score"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_trends(
+        self,
+        account_ids: Optional[Iterable[str]] = None,
+        points: int = SERIES_POINTS
+    ) -> Dict[str, Dict]:
+        """
+        Calcula tendências de todas as accounts (ou das informadas) em uma query
+
+        Returns:
+            Dict {account_id: trend}; accounts sem avaliações não aparecem
+        """
+        ids = list(account_ids) if account_ids is not None else None
+        if ids is not None and not ids:
+            return {}
+
+        rows = self.db.execute(text(_TRENDS_SQL), {
+            "account_ids": ids,
+            "points": max(points, 1),
+        }).fetchall()
+
+        return {row[0]: self._row_to_trend(row) for row in rows}
+
+    def get_account_trend(self, account_id: str, points: int = SERIES_POINTS) -> Dict:
+        """Tendência de uma account (vazia se não houver avaliações)"""
+        trend = self.get_trends([account_id], points).get(account_id)
+        return trend or self.empty_trend(account_id)
+
+    def get_portfolio_trends(self, points: int = SERIES_POINTS) -> Dict:
+        """Tendências de todo o portfólio com resumo para o dashboard"""
+        trends = list(self.get_trends(points=points).values())
+
+        summary = {
+            "improving": 0,
+            "stable": 0,
+            "declining": 0,
+            "accounts": len(trends),
+            "avg_delta_30d": None,
+        }
+        deltas = []
+        for trend in trends:
+            summary[trend["direction"]] += 1
+            if trend["delta_30d"] is not None:
+                deltas.append(trend["delta_30d"])
+        if deltas:
+            summary["avg_delta_30d"] = round(sum(deltas) / len(deltas), 1)
+
+        # Maiores quedas primeiro
+        trends.sort(key=lambda t: (t["slope_30d"] if t["slope_30d"] is not None else 0.0))
+        return {"summary": summary, "accounts": trends}
+
+    @staticmethod
+    def empty_trend(account_id: str) -> Dict:
+        return {
+            "account_id": account_id,
+            "direction": "stable",
+            "evaluations": 0,
+            "current_score": None,
+            "last_evaluation": None,
+            "slope_30d": None,
+            "delta_30d": None,
+            "delta_90d": None,
+            "volatility": None,
+            "series": [],
+        }
+
+    @staticmethod
+    def classify(slope_30d: Optional[float]) -> str:
+        """Classifica a direção pela inclinação (pontos a cada 30 dias)"""
+        if slope_30d is None:
+            return "stable"
+        if slope_30d >= TREND_THRESHOLD:
+            return "improving"
+        if slope_30d <= -TREND_THRESHOLD:
+            return "declining"
+        return "stable"
+
+    def _row_to_trend(self, row) -> Dict:
+        (account_id, evaluations, current_score, last_evaluation,
+         score_30d_ago, score_90d_ago, slope_per_day, volatility, series) = row
+
+        slope_30d = round(float(slope_per_day) * 30, 2) if slope_per_day is not None else None
+
+        return {
+            "account_id": account_id,
+            "direction": self.classify(slope_30d),
+            "evaluations": evaluations,
+            "current_score": current_score,
+            "last_evaluation": last_evaluation.isoformat() if last_evaluation else None,
+            "slope_30d": slope_30d,
+            "delta_30d": current_score - score_30d_ago if score_30d_ago is not None else None,
+            "delta_90d": current_score - score_90d_ago if score_90d_ago is not None else None,
+            "volatility": round(float(volatility), 2) if volatility is not None else None,
+            "series": [
+                {"date": point["date"], "score": int(point["score"])}
+                for point in (series or [])
+            ],
+        }
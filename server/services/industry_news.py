@@ -0,0 +1,124 @@
+"""
+Industry News Cache
+Notícias de setor buscadas uma vez por (setor, dia) em industry_news e
+reaproveitadas por todas as accounts do setor
+"""
+import asyncio
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Dias de histórico mantidos na tabela
+_KEEP_DAYS = 7
+
+
+def industry_key(industry: str) -> str:
+    """Nome do setor normalizado ("Tecnologia ", "tecnologia" -> mesma chave)"""
+    return " ".join(industry.lower().split())
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class IndustryNewsCache:
+    """
+    Cache de notícias de setor (uma instância por worker)
+
+    A busca concorrente do mesmo setor no mesmo worker (refresh em lote)
+    espera a primeira em vez de chamar o provedor de novo; entre workers a
+    tabela resolve (no pior caso, uma busca duplicada no dia).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, date], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, industry: str, day: Optional[date] = None) -> Optional[List[Dict]]:
+        """Notícias gravadas do setor no dia (None se ainda não buscadas)"""
+        row = db.execute(text("""
+            SELECT news_items FROM industry_news
+            WHERE industry_key = :industry_key AND news_date = :news_date
+        """), {"industry_key": industry_key(industry), "news_date": day or _today()}).first()
+        return row[0] if row else None
+
+    def save(self, db: Session, industry: str, news_items: List[Dict], day: Optional[date] = None):
+        day = day or _today()
+        db.execute(text("""
+            INSERT INTO industry_news (industry_key, news_date, industry, news_items)
+            VALUES (:industry_key, :news_date, :industry, CAST(:news_items AS json))
+            ON CONFLICT (industry_key, news_date) DO UPDATE SET
+                news_items = EXCLUDED.news_items,
+                created_at = NOW()
+        """), {
+            "industry_key": industry_key(industry),
+            "news_date": day,
+            "industry": industry,
+            "news_items": json.dumps(news_items, ensure_ascii=False, default=str),
+        })
+        db.execute(text("DELETE FROM industry_news WHERE news_date < :before"), {
+            "before": day - timedelta(days=_KEEP_DAYS),
+        })
+        db.commit()
+
+    async def get_or_fetch(
+        self,
+        db: Session,
+        industry: str,
+        fetch: Callable[[], Awaitable[List[Dict]]]
+    ) -> List[Dict]:
+        """
+        Notícias do setor no dia: da tabela, de uma busca em andamento ou de
+        fetch() (gravada para as próximas accounts)
+
+        Retorna cópias: quem chama pode alterar os itens.
+        """
+        key = (industry_key(industry), _today())
+        news_items = self.get(db, industry, key[1])
+        # Não segura a transação de leitura durante a chamada ao provedor
+        db.commit()
+        if news_items is not None:
+            self.hits += 1
+            return [dict(item) for item in news_items]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return [dict(item) for item in await asyncio.shield(pending)]
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            news_items = await fetch()
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError("Industry news search cancelled"))
+            # Sem ninguém esperando, evita o aviso "exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(news_items)
+        finally:
+            self._inflight.pop(key, None)
+
+        try:
+            self.save(db, industry, news_items, key[1])
+            logger.info(f"Industry news for {industry}: {len(news_items)} item(s) cached for {key[1]}")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error caching industry news for {industry}: {str(e)}")
+        return [dict(item) for item in news_items]
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses, "inflight": len(self._inflight)}
+
+
+# Instância global (uma por worker)
+industry_news_cache = IndustryNewsCache()
@@ -0,0 +1,272 @@
+"""
+LLM Clients
+Clientes AsyncOpenAI compartilhados (um por chave + base_url, com keep-alive),
+com timeout por chamada, retentativas com backoff exponencial + jitter em
+429/5xx e limite de concorrência global e por provedor
+"""
+import asyncio
+import logging
+import random
+import threading
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+import openai
+from openai import AsyncOpenAI
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PERPLEXITY_BASE_URL = "https://api.perplexity.ai"
+
+# Limite de clientes em cache (chaves de tenants diferentes)
+_MAX_CLIENTS = 32
+
+# on_response(headers, rate_limited) de uma chamada
+ResponseCallback = Callable[[Mapping[str, str], bool], None]
+
+
+def provider_name(base_url: Optional[str]) -> str:
+    """Nome do provedor a partir da base_url (semáforo e logs)"""
+    if not base_url:
+        return "openai"
+    host = urlparse(base_url).hostname or base_url
+    if host.endswith("perplexity.ai"):
+        return "perplexity"
+    return host
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, openai.APIConnectionError):  # inclui timeout
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Retry-After (segundos) enviado pelo provedor, se houver"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClientManager:
+    """
+    Pool de clientes de LLM (um por worker)
+
+    As retentativas são feitas aqui (o cliente do SDK roda com
+    max_retries=0) para que a espera não ocupe uma vaga do semáforo.
+    Os semáforos são criados no primeiro uso, dentro do event loop.
+
+    backend="fake" troca o AsyncOpenAI pelo FakeLLMBackend (mesma
+    interface): retentativas e semáforos continuam valendo, então os
+    benchmarks medem o mesmo caminho de produção.
+    """
+
+    def __init__(
+        self,
+        backend: str = "openai",
+        max_concurrency: int = 8,
+        provider_concurrency: int = 4,
+        timeout: float = 60,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 20.0,
+        fake_options: Optional[Dict] = None,
+    ):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.provider_concurrency = provider_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, Optional[str]], AsyncOpenAI] = {}
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.fake = None
+        if backend == "fake":
+            from services.llm_fake import FakeLLMBackend
+            self.fake = FakeLLMBackend(**(fake_options or {}))
+            logger.warning("LLM_BACKEND=fake: respostas de IA simuladas")
+
+    @property
+    def default_api_key(self) -> Optional[str]:
+        """Chave usada quando o tenant não configurou uma (só no backend fake)"""
+        return "fake" if self.fake is not None else None
+
+    def client(self, api_key: str, base_url: Optional[str] = None) -> AsyncOpenAI:
+        """Cliente compartilhado para (chave, base_url)"""
+        if self.fake is not None:
+            return self.fake
+        key = (api_key, base_url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if len(self._clients) >= _MAX_CLIENTS:
+                    # Chave antiga (ex.: trocada nas settings); o cliente é fechado pelo GC
+                    self._clients.pop(next(iter(self._clients)))
+                kwargs = {"api_key": api_key, "timeout": self.timeout, "max_retries": 0}
+                if base_url:
+                    kwargs["base_url"] = base_url
+                client = AsyncOpenAI(**kwargs)
+                self._clients[key] = client
+            return client
+
+    @staticmethod
+    def _notify(on_response: Optional[ResponseCallback], headers: Optional[Mapping[str, str]], rate_limited: bool):
+        if on_response is None:
+            return
+        try:
+            on_response(headers or {}, rate_limited)
+        except Exception as e:
+            logger.warning(f"Erro no callback de rate limit: {e}")
+
+    async def _create(self, client, on_response: Optional[ResponseCallback], **params):
+        completions = client.chat.completions
+        if on_response is None or not hasattr(completions, "with_raw_response"):
+            return await completions.create(**params)
+        raw = await completions.with_raw_response.create(**params)
+        self._notify(on_response, raw.headers, False)
+        return raw.parse()
+
+    @asynccontextmanager
+    async def _slot(self, provider: str):
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._provider_semaphores.get(provider)
+        if semaphore is None:
+            semaphore = self._provider_semaphores[provider] = asyncio.Semaphore(self.provider_concurrency)
+        async with self._global_semaphore, semaphore:
+            yield
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        # Full jitter: evita que chamadas limitadas juntas voltem juntas
+        delay = random.uniform(0, delay)
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    async def chat(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        on_response: Optional[ResponseCallback] = None,
+        **params
+    ):
+        """
+        chat.completions.create com limite de concorrência e retentativas
+
+        on_response(headers, rate_limited) recebe os cabeçalhos de cada
+        resposta desta chamada (x-ratelimit-*) e de cada 429 (ex.: o
+        AdaptiveRateLimiter de um lote), sem ver o tráfego de outras chamadas.
+
+        Raises:
+            openai.APIError: erro não recuperável ou retentativas esgotadas
+        """
+        client = self.client(api_key, base_url)
+        provider = provider_name(base_url)
+        attempt = 0
+        while True:
+            try:
+                async with self._slot(provider):
+                    return await self._create(client, on_response, timeout=timeout or self.timeout, **params)
+            except Exception as e:
+                if isinstance(e, openai.RateLimitError):
+                    self._notify(on_response, e.response.headers, True)
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                logger.warning(
+                    f"Erro recuperável em {provider} ({type(e).__name__}); "
+                    f"tentativa {attempt}/{self.max_retries} em {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def stream_chat(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        on_response: Optional[ResponseCallback] = None,
+        **params
+    ) -> AsyncIterator:
+        """
+        Variante em streaming de chat: retenta só a abertura do stream (a
+        vaga do semáforo é tomada a cada tentativa e, com o stream aberto,
+        mantida até o fim ou o fechamento do gerador)
+        """
+        client = self.client(api_key, base_url)
+        provider = provider_name(base_url)
+        attempt = 0
+        while True:
+            async with AsyncExitStack() as stack:
+                await stack.enter_async_context(self._slot(provider))
+                try:
+                    stream = await client.chat.completions.create(
+                        stream=True, timeout=timeout or self.timeout, **params
+                    )
+                except Exception as e:
+                    error = e
+                else:
+                    # Stream aberto: a vaga passa para a iteração abaixo
+                    slot = stack.pop_all()
+                    break
+            # Vaga já liberada: a espera não ocupa o semáforo (como em chat)
+            if isinstance(error, openai.RateLimitError):
+                self._notify(on_response, error.response.headers, True)
+            if attempt >= self.max_retries or not _is_retryable(error):
+                raise error
+            delay = self._backoff(attempt, error)
+            attempt += 1
+            logger.warning(
+                f"Erro recuperável em {provider} ({type(error).__name__}); "
+                f"tentativa {attempt}/{self.max_retries} em {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+        async with slot:
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.close()
+
+    async def aclose(self):
+        """Fecha as conexões dos clientes (shutdown)"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Erro ao fechar cliente de LLM: {e}")
+
+
+# Instância global (uma por worker)
+llm_clients = LLMClientManager(
+    backend=settings.LLM_BACKEND,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    provider_concurrency=settings.LLM_PROVIDER_CONCURRENCY,
+    timeout=settings.LLM_TIMEOUT_SECONDS,
+    max_retries=settings.LLM_MAX_RETRIES,
+    fake_options={
+        "latency": settings.LLM_FAKE_LATENCY_MS / 1000,
+        "tokens_per_second": settings.LLM_FAKE_TOKENS_PER_SECOND,
+        "error_rate": settings.LLM_FAKE_ERROR_RATE,
+        "seed": settings.LLM_FAKE_SEED,
+    },
+)
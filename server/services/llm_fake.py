@@ -0,0 +1,297 @@
+"""
+Fake LLM Backend
+Backend local e determinístico compatível com o cliente OpenAI
+(chat.completions.create, com e sem stream), para benchmarks e testes
+offline: respostas com o mesmo schema esperado pelos serviços, latência e
+velocidade de tokens configuráveis e injeção de erros 429/5xx
+"""
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import httpx
+import openai
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from services.analysis_prompt import count_tokens
+
+# Tamanho (em caracteres) de cada pedaço enviado no streaming
+_CHUNK_CHARS = 16
+
+
+def _prompt_text(messages: List[Dict]) -> str:
+    return "\n".join(str(message.get("content") or "") for message in messages)
+
+
+def _seed(model: str, messages: List[Dict]) -> int:
+    """Mesma requisição, mesma resposta"""
+    digest = hashlib.sha256((model + _prompt_text(messages)).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def _analysis(rng: random.Random) -> Dict:
+    score = rng.randint(10, 90)
+    level = "low" if score < 30 else "medium" if score < 60 else "high" if score < 80 else "critical"
+    return {
+        "summary": "Cliente com uso estável e relacionamento ativo. Há pontos de atenção em tarefas atrasadas "
+                   "e espaço para expansão na área de operações.",
+        "health_assessment": {
+            "overall_health": rng.choice(["healthy", "at_risk", "critical"]),
+            "key_strengths": ["Engajamento do champion", "Uso recorrente do produto"],
+            "key_concerns": ["Tarefas atrasadas", "Renovação próxima"],
+        },
+        "churn_risk": {
+            "score": score,
+            "level": level,
+            "primary_factors": [
+                {"factor": "Engajamento", "impact": "médio", "description": "Queda de interações no último mês"}
+            ],
+            "mitigationactions": [
+                {"action": "Agendar QBR", "priority": "high", "expected_impact": "Realinhar objetivos"}
+            ],
+        },
+        "expansion_opportunities": [
+            {
+                "type": "upsell",
+                "description": "Expandir licenças para o time de operações",
+                "estimated_value": rng.choice([1000, 2500, 5000]),
+                "confidence": rng.choice(["high", "medium", "low"]),
+                "next_steps": ["Mapear usuários", "Apresentar proposta"],
+            }
+        ],
+        "next_best_actions": [
+            {
+                "action": "Ligar para o champion",
+                "rationale": "Sem contato recente",
+                "timeline": "esta semana",
+                "expected_outcome": "Entender prioridades do trimestre",
+            }
+        ],
+        "strategic_insights": ["Uso concentrado em poucos usuários", "Renovação coincide com o fechamento fiscal"],
+    }
+
+
+def _news(rng: random.Random) -> Dict:
+    now = datetime.now(timezone.utc)
+    items = []
+    for i in range(rng.randint(3, 5)):
+        items.append({
+            "title": f"Notícia simulada {i + 1}",
+            "summary": "Resumo gerado pelo backend simulado para benchmarks.",
+            "content": "Conteúdo detalhado da notícia simulada.",
+            "news_type": rng.choice(["company", "industry", "market"]),
+            "category": rng.choice(["financeiro", "negocios", "tecnologia", "regulatorio", "pessoas", "outro"]),
+            "relevance_score": rng.randint(40, 95),
+            "published_date": (now - timedelta(days=rng.randint(0, 29))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "insights": "Pode indicar oportunidade de expansão.",
+        })
+    return {"news_items": items}
+
+
+_PLAYBOOK_HTML = (
+    "<h1>Playbook</h1><h2>Objetivo do Playbook</h2><p>Conteúdo simulado.</p>"
+    "<h2>Gatilhos de Entrada</h2><ul><li>Health score em queda</li><li>Renovação em 90 dias</li></ul>"
+    "<h2>Passo a Passo</h2><ol><li>Diagnóstico</li><li>Plano de ação</li><li>Acompanhamento</li></ol>"
+    "<h2>KPIs de Sucesso</h2><p>Retenção e NPS.</p>"
+)
+
+
+def render_response(model: str, messages: List[Dict], params: Dict) -> str:
+    """Resposta no formato que cada chamador espera (pelo conteúdo do prompt)"""
+    rng = random.Random(_seed(model, messages))
+    prompt = _prompt_text(messages)
+    lowered = prompt.lower()
+    if "news_items" in prompt:
+        return json.dumps(_news(rng), ensure_ascii=False)
+    if "churn_risk" in prompt:
+        return json.dumps(_analysis(rng), ensure_ascii=False)
+    if "crie um playbook" in lowered:
+        return _PLAYBOOK_HTML
+    if "positive, neutral ou negative" in lowered:
+        return rng.choice(["positive", "neutral", "negative"])
+    if (params.get("response_format") or {}).get("type") == "json_object":
+        return "{}"
+    return "Recomendo uma ligação de acompanhamento com prioridade high para revisar o plano de sucesso."
+
+
+class FakeLLMStats:
+    """
+    Contadores do backend simulado
+
+    simulated_seconds soma a latência de todas as chamadas; wall_seconds é
+    o tempo de relógio com pelo menos uma chamada em espera (união das
+    esperas sobrepostas), que é o que chamadas concorrentes custam de fato.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.simulated_seconds = 0.0
+        self.wall_seconds = 0.0
+        self._waiting = 0
+        self._waiting_since = 0.0
+
+    def record_call(self, error: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+
+    def add_time(self, seconds: float):
+        with self._lock:
+            self.simulated_seconds += seconds
+
+    def begin_wait(self):
+        with self._lock:
+            if self._waiting == 0:
+                self._waiting_since = time.perf_counter()
+            self._waiting += 1
+
+    def end_wait(self):
+        with self._lock:
+            self._waiting -= 1
+            if self._waiting == 0:
+                self.wall_seconds += time.perf_counter() - self._waiting_since
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            wall_seconds = self.wall_seconds
+            if self._waiting:
+                wall_seconds += time.perf_counter() - self._waiting_since
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "simulated_seconds": round(self.simulated_seconds, 4),
+                "wall_seconds": round(wall_seconds, 4),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.simulated_seconds = 0.0
+            self.wall_seconds = 0.0
+            if self._waiting:
+                self._waiting_since = time.perf_counter()
+
+
+class _FakeStream:
+    """Stream assíncrono de ChatCompletionChunk (mesma interface do SDK)"""
+
+    def __init__(self, backend: "FakeLLMBackend", model: str, content: str, usage: Dict, include_usage: bool):
+        self._backend = backend
+        self._model = model
+        self._content = content
+        self._usage = usage
+        self._include_usage = include_usage
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        await self._backend._sleep(self._backend.latency)  # tempo até o primeiro token
+        for start in range(0, len(self._content), _CHUNK_CHARS):
+            piece = self._content[start:start + _CHUNK_CHARS]
+            await self._backend._sleep(count_tokens(piece) / self._backend.tokens_per_second)
+            yield ChatCompletionChunk.model_validate({
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": self._model, "choices": [{"index": 0, "delta": {"content": piece}}],
+            })
+        if self._include_usage:
+            yield ChatCompletionChunk.model_validate({
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": self._model, "choices": [], "usage": self._usage,
+            })
+
+    async def close(self):
+        pass
+
+
+class _FakeCompletions:
+    def __init__(self, backend: "FakeLLMBackend"):
+        self._backend = backend
+
+    async def create(self, model: str, messages: List[Dict], stream: bool = False, **params):
+        return await self._backend.create(model, messages, stream, params)
+
+
+class _FakeChat:
+    def __init__(self, backend: "FakeLLMBackend"):
+        self.completions = _FakeCompletions(backend)
+
+
+class FakeLLMBackend:
+    """
+    Substituto do AsyncOpenAI (settings.LLM_BACKEND = "fake")
+
+    Latência de uma chamada = latency + tokens de saída / tokens_per_second.
+    error_rate é a fração de chamadas que falham (metade 429, metade 500),
+    sorteada por um gerador com semente fixa: a sequência se repete entre
+    execuções. O tempo simulado fica em `stats` para os benchmarks
+    descontarem o tempo de LLM do tempo total.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        tokens_per_second: float = 80,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.chat = _FakeChat(self)
+        self.stats = FakeLLMStats()
+        self._errors = random.Random(seed)
+
+    async def create(self, model: str, messages: List[Dict], stream: bool, params: Dict):
+        if self.error_rate and self._errors.random() < self.error_rate:
+            status = self._errors.choice([429, 500])
+            self.stats.record_call(error=True)
+            await self._sleep(min(self.latency, 0.05))
+            raise self._error(status)
+
+        content = render_response(model, messages, params)
+        prompt_tokens = count_tokens(_prompt_text(messages))
+        completion_tokens = count_tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        self.stats.record_call()
+
+        if stream:
+            include_usage = bool((params.get("stream_options") or {}).get("include_usage"))
+            return _FakeStream(self, model, content, usage, include_usage)
+
+        await self._sleep(self.latency + completion_tokens / self.tokens_per_second)
+        return ChatCompletion.model_validate({
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": usage,
+        })
+
+    async def _sleep(self, seconds: float):
+        self.stats.add_time(seconds)
+        self.stats.begin_wait()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.stats.end_wait()
+
+    @staticmethod
+    def _error(status: int) -> openai.APIStatusError:
+        response = httpx.Response(status, request=httpx.Request("POST", "http://fake-llm/v1/chat/completions"))
+        if status == 429:
+            return openai.RateLimitError("Simulated rate limit", response=response, body=None)
+        return openai.InternalServerError("Simulated server error", response=response, body=None)
+
+    async def close(self):
+        pass
@@ -0,0 +1,214 @@
+"""
+News Articles
+Notícias do Radar CS gravadas uma vez em articles (deduplicadas por URL
+canônica ou, sem URL, pelo título normalizado) e vinculadas às accounts
+em account_news, com relevância e insights por account
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from uuid import UUID, uuid4
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Parâmetros de rastreamento que não mudam o artigo
+_TRACKING_PARAMS = {"gclid", "fbclid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid"}
+
+_NON_WORD = re.compile(r"[^\w\s]")
+
+# Notícias mais antigas saem da account ao salvar uma nova busca
+NEWS_RETENTION_DAYS = 7
+
+
+def canonical_url(url: Optional[str]) -> Optional[str]:
+    """
+    URL sem esquema, www, fragmento, parâmetros de rastreamento e barra
+    final, com a query ordenada (None se não for uma URL http)
+    """
+    if not url or not isinstance(url, str):
+        return None
+    parts = urlsplit(url.strip())
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/")
+    return host + path + (f"?{urlencode(query)}" if query else "")
+
+
+def normalize_title(title: str) -> str:
+    """Minúsculas, sem acentos, pontuação e espaços repetidos"""
+    decomposed = unicodedata.normalize("NFKD", title or "")
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_NON_WORD.sub(" ", without_accents.lower()).split())
+
+
+def article_dedup_key(title: str, url: Optional[str] = None) -> str:
+    """sha256 da URL canônica, ou do título normalizado quando não há URL"""
+    canonical = canonical_url(url)
+    basis = f"url:{canonical}" if canonical else f"title:{normalize_title(title)}"
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+
+def _published_date(item: Dict) -> datetime:
+    return datetime.fromisoformat(item.get("published_date", datetime.utcnow().isoformat()).replace("Z", "+00:00"))
+
+
+class ArticleStore:
+    """Gravação e consultas de articles/account_news"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def save_account_news(self, account_id: str, news_items: List[Dict]) -> int:
+        """
+        Grava as notícias de uma busca da account: artigo novo é inserido,
+        artigo já conhecido só ganha (ou renova) o vínculo com a account
+
+        Returns:
+            Número de artigos vinculados
+        """
+        self._purge_old_links(account_id)
+
+        linked = set()
+        for item in news_items:
+            source_url = item.get("source_url")
+            dedup_key = article_dedup_key(item.get("title", ""), source_url)
+            article_id = self.db.execute(text("""
+                INSERT INTO articles (
+                    id, dedup_key, canonical_url, title, summary, content, news_type, category,
+                    source_type, source_name, source_url, published_date
+                )
+                VALUES (
+                    :id, :dedup_key, :canonical_url, :title, :summary, :content, :news_type, :category,
+                    :source_type, :source_name, :source_url, :published_date
+                )
+                ON CONFLICT (dedup_key) DO UPDATE SET updated_at = NOW()
+                RETURNING id
+            """), {
+                "id": str(uuid4()),
+                "dedup_key": dedup_key,
+                "canonical_url": canonical_url(source_url),
+                "title": item.get("title", ""),
+                "summary": item.get("summary", ""),
+                "content": item.get("content", ""),
+                "news_type": item.get("news_type", "market"),
+                "category": item.get("category", "outro"),
+                "source_type": item.get("source_type", "openai"),
+                "source_name": item.get("source_name"),
+                "source_url": source_url,
+                "published_date": _published_date(item),
+            }).scalar()
+            if article_id in linked:
+                # Mesmo artigo duas vezes na resposta
+                continue
+            linked.add(article_id)
+
+            self.db.execute(text("""
+                INSERT INTO account_news (id, account_id, article_id, relevance_score, insights)
+                VALUES (:id, :account_id, :article_id, :relevance_score, :insights)
+                ON CONFLICT (account_id, article_id) DO UPDATE SET
+                    relevance_score = EXCLUDED.relevance_score,
+                    insights = EXCLUDED.insights,
+                    created_at = NOW()
+            """), {
+                "id": str(uuid4()),
+                "account_id": account_id,
+                "article_id": article_id,
+                "relevance_score": item.get("relevance_score", 50),
+                "insights": item.get("insights", ""),
+            })
+
+        self.db.commit()
+        return len(linked)
+
+    def _purge_old_links(self, account_id: str):
+        """Remove vínculos antigos da account e os artigos que ficaram sem nenhuma account"""
+        orphan_candidates = [row[0] for row in self.db.execute(text("""
+            DELETE FROM account_news
+            WHERE account_id = :account_id AND created_at < :cutoff
+            RETURNING article_id
+        """), {
+            "account_id": account_id,
+            "cutoff": datetime.utcnow() - timedelta(days=NEWS_RETENTION_DAYS),
+        }).fetchall()]
+        if orphan_candidates:
+            self.db.execute(text("""
+                DELETE FROM articles a
+                WHERE a.id = ANY(CAST(:ids AS uuid[]))
+                  AND NOT EXISTS (SELECT 1 FROM account_news n WHERE n.article_id = a.id)
+            """), {"ids": [str(article_id) for article_id in orphan_candidates]})
+
+    def affected_accounts(self, news_id: str) -> Optional[Dict]:
+        """
+        Article de um item do Radar CS (id do vínculo ou do artigo) e todas
+        as accounts que o receberam, mais relevantes primeiro
+
+        Returns:
+            {"article", "accounts", "total_accounts"} ou None se o item não existe
+        """
+        try:
+            news_id = str(UUID(news_id))
+        except ValueError:
+            return None
+
+        article = self.db.execute(text("""
+            SELECT a.id, a.title, a.news_type, a.category, a.source_name, a.source_url, a.published_date
+            FROM articles a
+            WHERE a.id = (
+                SELECT COALESCE(
+                    (SELECT article_id FROM account_news WHERE id = CAST(:news_id AS uuid)),
+                    (SELECT id FROM articles WHERE id = CAST(:news_id AS uuid))
+                )
+            )
+        """), {"news_id": news_id}).first()
+        if not article:
+            return None
+
+        accounts = self.db.execute(text("""
+            SELECT ac.id, ac.name, ac.industry, ac.csm, ac.health_score, ac.status,
+                   n.id AS news_id, n.relevance_score, n.insights, n.created_at
+            FROM account_news n
+            JOIN accounts ac ON ac.id = n.account_id
+            WHERE n.article_id = :article_id
+            ORDER BY n.relevance_score DESC NULLS LAST, ac.name
+        """), {"article_id": article.id}).fetchall()
+
+        return {
+            "article": {
+                "id": str(article.id),
+                "title": article.title,
+                "news_type": article.news_type,
+                "category": article.category,
+                "source_name": article.source_name,
+                "source_url": article.source_url,
+                "published_date": article.published_date.isoformat() if article.published_date else None,
+            },
+            "accounts": [
+                {
+                    "account": {
+                        "id": row.id,
+                        "name": row.name,
+                        "industry": row.industry,
+                        "csm": row.csm,
+                        "health_score": row.health_score,
+                        "status": row.status,
+                    },
+                    "news_id": str(row.news_id),
+                    "relevance_score": row.relevance_score,
+                    "insights": row.insights or "",
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                }
+                for row in accounts
+            ],
+            "total_accounts": len(accounts),
+        }
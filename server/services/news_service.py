@@ -2,20 +2,32 @@
 News Service
 Handles fetching and analyzing news for accounts using OpenAI
 """
+import asyncio
 import json
 import logging
+import time
 import traceback
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
-from uuid import uuid4
+from sqlalchemy import and_, or_, desc, func
 
-from models import NewsItem, Account, Tenant
+from config import settings
+from database import SessionLocal
+from models import Account, AccountNews, Article
 from services.openai_service import OpenAIService
+from services.llm_clients import PERPLEXITY_BASE_URL, llm_clients
+from services.industry_news import industry_news_cache
+from services.news_articles import ArticleStore
+from services.rate_limiter import AdaptiveRateLimiter
+from services.tenant_settings import tenant_settings_cache
 
 logger = logging.getLogger(__name__)
 
+# Notícias da empresa vêm em menor número; as do setor são compartilhadas
+COMPANY_NEWS_MAX_TOKENS = 1500
+INDUSTRY_NEWS_MAX_TOKENS = 2500
+
 # MODULE RELOAD MARKER - If you see this, the module has been reloaded
 print("🔄🔄🔄 NEWS_SERVICE MODULE LOADED - PERPLEXITY VERSION 🔄🔄🔄")
 
@@ -23,10 +35,17 @@ print("🔄🔄🔄 NEWS_SERVICE MODULE LOADED - PERPLEXITY VERSION 🔄🔄🔄
 class NewsService:
     """Service for fetching and managing news for accounts"""
     
-    def __init__(self, db: Session, tenant_id: Optional[str] = None):
+    def __init__(
+        self,
+        db: Session,
+        tenant_id: Optional[str] = None,
+        rate_limiters: Optional[Dict[str, AdaptiveRateLimiter]] = None
+    ):
         self.db = db
         self.tenant_id = tenant_id
         self.openai_service = OpenAIService(db, tenant_id)
+        # Limite de RPM por provedor ("openai", "perplexity") no refresh em lote
+        self.rate_limiters = rate_limiters or {}
     
     async def fetch_news_for_account(self, account_id: str, force_refresh: bool = False) -> List[Dict]:
         """
@@ -70,114 +89,224 @@ class NewsService:
         
         return news_items
     
-    async def fetch_news_for_all_accounts(self, csm_filter: Optional[str] = None) -> Dict[str, List[Dict]]:
+    async def fetch_news_for_all_accounts(
+        self,
+        csm_filter: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        on_progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
         """
         Fetch news for all accounts (optionally filtered by CSM)
         
+        Accounts run concurrently (up to `concurrency`), each in its own
+        short-lived session: cache lookup, provider call outside any
+        transaction, then one transaction to save. Provider calls are
+        throttled per provider (RPM) and slowed down on 429s. A failing
+        account is recorded in `failures` without aborting the batch.
+        
         Args:
             csm_filter: Filter accounts by CSM name
+            concurrency: Max accounts in flight (default NEWS_REFRESH_CONCURRENCY)
+            on_progress: Called after each account with
+                {"done", "total", "account_id", "news_count", "cached", "error"}
             
         Returns:
-            Dictionary mapping account_id to list of news items
+            {"results": {account_id: [news]}, "failures": {account_id: error},
+             "cached": int, "fetched": int, "duration_seconds": float}
         """
-        # Get accounts
-        query = self.db.query(Account)
+        query = self.db.query(Account.id)
         if csm_filter:
             query = query.filter(Account.csm == csm_filter)
+        account_ids = [row[0] for row in query.order_by(Account.id).all()]
+        # A sessão da requisição não fica com transação aberta durante o lote
+        self.db.commit()
         
-        accounts = query.all()
+        rate_limiters = {
+            "openai": AdaptiveRateLimiter(settings.NEWS_OPENAI_RPM),
+            "perplexity": AdaptiveRateLimiter(settings.NEWS_PERPLEXITY_RPM),
+        }
         
-        results = {}
-        for account in accounts:
-            try:
-                # Get cached news (don't force refresh for bulk operations)
-                news = self._get_cached_news(account.id, max_age_hours=24)
-                if news:
-                    results[account.id] = news
-                else:
-                    # If no cache, fetch new news
-                    news = await self.fetch_news_for_account(account.id, force_refresh=False)
-                    results[account.id] = news
-            except Exception as e:
-                print(f"Error fetching news for account {account.id}: {str(e)}")
-                results[account.id] = []
+        results: Dict[str, List[Dict]] = {}
+        failures: Dict[str, str] = {}
+        counts = {"cached": 0, "fetched": 0}
+        queue = list(reversed(account_ids))
+        started = time.monotonic()
         
-        return results
+        async def worker():
+            while queue:
+                account_id = queue.pop()
+                error = None
+                cached = False
+                try:
+                    news, cached = await self._refresh_account(account_id, rate_limiters)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error fetching news for account {account_id}: {str(e)}")
+                    news, error = [], str(e)
+                    failures[account_id] = error
+                results[account_id] = news
+                if not error:
+                    counts["cached" if cached else "fetched"] += 1
+                if on_progress:
+                    on_progress({
+                        "done": len(results),
+                        "total": len(account_ids),
+                        "account_id": account_id,
+                        "news_count": len(news),
+                        "cached": cached,
+                        "error": error,
+                    })
+        
+        workers = max(1, concurrency or settings.NEWS_REFRESH_CONCURRENCY)
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        
+        duration = time.monotonic() - started
+        logger.info(
+            f"News refresh: {len(account_ids)} account(s) in {duration:.1f}s "
+            f"({counts['fetched']} fetched, {counts['cached']} cached, {len(failures)} failed)"
+        )
+        return {
+            # Mesma ordem das accounts (os workers terminam fora de ordem)
+            "results": {account_id: results[account_id] for account_id in account_ids if account_id in results},
+            "failures": failures,
+            "cached": counts["cached"],
+            "fetched": counts["fetched"],
+            "duration_seconds": round(duration, 2),
+        }
+    
+    async def _refresh_account(
+        self,
+        account_id: str,
+        rate_limiters: Dict[str, AdaptiveRateLimiter]
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Cached news (last 24h) or a fresh fetch for one account, in its own session
+        
+        Returns:
+            (news items, True if they came from the cache)
+        
+        Raises:
+            ValueError: account not found
+            RuntimeError: every provider failed
+        """
+        db = SessionLocal()
+        try:
+            service = NewsService(db, self.tenant_id, rate_limiters=rate_limiters)
+            cached = service._get_cached_news(account_id, max_age_hours=24)
+            if cached:
+                return cached, True
+            
+            account = db.query(Account).filter(Account.id == account_id).first()
+            if not account:
+                raise ValueError(f"Account {account_id} not found")
+            # Encerra a transação de leitura antes da chamada ao provedor
+            db.expunge(account)
+            db.commit()
+            
+            news_items = await service._fetch_news(account)
+            service._save_news_items(account_id, news_items)
+            return news_items, False
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    async def _throttle(self, provider: str):
+        """Waits for the provider's RPM budget (batch refresh only)"""
+        limiter = self.rate_limiters.get(provider)
+        if limiter:
+            await limiter.acquire()
+    
+    def _rate_feedback(self, provider: str):
+        """on_response for llm_clients.chat: only this batch's calls adjust its limiter"""
+        limiter = self.rate_limiters.get(provider)
+        return limiter.on_response if limiter else None
     
     def _get_cached_news(self, account_id: str, max_age_hours: int = 24) -> Optional[List[Dict]]:
         """Get cached news items for an account"""
         cutoff_time = datetime.utcnow() - timedelta(hours=max_age_hours)
         
-        news_items = self.db.query(NewsItem).filter(
+        rows = self.db.query(AccountNews, Article).join(Article, Article.id == AccountNews.article_id).filter(
             and_(
-                NewsItem.account_id == account_id,
-                NewsItem.created_at >= cutoff_time
+                AccountNews.account_id == account_id,
+                AccountNews.created_at >= cutoff_time
             )
-        ).order_by(desc(NewsItem.relevance_score), desc(NewsItem.published_date)).all()
+        ).order_by(desc(AccountNews.relevance_score), desc(Article.published_date)).all()
         
-        if not news_items:
+        if not rows:
             return None
         
-        return [self._news_item_to_dict(item) for item in news_items]
+        return [self._news_item_to_dict(link, article) for link, article in rows]
     
     async def _fetch_news_from_openai(self, account: Account) -> List[Dict]:
         """Fetch news using Perplexity (real-time) or OpenAI (synthetic fallback)"""
         try:
-            # Load tenant settings to get API keys
-            if not self.openai_service._openai_key:
-                self.openai_service._load_default_tenant_settings()
-            
-            # Load tenant directly from database to get Perplexity key
-            tenant = self.db.query(Tenant).first()
-            
-            print("="*80)
-            print(f"DEBUG: Tenant found: {tenant is not None}")
-            
-            # Check if Perplexity API key is configured
-            perplexity_key = None
-            if tenant and tenant.settings:
-                ai_settings = tenant.settings.get('ai', {})
-                perplexity_key = ai_settings.get('perplexityApiKey')
-                print(f"DEBUG: AI Settings keys: {list(ai_settings.keys())}")
-                print(f"DEBUG: Perplexity key present: {bool(perplexity_key)}")
-                if perplexity_key:
-                    print(f"DEBUG: Perplexity key length: {len(str(perplexity_key))}")
-                    print(f"DEBUG: Perplexity key starts with: {str(perplexity_key)[:10]}")
-                logger.info(f"Tenant loaded. Perplexity key present: {bool(perplexity_key and len(str(perplexity_key)) > 10)}")
-            else:
-                print("DEBUG: Tenant NOT found or no settings")
-                logger.warning("Tenant not found or has no settings")
-            
-            # TEMPORARY: FORCE PERPLEXITY USAGE FOR TESTING
-            if perplexity_key:
-                print(f"DEBUG: ✅ FORCING PERPLEXITY for {account.name}")
-                logger.info(f"✅ FORCING Perplexity API for REAL-TIME news for account: {account.name}")
-                try:
-                    return await self._fetch_news_from_perplexity(account, perplexity_key)
-                except Exception as perplexity_error:
-                    print(f"DEBUG: ❌ Perplexity FAILED: {str(perplexity_error)}")
-                    logger.error(f"Perplexity failed, falling back to OpenAI: {str(perplexity_error)}")
-                    return await self._fetch_news_from_openai_legacy(account)
-            else:
-                print(f"DEBUG: ⚠️ NO Perplexity key, using OpenAI for {account.name}")
-                logger.info(f"⚠️ Perplexity not configured. Using OpenAI SYNTHETIC news for account: {account.name}")
-                return await self._fetch_news_from_openai_legacy(account)
-                
+            return await self._fetch_news(account)
         except Exception as e:
             print(f"DEBUG: ERROR in _fetch_news_from_openai: {str(e)}")
             logger.error(f"Error fetching news: {str(e)}")
             logger.error(traceback.format_exc())
             return []
-            
-    async def _fetch_news_from_openai_legacy(self, account: Account) -> List[Dict]:
-        """Fetch news using OpenAI (legacy/synthetic)"""
-        # Build prompt for OpenAI
-        prompt = self._build_news_prompt(account)
+    
+    async def _fetch_news(self, account: Account) -> List[Dict]:
+        """
+        Same as _fetch_news_from_openai, but raises when every provider fails
         
+        Company news is searched per account. Industry news comes from the
+        shared (industry, day) cache, so each industry is searched at most
+        once a day for all of its accounts. A failed industry search only
+        drops the industry items.
+        """
+        industry = account.industry or "tecnologia"
+        company_news, industry_news = await asyncio.gather(
+            self._search_news(
+                self._build_perplexity_company_prompt(account),
+                self._build_company_news_prompt(account),
+                label=account.name,
+                max_tokens=COMPANY_NEWS_MAX_TOKENS,
+            ),
+            industry_news_cache.get_or_fetch(self.db, industry, lambda: self._search_news(
+                self._build_perplexity_industry_prompt(industry),
+                self._build_industry_news_prompt(industry),
+                label=f"setor {industry}",
+                max_tokens=INDUSTRY_NEWS_MAX_TOKENS,
+            )),
+            return_exceptions=True,
+        )
+        if isinstance(company_news, BaseException):
+            raise company_news
+        if isinstance(industry_news, BaseException):
+            logger.error(f"Industry news unavailable for {industry}: {str(industry_news)}")
+            industry_news = []
+        return company_news + industry_news
+    
+    async def _search_news(self, perplexity_prompt: str, openai_prompt: str, label: str, max_tokens: int) -> List[Dict]:
+        """Perplexity (real-time) when configured, OpenAI (synthetic) otherwise or as fallback"""
+        # Load tenant settings to get API keys
+        if not self.openai_service._openai_key:
+            self.openai_service._load_default_tenant_settings()
+        
+        # Perplexity key from the cached tenant settings (no query per account)
+        ai_settings = tenant_settings_cache.ai_settings(self.db)
+        perplexity_key = ai_settings.perplexity_api_key
+        
+        if perplexity_key:
+            logger.info(f"Using Perplexity API for REAL-TIME news: {label}")
+            try:
+                return await self._fetch_news_from_perplexity(perplexity_prompt, perplexity_key, label, max_tokens)
+            except Exception as perplexity_error:
+                logger.error(f"Perplexity failed for {label}, falling back to OpenAI: {str(perplexity_error)}")
+                return await self._fetch_news_from_openai_legacy(openai_prompt, max_tokens)
+        else:
+            logger.info(f"⚠️ Perplexity not configured. Using OpenAI SYNTHETIC news: {label}")
+            return await self._fetch_news_from_openai_legacy(openai_prompt, max_tokens)
+        
+    async def _fetch_news_from_openai_legacy(self, prompt: str, max_tokens: int = 3000) -> List[Dict]:
+        """Fetch news using OpenAI (legacy/synthetic)"""
         # Call OpenAI
         try:
-            from openai import OpenAI
-            
             # Load OpenAI settings
             if not self.openai_service._openai_key:
                 self.openai_service._load_default_tenant_settings()
@@ -185,9 +314,10 @@ class NewsService:
             if not self.openai_service._openai_key:
                 raise ValueError("OpenAI API key not configured. Please add it in Settings > AI.")
             
-            client = OpenAI(api_key=self.openai_service._openai_key)
-            
-            response = client.chat.completions.create(
+            await self._throttle("openai")
+            response = await llm_clients.chat(
+                self.openai_service._openai_key,
+                on_response=self._rate_feedback("openai"),
                 model="gpt-4o",  # Latest GPT-4 Omni model - faster and more capable
                 messages=[
                     {"role": "system", "content": self._get_news_system_prompt()},
@@ -195,7 +325,7 @@ class NewsService:
                 ],
                 temperature=0.3,  # Lower temperature for more factual responses
                 response_format={"type": "json_object"},
-                max_tokens=3000
+                max_tokens=max_tokens
             )
             
             # Parse response
@@ -207,28 +337,15 @@ class NewsService:
         except Exception as e:
             raise RuntimeError(f"OpenAI API error: {str(e)}")
     
-    async def _fetch_news_from_perplexity(self, account: Account, api_key: str) -> List[Dict]:
+    async def _fetch_news_from_perplexity(self, prompt: str, api_key: str, label: str, max_tokens: int = 3000) -> List[Dict]:
         """Fetch real-time news using Perplexity API"""
-        print(f"\n{'='*80}")
-        print(f"🔵 PERPLEXITY CALLED for {account.name}")
-        print(f"🔵 API Key: {api_key[:30]}...")
-        print(f"{'='*80}\n")
-        
         try:
-            from openai import OpenAI
-            
-            # Build the prompt for real-time news
-            prompt = self._build_perplexity_news_prompt(account)
-            
-            print(f"🔵 Creating Perplexity client...")
-            # Perplexity uses OpenAI-compatible API
-            client = OpenAI(
-                api_key=api_key,
-                base_url="https://api.perplexity.ai"
-            )
-            
-            print(f"🔵 Calling Perplexity API with model 'sonar'...")
-            response = client.chat.completions.create(
+            # Perplexity uses OpenAI-compatible API (shared client with its own base_url)
+            await self._throttle("perplexity")
+            response = await llm_clients.chat(
+                api_key,
+                base_url=PERPLEXITY_BASE_URL,
+                on_response=self._rate_feedback("perplexity"),
                 model="sonar",  # Perplexity's online search model
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that searches for real, current news. You MUST return the response in valid JSON format."},
@@ -236,10 +353,9 @@ class NewsService:
                 ],
                 temperature=0.2,
                 # response_format={"type": "json_object"}, # Perplexity API issue with this parameter
-                max_tokens=3000
+                max_tokens=max_tokens
             )
             
-            print(f"🔵 Perplexity API responded successfully!")
             # Parse response
             content = response.choices[0].message.content
             
@@ -256,61 +372,37 @@ class NewsService:
             for item in news_items:
                 item["source_type"] = "perplexity"
             
-            print(f"🔵 ✅ Parsed {len(news_items)} news items from Perplexity")
-            logger.info(f"Fetched {len(news_items)} real-time news items from Perplexity for {account.name}")
+            logger.info(f"Fetched {len(news_items)} real-time news items from Perplexity for {label}")
             return news_items
             
         except Exception as e:
-            print(f"\n{'='*80}")
-            print(f"🔴 PERPLEXITY ERROR for {account.name}")
-            print(f"🔴 Error type: {type(e).__name__}")
-            print(f"🔴 Error message: {str(e)}")
-            print(f"{'='*80}\n")
-            
-            logger.error(f"Error fetching Perplexity news: {str(e)}")
+            logger.error(f"Error fetching Perplexity news for {label} ({type(e).__name__}): {str(e)}")
             logger.error(traceback.format_exc())
-            # Fallback to OpenAI on error
-            logger.info("Falling back to OpenAI due to Perplexity error")
-            return await self._fetch_news_from_openai_legacy(account)
+            raise
     
-    def _build_perplexity_news_prompt(self, account: Account) -> str:
-        """Build prompt for Perplexity to search real-time news"""
-        from datetime import datetime, timedelta
-        
+    def _build_perplexity_company_prompt(self, account: Account) -> str:
+        """Build prompt for Perplexity to search real-time news about the company only"""
         company_name = account.name
-        industry = account.industry or "tecnologia"
         today = datetime.utcnow()
         thirty_days_ago = today - timedelta(days=30)
         
-        date_str = today.strftime("%B %Y")
-        
-        prompt = f"""Search for REAL NEWS articles published in the last 30 days (since {thirty_days_ago.strftime("%Y-%m-%d")}) about:
+        prompt = f"""Search for REAL NEWS articles published in the last 30 days (since {thirty_days_ago.strftime("%Y-%m-%d")}) about the company:
 
 **Company**: {company_name}
-**Industry**: {industry}
+**Industry**: {account.industry or "tecnologia"}
 **Current Date**: {today.strftime("%Y-%m-%d")}
 
-Find 3-8 recent news articles in any of these categories:
-
-1. **Company News** about {company_name}:
-   - Product launches, partnerships, funding
-   - Executive changes, M&A activity
-   - Financial results or announcements
+Find 0-5 recent news articles specifically about {company_name}:
+- Product launches, partnerships, funding
+- Executive changes, M&A activity
+- Financial results or announcements
 
-2. **Industry News** in {industry}:
-   - Market trends and analysis
-   - Regulatory changes
-   - Technology developments
-
-3. **Insights for CSM**:
-   - How these news affect customer relationship
-   - Growth or churn risk signals
-   - Expansion opportunities
+For each one, add CSM insights: how it affects the customer relationship, growth or churn risk signals, expansion opportunities.
 
 CRITICAL: 
 - Return ONLY news with REAL, VERIFIABLE published dates from the last 30 days
 - Include the SOURCE NAME (e.g., CNN, Globo, TechCrunch) and ARTICLE URL for EACH news item
-- Do not invent news - if no recent news exists for {company_name}, focus on {industry} news
+- Do not invent news and do not include general industry news - if no recent news exists for {company_name}, return an empty list
 
 Return in JSON format:
 {{
@@ -319,67 +411,132 @@ Return in JSON format:
       "title": "Exact news headline",
       "summary": "2-3 sentence summary",
       "content": "Detailed description with facts",
-      "news_type": "company|industry|market",
+      "news_type": "company",
       "category": "financeiro|negocios|tecnologia|regulatorio|pessoas|outro",
       "relevance_score": 85,
-      "published_date": "2025-11-28T10:00:00Z",
+      "published_date": "{today.strftime("%Y-%m-%d")}T10:00:00Z",
       "source_name": "CNN Business",
       "source_url": "https://example.com/article",
       "insights": "CSM-focused business insights"
     }}
   ]
-}}
+}}"""
+        
+        return prompt
+    
+    def _build_perplexity_industry_prompt(self, industry: str) -> str:
+        """Build prompt for Perplexity to search real-time industry news (shared by all accounts of the industry)"""
+        today = datetime.utcnow()
+        thirty_days_ago = today - timedelta(days=30)
+        
+        prompt = f"""Search for REAL NEWS articles published in the last 30 days (since {thirty_days_ago.strftime("%Y-%m-%d")}) about the industry:
+
+**Industry**: {industry}
+**Current Date**: {today.strftime("%Y-%m-%d")}
 
-Prioritize quality and recency. If no recent company news exist, focus on industry/market news."""
+Find 3-5 recent news articles about {industry}:
+- Market trends and analysis
+- Regulatory changes
+- Technology developments
+
+For each one, add insights for a Customer Success Manager whose customers are in {industry}: growth or churn risk signals and expansion opportunities.
+
+CRITICAL: 
+- Return ONLY news with REAL, VERIFIABLE published dates from the last 30 days
+- Include the SOURCE NAME (e.g., CNN, Globo, TechCrunch) and ARTICLE URL for EACH news item
+- Do not invent news
+
+Return in JSON format:
+{{
+  "news_items": [
+    {{
+      "title": "Exact news headline",
+      "summary": "2-3 sentence summary",
+      "content": "Detailed description with facts",
+      "news_type": "industry|market",
+      "category": "financeiro|negocios|tecnologia|regulatorio|pessoas|outro",
+      "relevance_score": 70,
+      "published_date": "{today.strftime("%Y-%m-%d")}T10:00:00Z",
+      "source_name": "CNN Business",
+      "source_url": "https://example.com/article",
+      "insights": "CSM-focused business insights"
+    }}
+  ]
+}}"""
         
         return prompt
     
-    def _build_news_prompt(self, account: Account) -> str:
-        """Build prompt for OpenAI to fetch news"""
+    def _build_company_news_prompt(self, account: Account) -> str:
+        """Build prompt for OpenAI to fetch news about the company only"""
         company_name = account.name
-        industry = account.industry or "tecnologia"
-        
-        # Get current date for context
-        from datetime import datetime
         today = datetime.utcnow()
-        current_date_str = today.strftime("%d de %B de %Y")
         
-        prompt = f"""Data atual: {current_date_str}
+        prompt = f"""Data atual: {today.strftime("%d/%m/%Y")}
 
-Busque notícias recentes e relevantes para um Customer Success Manager (CSM) sobre:
+Busque notícias recentes sobre a empresa de um cliente, relevantes para um Customer Success Manager (CSM):
 
 **Empresa do Cliente:** {company_name}
-**Setor/Indústria:** {industry}
+**Setor/Indústria:** {account.industry or "tecnologia"}
 
-IMPORTANTE: Retorne notícias dos ÚLTIMOS 30 DIAS (novembro-dezembro de 2025) que sejam relevantes para o CSM entender melhor o contexto de negócio do cliente. As datas devem ser RECENTES (últimos 30 dias).
+Inclua apenas notícias diretas sobre {company_name} dos ÚLTIMOS 30 DIAS (notícias do setor são buscadas separadamente):
+- Anúncios corporativos, financeiros, novos produtos
+- Mudanças executivas, fusões, aquisições
+- Performance financeira, investimentos
+
+Para cada notícia, forneça:
+- **title**: Título claro e objetivo
+- **summary**: Resumo executivo (2-3 frases)
+- **content**: Descrição mais detalhada
+- **news_type**: "company"
+- **category**: "financeiro", "negocios", "tecnologia", "regulatorio", "pessoas", ou "outro"
+- **relevance_score**: 0-100 (quão relevante é para o CSM)
+- **published_date**: Data RECENTE dos últimos 30 dias (formato ISO 8601: YYYY-MM-DDTHH:MM:SSZ)
+- **insights**: Como a notícia pode impactar a relação com o cliente (oportunidades ou riscos)
+
+IMPORTANTE: Retorne no formato JSON com a estrutura:
+{{
+  "news_items": [
+    {{
+      "title": "...",
+      "summary": "...",
+      "content": "...",
+      "news_type": "company",
+      "category": "financeiro|negocios|tecnologia|regulatorio|pessoas|outro",
+      "relevance_score": 85,
+      "published_date": "{today.strftime("%Y-%m-%d")}T10:00:00Z",
+      "insights": "Este evento pode abrir oportunidade de upsell..."
+    }}
+  ]
+}}
 
-Inclua:
+Retorne entre 0-5 notícias. Priorize qualidade sobre quantidade."""
+        
+        return prompt
+    
+    def _build_industry_news_prompt(self, industry: str) -> str:
+        """Build prompt for OpenAI to fetch industry news (shared by all accounts of the industry)"""
+        today = datetime.utcnow()
+        
+        prompt = f"""Data atual: {today.strftime("%d/%m/%Y")}
 
-1. **Notícias diretas sobre a empresa** ({company_name})
-   - Anúncios corporativos, financeiros, novos produtos
-   - Mudanças executivas, fusões, aquisições
-   - Performance financeira, investimentos
+Busque notícias recentes do setor abaixo, relevantes para um Customer Success Manager (CSM) com clientes nesse setor:
 
-2. **Notícias do setor** ({industry})
-   - Tendências de mercado
-   - Eventos importantes da indústria
-   - Mudanças regulatórias ou tecnológicas
+**Setor/Indústria:** {industry}
 
-3. **Insights de negócio**
-   - Como essas notícias podem impactar a relação com o cliente
-   - Oportunidades ou riscos identificados
+Inclua notícias dos ÚLTIMOS 30 DIAS sobre:
+- Tendências de mercado
+- Eventos importantes da indústria
+- Mudanças regulatórias ou tecnológicas
 
 Para cada notícia, forneça:
 - **title**: Título claro e objetivo
 - **summary**: Resumo executivo (2-3 frases)
 - **content**: Descrição mais detalhada
-- **news_type**: "company" (sobre a empresa), "industry" (sobre o setor), ou "market" (mercado geral)
+- **news_type**: "industry" (sobre o setor) ou "market" (mercado geral)
 - **category**: "financeiro", "negocios", "tecnologia", "regulatorio", "pessoas", ou "outro"
 - **relevance_score**: 0-100 (quão relevante é para o CSM)
 - **published_date**: Data RECENTE dos últimos 30 dias (formato ISO 8601: YYYY-MM-DDTHH:MM:SSZ)
-- **insights**: String com insights de negócio para o CSM
-
-CRÍTICO: As datas (published_date) devem ser dos ÚLTIMOS 30 DIAS, não de 2023 ou anos anteriores.
+- **insights**: Oportunidades ou riscos para clientes desse setor
 
 IMPORTANTE: Retorne no formato JSON com a estrutura:
 {{
@@ -388,16 +545,16 @@ IMPORTANTE: Retorne no formato JSON com a estrutura:
       "title": "...",
       "summary": "...",
       "content": "...",
-      "news_type": "company|industry|market",
+      "news_type": "industry|market",
       "category": "financeiro|negocios|tecnologia|regulatorio|pessoas|outro",
-      "relevance_score": 85,
-      "published_date": "2025-11-{today.day:02d}T10:00:00Z",
-      "insights": "Este evento pode abrir oportunidade de upsell..."
+      "relevance_score": 70,
+      "published_date": "{today.strftime("%Y-%m-%d")}T10:00:00Z",
+      "insights": "Mudança regulatória pode acelerar a adoção..."
     }}
   ]
 }}
 
-Retorne entre 3-8 notícias mais relevantes. Priorize qualidade sobre quantidade."""
+Retorne entre 3-5 notícias mais relevantes. Priorize qualidade sobre quantidade."""
         
         return prompt
     
@@ -417,62 +574,51 @@ Diretrizes:
 Mantenha um tom profissional e consultivo."""
     
     def _save_news_items(self, account_id: str, news_items: List[Dict]):
-        """Save news items to database"""
-        # Delete old news for this account (older than 7 days)
-        cutoff_date = datetime.utcnow() - timedelta(days=7)
-        self.db.query(NewsItem).filter(
-            and_(
-                NewsItem.account_id == account_id,
-                NewsItem.created_at < cutoff_date
-            )
-        ).delete()
-        
-        # Save new news items
-        for item in news_items:
-            news_item = NewsItem(
-                id=uuid4(),
-                account_id=account_id,
-                title=item.get("title", ""),
-                summary=item.get("summary", ""),
-                content=item.get("content", ""),
-                news_type=item.get("news_type", "market"),
-                category=item.get("category", "outro"),
-                source_type=item.get("source_type", "openai"),
-                relevance_score=item.get("relevance_score", 50),
-                published_date=datetime.fromisoformat(item.get("published_date", datetime.utcnow().isoformat()).replace("Z", "+00:00")),
-                news_metadata={
-                    "insights": item.get("insights", ""),
-                    "source_name": item.get("source_name"),
-                    "source_url": item.get("source_url")
-                }
-            )
-            self.db.add(news_item)
-        
-        self.db.commit()
+        """Save news items to database (one article per URL/title, linked to the account)"""
+        ArticleStore(self.db).save_account_news(account_id, news_items)
     
-    def _news_item_to_dict(self, news_item: NewsItem) -> Dict:
-        """Convert NewsItem model to dictionary"""
+    def _news_item_to_dict(self, link: AccountNews, article: Article) -> Dict:
+        """Convert an account link + its article to the news item dictionary"""
         return {
-            "id": str(news_item.id),
-            "account_id": news_item.account_id,
-            "title": news_item.title,
-            "summary": news_item.summary,
-            "content": news_item.content,
-            "news_type": news_item.news_type,
-            "category": news_item.category,
-            "source_type": news_item.source_type,
-            "relevance_score": news_item.relevance_score,
-            "published_date": news_item.published_date.isoformat() if news_item.published_date else None,
-            "insights": news_item.news_metadata.get("insights", "") if news_item.news_metadata else "",
-            "created_at": news_item.created_at.isoformat() if news_item.created_at else None
+            "id": str(link.id),
+            "account_id": link.account_id,
+            "article_id": str(article.id),
+            "title": article.title,
+            "summary": article.summary,
+            "content": article.content,
+            "news_type": article.news_type,
+            "category": article.category,
+            "source_type": article.source_type,
+            "relevance_score": link.relevance_score,
+            "published_date": article.published_date.isoformat() if article.published_date else None,
+            "insights": link.insights or "",
+            "created_at": link.created_at.isoformat() if link.created_at else None
         }
     
-    def get_news_by_csm(self, csm_name: Optional[str] = None) -> List[Dict]:
+    def get_affected_accounts(self, news_id: str) -> Optional[Dict]:
+        """
+        Every account that received the same article as a news item
+        ("who else is affected"), most relevant first
+        
+        Args:
+            news_id: News item id (as listed by get_news_by_csm) or article id
+            
+        Returns:
+            {"article", "accounts", "total_accounts"} or None if not found
+        """
+        return ArticleStore(self.db).affected_accounts(news_id)
+    
+    def get_news_by_csm(self, csm_name: Optional[str] = None, per_account_limit: Optional[int] = None) -> List[Dict]:
         """
         Get all news items grouped by account, optionally filtered by CSM
         
+        Two queries regardless of the number of accounts: the accounts, then
+        the last 7 days of news for all of them, ranked per account with a
+        window function and grouped here.
+        
         Args:
             csm_name: Filter by CSM name (None for all)
+            per_account_limit: Keep only the top N news per account (None for all)
             
         Returns:
             List of dictionaries with account info and news items
@@ -483,18 +629,14 @@ Mantenha um tom profissional e consultivo."""
             query = query.filter(Account.csm == csm_name)
         
         accounts = query.all()
+        if not accounts:
+            return []
+        
+        news_by_account = self._get_recent_news_by_account(csm_name, per_account_limit)
         
         results = []
         for account in accounts:
-            # Get news for this account (last 7 days)
-            cutoff_date = datetime.utcnow() - timedelta(days=7)
-            news_items = self.db.query(NewsItem).filter(
-                and_(
-                    NewsItem.account_id == account.id,
-                    NewsItem.created_at >= cutoff_date
-                )
-            ).order_by(desc(NewsItem.relevance_score), desc(NewsItem.published_date)).all()
-            
+            news_items = news_by_account.get(account.id, [])
             # Always add account, even if no news (so user can see it and refresh)
             results.append({
                 "account": {
@@ -505,8 +647,38 @@ Mantenha um tom profissional e consultivo."""
                     "health_score": account.health_score,
                     "status": account.status
                 },
-                "news_items": [self._news_item_to_dict(item) for item in news_items] if news_items else [],
-                "total_news": len(news_items) if news_items else 0
+                "news_items": [self._news_item_to_dict(link, article) for link, article in news_items],
+                "total_news": len(news_items)
             })
         
         return results
+    
+    def _get_recent_news_by_account(
+        self,
+        csm_name: Optional[str] = None,
+        per_account_limit: Optional[int] = None
+    ) -> Dict[str, List[Tuple[AccountNews, Article]]]:
+        """News from the last 7 days of the CSM's accounts, by account, most relevant first"""
+        cutoff_date = datetime.utcnow() - timedelta(days=7)
+        
+        ranked = self.db.query(
+            AccountNews.id.label("news_id"),
+            func.row_number().over(
+                partition_by=AccountNews.account_id,
+                order_by=(desc(AccountNews.relevance_score), desc(Article.published_date), AccountNews.id)
+            ).label("position")
+        ).join(Article, Article.id == AccountNews.article_id).filter(AccountNews.created_at >= cutoff_date)
+        if csm_name and csm_name != "all":
+            ranked = ranked.join(Account, Account.id == AccountNews.account_id).filter(Account.csm == csm_name)
+        ranked = ranked.subquery()
+        
+        query = self.db.query(AccountNews, Article).join(
+            ranked, ranked.c.news_id == AccountNews.id
+        ).join(Article, Article.id == AccountNews.article_id)
+        if per_account_limit is not None:
+            query = query.filter(ranked.c.position <= per_account_limit)
+        
+        news_by_account: Dict[str, List[Tuple[AccountNews, Article]]] = {}
+        for link, article in query.order_by(AccountNews.account_id, ranked.c.position).all():
+            news_by_account.setdefault(link.account_id, []).append((link, article))
+        return news_by_account
@@ -3,12 +3,25 @@ OpenAI Service
 Handles AI analysis of account data using OpenAI's API
 """
 import json
+import logging
 import os
-from typing import Dict, Optional
-from openai import OpenAI, AsyncOpenAI
+from typing import AsyncIterator, Dict, List, Optional
 from sqlalchemy.orm import Session
 
-from models import Tenant
+from config import settings
+from services.analysis_prompt import AnalysisPromptBuilder, count_tokens
+from services.llm_clients import ResponseCallback, llm_clients
+from services.tenant_settings import AISettings, tenant_settings_cache
+
+# Modelo e versão do template da análise de accounts; mudar qualquer um dos
+# dois invalida as análises persistidas em account_analyses
+ANALYSIS_MODEL = "gpt-4-turbo-preview"
+ANALYSIS_PROMPT_VERSION = "3"
+ANALYSIS_MAX_TOKENS = 2000
+
+PLAYBOOK_MODEL = "gpt-4-turbo-preview"
+
+logger = logging.getLogger(__name__)
 
 
 class OpenAIService:
@@ -20,6 +33,8 @@ class OpenAIService:
         self._openai_key = None
         self._system_prompt = None
         self._creativity_level = 0.5
+        self.last_tokens_used: Optional[int] = None  # usage of the last streamed completion
+        self.last_prompt_tokens: Optional[int] = None  # size of the last analysis prompt
         
         # Load tenant settings if provided
         if tenant_id:
@@ -27,29 +42,43 @@ class OpenAIService:
     
     def _load_tenant_settings(self, tenant_id: str):
         """Load OpenAI settings from tenant"""
-        tenant = self.db.query(Tenant).filter(Tenant.tenant_id == tenant_id).first()
-        
-        if tenant and tenant.settings:
-            ai_settings = tenant.settings.get('ai', {})
-            self._openai_key = ai_settings.get('openaiApiKey')
-            self._system_prompt = ai_settings.get('systemPrompt')
-            self._creativity_level = ai_settings.get('creativityLevel', 0.5)
+        self._apply_ai_settings(tenant_settings_cache.ai_settings(self.db, tenant_id))
     
     def _load_default_tenant_settings(self):
         """Load settings from default tenant"""
-        tenant = self.db.query(Tenant).first()
-        if tenant and tenant.settings:
-            ai_settings = tenant.settings.get('ai', {})
-            self._openai_key = ai_settings.get('openaiApiKey')
-            self._system_prompt = ai_settings.get('systemPrompt')
-            self._creativity_level = ai_settings.get('creativityLevel', 0.5)
+        self._apply_ai_settings(tenant_settings_cache.ai_settings(self.db))
+    
+    def _apply_ai_settings(self, ai_settings: AISettings):
+        self._openai_key = ai_settings.openai_api_key or llm_clients.default_api_key
+        self._system_prompt = ai_settings.system_prompt
+        self._creativity_level = ai_settings.creativity_level
+    
+    def require_api_key(self):
+        """Load default tenant settings if needed and fail early without a key"""
+        if not self._openai_key:
+            self._load_default_tenant_settings()
+        if not self._openai_key:
+            raise ValueError("OpenAI API key not configured. Please add it in Settings > AI.")
     
-    async def analyze_account(self, context: Dict) -> Dict:
+    def analysis_settings(self) -> Dict:
+        """Settings that shape the analysis output (part of the cache fingerprint)"""
+        if not self._openai_key:
+            self._load_default_tenant_settings()
+        return {
+            "model": ANALYSIS_MODEL,
+            "prompt_version": ANALYSIS_PROMPT_VERSION,
+            "system_prompt": self._get_system_prompt(),
+            "temperature": float(self._creativity_level),
+            "prompt_token_budget": settings.ANALYSIS_PROMPT_TOKEN_BUDGET,
+        }
+    
+    async def analyze_account(self, context: Dict, on_response: Optional[ResponseCallback] = None) -> Dict:
         """
         Analyze account using OpenAI
         
         Args:
             context: Complete account context from AccountIntelligenceService
+            on_response: Rate-limit feedback for this call (see llm_clients.chat)
             
         Returns:
             AI analysis with insights, risks, recommendations
@@ -64,20 +93,19 @@ class OpenAIService:
         # Build prompt
         prompt = self._build_analysis_prompt(context)
         
-        # Initialize client
-        client = OpenAI(api_key=self._openai_key)
-        
         try:
-            # Call OpenAI
-            response = client.chat.completions.create(
-                model="gpt-4-turbo-preview",
+            # Call OpenAI (shared client: pooled connections, retries on 429/5xx)
+            response = await llm_clients.chat(
+                self._openai_key,
+                on_response=on_response,
+                model=ANALYSIS_MODEL,
                 messages=[
                     {"role": "system", "content": self._get_system_prompt()},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=float(self._creativity_level),
                 response_format={"type": "json_object"},
-                max_tokens=2000
+                max_tokens=ANALYSIS_MAX_TOKENS
             )
             
             # Parse response
@@ -85,9 +113,10 @@ class OpenAIService:
             
             # Add metadata
             analysis["_metadata"] = {
-                "model": "gpt-4-turbo-preview",
+                "model": ANALYSIS_MODEL,
                 "temperature": self._creativity_level,
-                "tokens_used": response.usage.total_tokens if response.usage else None
+                "tokens_used": response.usage.total_tokens if response.usage else None,
+                "prompt_tokens": self.last_prompt_tokens,
             }
             
             return analysis
@@ -116,171 +145,23 @@ Ao analisar contas, identifique proativamente:
 Mantenha um tom profissional, consultivo e direto.
 IMPORTANTE: Você deve responder EXCLUSIVAMENTE em formato JSON válido."""
     
+    def estimate_analysis_tokens(self, context: Dict) -> int:
+        """Upper bound of tokens for one analysis call (system + prompt + max output)"""
+        prompt = self._build_analysis_prompt(context)
+        return count_tokens(self._get_system_prompt(), ANALYSIS_MODEL) + count_tokens(prompt, ANALYSIS_MODEL) + ANALYSIS_MAX_TOKENS
+    
     def _build_analysis_prompt(self, context: Dict) -> str:
-        """Build analysis prompt from context"""
-        account = context.get("account", {})
-        financial = context.get("financial", {})
-        health = context.get("health", {})
-        tasks = context.get("tasks", {})
-        activities = context.get("activities", {})
-        risks = context.get("risks", [])
-        opportunities = context.get("opportunities", [])
-        
-        # Format risks
-        risks_str = "\n".join([
-            f"  - [{r['severity'].upper()}] {r['description']}"
-            for r in risks
-        ]) if risks else "  Nenhum risco detectado automaticamente"
-        
-        # Format opportunities
-        opps_str = "\n".join([
-            f"  - [{o['confidence'].upper()}] {o['description']}"
-            for o in opportunities
-        ]) if opportunities else "  Nenhuma oportunidade detectada automaticamente"
-        
-        # Format overdue tasks
-        overdue_str = "\n".join([
-            f"  - [{t['priority'].upper()}] {t['title']} ({t['days_overdue']} dias)"
-            for t in tasks.get("overdue_details", [])[:3]
-        ]) if tasks.get("overdue", 0) > 0 else "  Sem tarefas atrasadas"
+        """Build the compact, token-budgeted analysis prompt from context"""
+        built = AnalysisPromptBuilder(settings.ANALYSIS_PROMPT_TOKEN_BUDGET, ANALYSIS_MODEL).build(context)
+        self.last_prompt_tokens = built.tokens
+        logger.info(
+            f"Analysis prompt: {built.tokens}/{built.budget} tokens"
+            + (f", dropped {built.dropped_sections}" if built.dropped_sections else "")
+            + (f", truncated {built.truncated_sections}" if built.truncated_sections else "")
+        )
+        return built.text
         
-        # Format Kickoff Data
-        kickoff = context.get("kickoff", {})
-        spiced = kickoff.get("spiced", {})
-        negotiation = kickoff.get("negotiation", {})
-        expectations = kickoff.get("expectations", {})
-        
-        kickoff_str = f"""
-### Kick Off Interno & SPICED
-- Vendedor: {kickoff.get('sales_rep', 'N/A')}
-- Origem: {kickoff.get('origin', 'N/A')} {f"({kickoff.get('origin_other')})" if kickoff.get('origin') == 'outro' else ''}
-- Champion Identificado: {kickoff.get('champion', 'N/A')}
-
-#### SPICED Framework:
-- Situation: {spiced.get('situation', 'N/A')}
-- Pain: {spiced.get('pain', 'N/A')}
-- Impact: {spiced.get('impact', 'N/A')}
-- Critical Event: {spiced.get('critical_event', 'N/A')}
-- Decision: {spiced.get('decision', 'N/A')}
-
-#### Negociação e Expectativas:
-- Negociado com: {negotiation.get('negotiated_with', 'N/A')}
-- Detalhes: {negotiation.get('details', 'N/A')}
-- Promessas: {negotiation.get('promises', 'N/A')}
-- Expectativas: {expectations.get('outcomes', 'N/A')}
-- Critérios de Sucesso: {expectations.get('success_criteria', 'N/A')}
-- Riscos/Red Flags: {kickoff.get('risks', 'N/A')}
-"""
-
-        prompt = f"""Analise profundamente este cliente B2B SaaS e forneça a saída em JSON:
-
-## DADOS DO CLIENTE
-
-### Informações Básicas
-- Nome: {account.get('name', 'N/A')}
-- Indústria: {account.get('industry', 'N/A')}
-- Tipo: {account.get('type', 'N/A')}
-- Status de Saúde: {account.get('health_status', 'N/A')}
-- CSM Responsável: {account.get('csm', 'N/A')}
-
-{kickoff_str}
-
-### Financeiro
-- MRR Atual: R$ {financial.get('current_mrr', 0):,.2f}
-- ARR: R$ {financial.get('arr', 0):,.2f}
-- Início do Contrato: {financial.get('contract_start', 'N/A')}
-- Fim do Contrato: {financial.get('contract_end', 'N/A')}
-- Dias até Renovação: {financial.get('days_to_renewal', 'N/A')}
-
-### Health Score
-- Score Atual: {health.get('current_score', 75)}/100
-- Status: {health.get('status', 'N/A')}
-- Tendência: {health.get('trend', 'N/A')}
-
-### Atividades (Últimos 30 dias)
-- Total de Interações: {activities.get('total_30d', 0)}
-- Calls: {activities.get('by_type', {}).get('calls', 0)}
-- Meetings: {activities.get('by_type', {}).get('meetings', 0)}
-- Emails: {activities.get('by_type', {}).get('emails', 0)}
-- Última Interação: {activities.get('days_since_last_interaction', 'N/A')} dia(s) atrás
-- Frequência: {activities.get('interaction_frequency', 'N/A')}
-
-### Tasks
-- Total de Tasks: {tasks.get('total', 0)}
-- Abertas: {tasks.get('open', 0)}
-- Concluídas: {tasks.get('completed', 0)}
-- Atrasadas: {tasks.get('overdue', 0)}
-- Taxa de Conclusão (30d): {tasks.get('completion_rate_30d', 0)}%
-
-#### Tasks Atrasadas (Top 3):
-{overdue_str}
-
-#### Distribuição por Prioridade:
-- Urgente: {tasks.get('by_priority', {}).get('urgent', 0)}
-- Alta: {tasks.get('by_priority', {}).get('high', 0)}
-- Média: {tasks.get('by_priority', {}).get('medium', 0)}
-- Baixa: {tasks.get('by_priority', {}).get('low', 0)}
-
-### Sinais de Risco Detectados (Automático)
-{risks_str}
-
-### Oportunidades Detectadas (Automático)
-{opps_str}
-
-## ANÁLISE SOLICITADA
-
-Com base nestes dados, forneça uma análise COMPLETA em formato JSON com a seguinte estrutura:
-
-{{
-  "summary": "Resumo executivo da situação do cliente (2-3 parágrafos)",
-  
-  "health_assessment": {{
-    "overall_health": "healthy|at_risk|critical",
-    "key_strengths": ["força 1", "força 2", "força 3"],
-    "key_concerns": ["preocupação 1", "preocupação 2"]
-  }},
-  
-  "churn_risk": {{
-    "score": 0-100,
-    "level": "low|medium|high|critical",
-    "primary_factors": [
-      {{"factor": "nome do fator", "impact": "alto|médio|baixo", "description": "detalhes"}}
-    ],
-    "mitigationactions": [
-      {{"action": "ação específica", "priority": "urgent|high|medium", "expected_impact": "descrição"}}
-    ]
-  }},
-  
-  "expansion_opportunities": [
-    {{
-      "type": "upsell|cross-sell|expansion",
-      "description": "descrição detalhada",
-      "estimated_value": 1000,
-      "confidence": "high|medium|low",
-      "next_steps": ["passo 1", "passo 2"]
-    }}
-  ],
-  
-  "next_best_actions": [
-    {{
-      "action": "ação específica e clara",
-      "rationale": "porque esta ação é importante agora",
-      "timeline": "imediato|esta semana|este mês",
-      "expected_outcome": "resultado esperado"
-    }}
-  ],
-  
-  "strategic_insights": [
-    "insight estratégico 1 baseado em padrões dos dados",
-    "insight estratégico 2 que o CSM pode não ter percebido",
-    "insight estratégico 3 relacionando múltiplas dimensões"
-  ]
-}}
-
-IMPORTANTE: Retorne APENAS o JSON, sem texto adicional antes ou depois."""
-        return prompt
-        
-    def generate_playbook(self, topic: str, category: str) -> str:
+    async def generate_playbook(self, topic: str, category: str) -> str:
         """
         Generate a playbook using OpenAI
         
@@ -298,9 +179,84 @@ IMPORTANTE: Retorne APENAS o JSON, sem texto adicional antes ou depois."""
         if not self._openai_key:
             raise ValueError("OpenAI API key not configured. Please add it in Settings > AI.")
             
-        # Initialize client
-        client = OpenAI(api_key=self._openai_key)
+        try:
+            response = await llm_clients.chat(
+                self._openai_key,
+                model=PLAYBOOK_MODEL,
+                messages=self._build_playbook_messages(topic, category),
+                temperature=0.7,
+                max_tokens=3000
+            )
+            
+            return self.strip_code_fences(response.choices[0].message.content)
+            
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+    
+    async def stream_playbook(self, topic: str, category: str) -> AsyncIterator[str]:
+        """
+        Streaming variant of generate_playbook: yields HTML fragments as they arrive
         
+        The caller is responsible for stripping code fences from the joined content.
+        """
+        self.require_api_key()
+        async for token in self._stream_completion(
+            model=PLAYBOOK_MODEL,
+            messages=self._build_playbook_messages(topic, category),
+            temperature=0.7,
+            max_tokens=3000
+        ):
+            yield token
+    
+    async def stream_analysis(self, context: Dict) -> AsyncIterator[str]:
+        """Streaming variant of analyze_account: yields the JSON text as it arrives"""
+        self.require_api_key()
+        async for token in self._stream_completion(
+            model=ANALYSIS_MODEL,
+            messages=[
+                {"role": "system", "content": self._get_system_prompt()},
+                {"role": "user", "content": self._build_analysis_prompt(context)}
+            ],
+            temperature=float(self._creativity_level),
+            response_format={"type": "json_object"},
+            max_tokens=ANALYSIS_MAX_TOKENS
+        ):
+            yield token
+    
+    def parse_analysis(self, content: str, tokens_used: Optional[int] = None) -> Dict:
+        """Parse streamed analysis JSON and add the same metadata as analyze_account"""
+        try:
+            analysis = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise RuntimeError(f"OpenAI API error: invalid JSON response ({str(e)})")
+        analysis["_metadata"] = {
+            "model": ANALYSIS_MODEL,
+            "temperature": self._creativity_level,
+            "tokens_used": tokens_used,
+            "prompt_tokens": self.last_prompt_tokens,
+        }
+        return analysis
+    
+    async def _stream_completion(self, **params) -> AsyncIterator[str]:
+        """Chat completion with stream=True; closing the generator closes the HTTP stream"""
+        self.last_tokens_used = None
+        stream = llm_clients.stream_chat(
+            self._openai_key,
+            stream_options={"include_usage": True},
+            **params
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if chunk.usage:
+                    self.last_tokens_used = chunk.usage.total_tokens
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+        finally:
+            await stream.aclose()
+    
+    def _build_playbook_messages(self, topic: str, category: str) -> List[Dict]:
         prompt = f"""
         Crie um playbook detalhado e estruturado para Customer Success sobre o tema: "{topic}".
         Categoria: {category}
@@ -322,29 +278,18 @@ IMPORTANTE: Retorne APENAS o JSON, sem texto adicional antes ou depois."""
            
         Seja criativo, profissional e direto.
         """
-        
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "Você é um especialista mundial em Customer Success e operações de CS. Você cria playbooks de classe mundial."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=3000
-            )
-            
-            content = response.choices[0].message.content
-            
-            # Remove markdown code blocks if present
-            if content.startswith("```html"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-                
-            return content.strip()
-            
-        except Exception as e:
-            raise RuntimeError(f"OpenAI API error: {str(e)}")
+        return [
+            {"role": "system", "content": "Você é um especialista mundial em Customer Success e operações de CS. Você cria playbooks de classe mundial."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    @staticmethod
+    def strip_code_fences(content: str) -> str:
+        """Remove markdown code blocks if present"""
+        if content.startswith("```html"):
+            content = content[7:]
+        if content.startswith("```"):
+            content = content[3:]
+        if content.endswith("```"):
+            content = content[:-3]
+        return content.strip()
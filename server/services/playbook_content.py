@@ -0,0 +1,44 @@
+"""
+Playbook Content Helpers
+Derivação de resumo (excerpt) e contagem de palavras do HTML dos playbooks
+"""
+import html
+import re
+from typing import Tuple
+
+EXCERPT_LENGTH = 280
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def html_to_text(content: str) -> str:
+    """Remove tags HTML e normaliza espaços"""
+    if not content:
+        return ""
+    plain = _TAG_RE.sub(" ", content)
+    plain = html.unescape(plain)
+    return _WHITESPACE_RE.sub(" ", plain).strip()
+
+
+def summarize_content(content: str, excerpt_length: int = EXCERPT_LENGTH) -> Tuple[str, int]:
+    """
+    Calcula excerpt e contagem de palavras de um playbook
+
+    Executado na escrita (create/update) para que a listagem não
+    precise carregar o conteúdo completo.
+
+    Returns:
+        Tupla (excerpt, word_count)
+    """
+    plain = html_to_text(content)
+    word_count = len(plain.split()) if plain else 0
+
+    if len(plain) <= excerpt_length:
+        return plain, word_count
+
+    # Cortar no último espaço para não quebrar palavras
+    cut = plain[:excerpt_length]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(" ,.;:") + "…", word_count
@@ -0,0 +1,253 @@
+"""
+Playbook Revision Service
+Histórico de revisões de playbooks endereçado por conteúdo (hash) e
+armazenado como deltas comprimidos com snapshots periódicos
+"""
+import difflib
+import hashlib
+import json
+import logging
+import re
+import zlib
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import PlaybookContentBlob, PlaybookRevision
+
+logger = logging.getLogger(__name__)
+
+# Máximo de deltas encadeados antes de gravar um snapshot completo.
+# Limita a reconstrução a uma query + no máximo N aplicações de delta.
+SNAPSHOT_INTERVAL = 10
+
+# Tokens: tags HTML, espaços e palavras (join dos tokens == conteúdo original)
+_TOKEN_RE = re.compile(r"<[^>]*>|\s+|[^<\s]+|<")
+
+_OP_COPY = 0
+_OP_INSERT = 1
+
+
+def content_hash(content: str) -> str:
+    """Hash sha256 do conteúdo (chave de deduplicação)"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _tokenize(content: str) -> List[str]:
+    return _TOKEN_RE.findall(content)
+
+
+def encode_delta(base: str, target: str) -> bytes:
+    """
+    Codifica target como delta sobre base
+
+    O delta é uma lista de operações [0, i1, i2] (copiar tokens i1:i2 da
+    base) e [1, "texto"] (inserir literal), serializada em JSON e comprimida.
+    """
+    base_tokens = _tokenize(base)
+    target_tokens = _tokenize(target)
+    matcher = difflib.SequenceMatcher(None, base_tokens, target_tokens)
+
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([_OP_COPY, i1, i2])
+        elif j2 > j1:
+            ops.append([_OP_INSERT, "".join(target_tokens[j1:j2])])
+
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"))
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    """Reconstrói o conteúdo aplicando um delta sobre a base"""
+    base_tokens = _tokenize(base)
+    parts = []
+    for op in json.loads(zlib.decompress(delta).decode("utf-8")):
+        if op[0] == _OP_COPY:
+            parts.extend(base_tokens[op[1]:op[2]])
+        else:
+            parts.append(op[1])
+    return "".join(parts)
+
+
+class PlaybookRevisionService:
+    """Service para gravar e reconstruir revisões de playbooks"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_revision(
+        self,
+        playbook_id: int,
+        content: str,
+        author: Optional[str] = None,
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> Optional[PlaybookRevision]:
+        """
+        Registra uma nova revisão (sem commit; participa da transação do chamador)
+
+        Returns:
+            A revisão criada, ou None se o conteúdo é idêntico à última revisão
+        """
+        content = content or ""
+        digest = content_hash(content)
+
+        # Serializa revisões concorrentes do mesmo playbook (revision_number)
+        self.db.execute(
+            text("SELECT id FROM playbooks WHERE id = :playbook_id FOR UPDATE"),
+            {"playbook_id": playbook_id}
+        )
+        latest = self._get_latest_revision(playbook_id)
+
+        if latest and latest.content_hash == digest:
+            return None
+
+        # Conteúdo já conhecido (de qualquer playbook) é reutilizado; outro
+        # playbook pode gravar o mesmo hash ao mesmo tempo
+        if self.db.get(PlaybookContentBlob, digest) is None:
+            self.db.execute(text("""
+                INSERT INTO playbook_content_blobs (content_hash, base_hash, chain_depth, data, size)
+                VALUES (:content_hash, :base_hash, :chain_depth, :data, :size)
+                ON CONFLICT (content_hash) DO NOTHING
+            """), self._build_blob(digest, content, latest))
+
+        revision = PlaybookRevision(
+            playbook_id=playbook_id,
+            revision_number=(latest.revision_number + 1) if latest else 1,
+            content_hash=digest,
+            name=name,
+            version=version,
+            author=author,
+        )
+        self.db.add(revision)
+        self.db.flush()
+        return revision
+
+    def _build_blob(
+        self,
+        digest: str,
+        content: str,
+        latest: Optional[PlaybookRevision]
+    ) -> Dict:
+        """Gera delta contra a revisão anterior ou um snapshot completo (colunas do blob)"""
+        snapshot = zlib.compress(content.encode("utf-8"))
+
+        if latest:
+            base_blob = self.db.get(PlaybookContentBlob, latest.content_hash)
+            if base_blob and base_blob.chain_depth + 1 < SNAPSHOT_INTERVAL:
+                delta = encode_delta(self.reconstruct(base_blob.content_hash), content)
+                if len(delta) < len(snapshot):
+                    return {
+                        "content_hash": digest,
+                        "base_hash": base_blob.content_hash,
+                        "chain_depth": base_blob.chain_depth + 1,
+                        "data": delta,
+                        "size": len(content),
+                    }
+
+        return {
+            "content_hash": digest,
+            "base_hash": None,
+            "chain_depth": 0,
+            "data": snapshot,
+            "size": len(content),
+        }
+
+    def reconstruct(self, digest: str) -> str:
+        """Reconstrói o conteúdo de um hash (uma query para toda a cadeia)"""
+        rows = self.db.execute(text("""
+            WITH RECURSIVE chain AS (
+                SELECT content_hash, base_hash, data, 0 AS depth
+                FROM playbook_content_blobs
+                WHERE content_hash = :content_hash
+                UNION ALL
+                SELECT b.content_hash, b.base_hash, b.data, c.depth + 1
+                FROM playbook_content_blobs b
+                JOIN chain c ON b.content_hash = c.base_hash
+            )
+            SELECT content_hash, base_hash, data FROM chain ORDER BY depth DESC
+        """), {"content_hash": digest}).fetchall()
+
+        if not rows:
+            raise ValueError(f"Conteúdo {digest} não encontrado")
+
+        content = None
+        for _, base_hash, data in rows:
+            if base_hash is None:
+                content = zlib.decompress(bytes(data)).decode("utf-8")
+            else:
+                content = apply_delta(content, bytes(data))
+        return content
+
+    def list_revisions(self, playbook_id: int) -> List[Dict]:
+        """Lista as revisões de um playbook (mais recente primeiro)"""
+        rows = self.db.query(PlaybookRevision, PlaybookContentBlob).join(
+            PlaybookContentBlob,
+            PlaybookContentBlob.content_hash == PlaybookRevision.content_hash
+        ).filter(
+            PlaybookRevision.playbook_id == playbook_id
+        ).order_by(PlaybookRevision.revision_number.desc()).all()
+
+        return [self._revision_to_dict(revision, blob) for revision, blob in rows]
+
+    def get_revision(self, playbook_id: int, revision_number: int) -> Optional[Dict]:
+        """Retorna uma revisão com o conteúdo reconstruído"""
+        row = self.db.query(PlaybookRevision, PlaybookContentBlob).join(
+            PlaybookContentBlob,
+            PlaybookContentBlob.content_hash == PlaybookRevision.content_hash
+        ).filter(
+            PlaybookRevision.playbook_id == playbook_id,
+            PlaybookRevision.revision_number == revision_number
+        ).first()
+
+        if not row:
+            return None
+
+        revision, blob = row
+        data = self._revision_to_dict(revision, blob)
+        data["content"] = self.reconstruct(revision.content_hash)
+        return data
+
+    def diff_revisions(self, playbook_id: int, from_number: int, to_number: int) -> Optional[Dict]:
+        """Diff unificado entre duas revisões"""
+        old = self.get_revision(playbook_id, from_number)
+        new = self.get_revision(playbook_id, to_number)
+        if not old or not new:
+            return None
+
+        diff = difflib.unified_diff(
+            self._split_lines(old["content"]),
+            self._split_lines(new["content"]),
+            fromfile=f"revision {from_number}",
+            tofile=f"revision {to_number}",
+            lineterm="",
+        )
+        return {
+            "playbookId": str(playbook_id),
+            "from": from_number,
+            "to": to_number,
+            "diff": "\n".join(diff),
+        }
+
+    def _get_latest_revision(self, playbook_id: int) -> Optional[PlaybookRevision]:
+        return self.db.query(PlaybookRevision).filter(
+            PlaybookRevision.playbook_id == playbook_id
+        ).order_by(PlaybookRevision.revision_number.desc()).first()
+
+    def _split_lines(self, content: str) -> List[str]:
+        # Conteúdo do editor costuma vir em uma única linha; quebrar após cada tag
+        return content.replace(">", ">\n").splitlines()
+
+    def _revision_to_dict(self, revision: PlaybookRevision, blob: PlaybookContentBlob) -> Dict:
+        return {
+            "revision": revision.revision_number,
+            "contentHash": revision.content_hash,
+            "name": revision.name,
+            "version": revision.version,
+            "author": revision.author,
+            "size": blob.size,
+            "storage": "snapshot" if blob.base_hash is None else "delta",
+            "createdAt": revision.created_at.isoformat() if revision.created_at else None,
+        }
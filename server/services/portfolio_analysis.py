@@ -0,0 +1,309 @@
+"""
+Portfolio Analysis Scheduler
+Análise de IA de todo o portfólio (execução noturna) dentro dos limites de
+RPM/TPM do provedor, por ordem de prioridade (risco e renovação), com
+checkpoint por account e sem reanalisar contextos que não mudaram
+"""
+import asyncio
+import logging
+import uuid
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal, engine
+from services.account_intelligence import AccountIntelligenceService
+from services.analysis_cache import AccountAnalysisCache, context_fingerprint
+from services.openai_service import OpenAIService
+from services.portfolio_risks import PortfolioRiskService
+from services.rate_limiter import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Garante uma única execução simultânea entre workers/processos
+_ADVISORY_LOCK_KEY = "portfolio_analysis"
+
+# Renovação próxima sobe a account na fila
+RENEWAL_BONUS = [(30, 6), (90, 3)]
+
+
+def account_priority(item: Dict) -> float:
+    """
+    Prioridade de uma account do scan de riscos: risco (soma das
+    severidades) + bônus de renovação próxima + desempate por MRR
+    """
+    priority = item["risk_score"] * 10.0
+    days_to_renewal = item["metrics"].get("days_to_renewal")
+    if days_to_renewal is not None and days_to_renewal >= 0:
+        for max_days, bonus in RENEWAL_BONUS:
+            if days_to_renewal <= max_days:
+                priority += bonus * 10.0
+                break
+    return priority + min(item["current_mrr"] or 0.0, 100000.0) / 10000.0
+
+
+class PortfolioAnalysisScheduler:
+    """
+    Executa as análises de uma execução (portfolio_analysis_runs)
+
+    Cada account vira uma linha em portfolio_analysis_items; o status é
+    gravado assim que a account termina, então uma execução interrompida
+    continua de onde parou. Accounts cujo fingerprint de contexto já tem
+    análise gravada são marcadas como skipped sem chamar a IA.
+    """
+
+    def __init__(self, rpm: float = 60, tpm: float = 150000, concurrency: int = 4):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------ runs
+
+    def create_run(self, db: Session, tenant_id: Optional[str] = None, csm: Optional[str] = None) -> str:
+        """Cria a execução com todas as accounts (ou as do CSM) e suas prioridades"""
+        scan = PortfolioRiskService(db).scan(csm=csm, include_without_risks=True, limit=10 ** 9)
+        run_id = str(uuid.uuid4())
+        db.execute(text("""
+            INSERT INTO portfolio_analysis_runs (id, tenant_id, status) VALUES (:id, :tenant_id, 'running')
+        """), {"id": run_id, "tenant_id": tenant_id})
+        if scan["accounts"]:
+            db.execute(text("""
+                INSERT INTO portfolio_analysis_items (run_id, account_id, priority)
+                VALUES (:run_id, :account_id, :priority)
+            """), [
+                {"run_id": run_id, "account_id": item["account_id"], "priority": account_priority(item)}
+                for item in scan["accounts"]
+            ])
+        db.commit()
+        return run_id
+
+    def resumable_run(self, db: Session) -> Optional[str]:
+        """Execução mais recente que não terminou (interrompida ou processo caiu)"""
+        return db.execute(text("""
+            SELECT id FROM portfolio_analysis_runs
+            WHERE status IN ('running', 'interrupted')
+            ORDER BY created_at DESC
+            LIMIT 1
+        """)).scalar()
+
+    def progress(self, db: Session, run_id: str) -> Optional[Dict]:
+        run = db.execute(text("""
+            SELECT id, tenant_id, status, error, created_at, finished_at
+            FROM portfolio_analysis_runs WHERE id = :id
+        """), {"id": run_id}).first()
+        if not run:
+            return None
+        counts = dict(db.execute(text("""
+            SELECT status, COUNT(*) FROM portfolio_analysis_items WHERE run_id = :id GROUP BY status
+        """), {"id": run_id}).fetchall())
+        tokens_used = db.execute(text("""
+            SELECT COALESCE(SUM(tokens_used), 0) FROM portfolio_analysis_items WHERE run_id = :id
+        """), {"id": run_id}).scalar()
+        return {
+            "id": run.id,
+            "tenant_id": run.tenant_id,
+            "status": run.status,
+            "error": run.error,
+            "created_at": run.created_at.isoformat() if run.created_at else None,
+            "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+            "total": sum(counts.values()),
+            "pending": counts.get("pending", 0),
+            "analyzed": counts.get("analyzed", 0),
+            "skipped": counts.get("skipped", 0),
+            "failed": counts.get("failed", 0),
+            "tokens_used": int(tokens_used),
+        }
+
+    # ------------------------------------------------------------- execução
+
+    async def run(self, run_id: Optional[str] = None, tenant_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Processa as accounts pendentes da execução (nova se run_id=None e
+        não há execução a retomar)
+
+        Returns:
+            Progresso final, ou None se outra execução está em andamento
+        """
+        lock_connection = engine.connect()
+        try:
+            locked = lock_connection.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": _ADVISORY_LOCK_KEY}
+            ).scalar()
+            lock_connection.commit()
+            if not locked:
+                return None
+            try:
+                return await self._run_locked(run_id, tenant_id)
+            finally:
+                lock_connection.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": _ADVISORY_LOCK_KEY})
+                lock_connection.commit()
+        finally:
+            lock_connection.close()
+
+    async def _run_locked(self, run_id: Optional[str], tenant_id: Optional[str]) -> Dict:
+        db = SessionLocal()
+        try:
+            run_id = run_id or self.resumable_run(db) or self.create_run(db, tenant_id)
+            run = db.execute(text("""
+                UPDATE portfolio_analysis_runs SET status = 'running', error = NULL
+                WHERE id = :id
+                RETURNING tenant_id
+            """), {"id": run_id}).first()
+            db.commit()
+            tenant_id = run.tenant_id if run else tenant_id
+            pending: List[str] = [row[0] for row in db.execute(text("""
+                SELECT account_id FROM portfolio_analysis_items
+                WHERE run_id = :id AND status = 'pending'
+                ORDER BY priority DESC, account_id
+            """), {"id": run_id}).fetchall()]
+        finally:
+            db.close()
+
+        logger.info(f"Análise do portfólio {run_id}: {len(pending)} account(s) pendente(s)")
+        limiter = AdaptiveRateLimiter(self.rpm, self.tpm)
+
+        queue = list(reversed(pending))  # pop() devolve a maior prioridade
+
+        async def worker():
+            while queue:
+                await self._process(run_id, queue.pop(), tenant_id, limiter)
+
+        status, error = "completed", None
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+        except asyncio.CancelledError:
+            status = "interrupted"
+            raise
+        except Exception as e:
+            status, error = "failed", str(e)
+            logger.error(f"Erro na análise do portfólio {run_id}: {error}")
+        finally:
+            self._finish_run(run_id, status, error)
+            logger.info(f"Análise do portfólio {run_id}: {status} ({limiter.stats()})")
+
+        db = SessionLocal()
+        try:
+            result = self.progress(db, run_id)
+            result["rate_limiter"] = limiter.stats()
+            return result
+        finally:
+            db.close()
+
+    async def _process(self, run_id: str, account_id: str, tenant_id: Optional[str], limiter: AdaptiveRateLimiter):
+        """Analisa uma account (sessão própria) e grava o checkpoint"""
+        db = SessionLocal()
+        try:
+            context = await AccountIntelligenceService(db).build_account_context(account_id)
+            ai_service = OpenAIService(db, tenant_id)
+            ai_service.require_api_key()
+            analysis_settings = ai_service.analysis_settings()
+            fingerprint = context_fingerprint(context, analysis_settings)
+            analysis_cache = AccountAnalysisCache(db)
+
+            if analysis_cache.exists(
+                account_id, fingerprint, analysis_settings["prompt_version"], analysis_settings["model"]
+            ):
+                self._finish_item(db, run_id, account_id, "skipped", fingerprint=fingerprint)
+                return
+
+            estimated = ai_service.estimate_analysis_tokens(context)
+            await limiter.acquire(estimated)
+            # Só as respostas desta execução ajustam o limiter
+            analysis = await ai_service.analyze_account(context, on_response=limiter.on_response)
+            tokens_used = analysis.get("_metadata", {}).get("tokens_used")
+            limiter.refund(estimated - (tokens_used or estimated))
+            limiter.on_success()
+
+            analysis_cache.save(
+                account_id,
+                fingerprint,
+                analysis_settings["prompt_version"],
+                analysis_settings["model"],
+                analysis,
+                tokens_used,
+            )
+            self._finish_item(db, run_id, account_id, "analyzed", fingerprint=fingerprint, tokens_used=tokens_used)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao analisar account {account_id} (execução {run_id}): {str(e)}")
+            self._finish_item(db, run_id, account_id, "failed", error=str(e))
+        finally:
+            db.close()
+
+    @staticmethod
+    def _finish_item(
+        db: Session,
+        run_id: str,
+        account_id: str,
+        status: str,
+        fingerprint: Optional[str] = None,
+        tokens_used: Optional[int] = None,
+        error: Optional[str] = None,
+    ):
+        db.execute(text("""
+            UPDATE portfolio_analysis_items
+            SET status = :status, fingerprint = :fingerprint, tokens_used = :tokens_used,
+                error = :error, finished_at = NOW()
+            WHERE run_id = :run_id AND account_id = :account_id
+        """), {
+            "run_id": run_id,
+            "account_id": account_id,
+            "status": status,
+            "fingerprint": fingerprint,
+            "tokens_used": tokens_used,
+            "error": error,
+        })
+        db.commit()
+
+    @staticmethod
+    def _finish_run(run_id: str, status: str, error: Optional[str] = None):
+        db = SessionLocal()
+        try:
+            db.execute(text("""
+                UPDATE portfolio_analysis_runs
+                SET status = :status, error = :error,
+                    finished_at = CASE WHEN :status = 'interrupted' THEN NULL ELSE NOW() END
+                WHERE id = :id
+            """), {"id": run_id, "status": status, "error": error})
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao finalizar execução {run_id}: {str(e)}")
+        finally:
+            db.close()
+
+    # ------------------------------------------------------ background (API)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, run_id: Optional[str] = None, tenant_id: Optional[str] = None) -> bool:
+        """Executa em background no event loop do worker (False se já está rodando aqui)"""
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self.run(run_id, tenant_id))
+        return True
+
+    async def stop(self):
+        """Interrompe a execução deste worker (retomável depois)"""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+# Instância global (uma por worker)
+portfolio_analysis_scheduler = PortfolioAnalysisScheduler(
+    rpm=settings.PORTFOLIO_ANALYSIS_RPM,
+    tpm=settings.PORTFOLIO_ANALYSIS_TPM,
+    concurrency=settings.PORTFOLIO_ANALYSIS_CONCURRENCY,
+)
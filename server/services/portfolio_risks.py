@@ -0,0 +1,181 @@
+"""
+Portfolio Risk Scan
+Aplica as regras de risco/oportunidade do contexto de intelligence a todas
+as accounts de uma vez, a partir de agregados calculados em uma única query
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.risk_rules import detect_opportunities, detect_risks, risk_score
+
+# Score usado pelo contexto de intelligence quando a account não tem avaliação
+DEFAULT_HEALTH_SCORE = 75
+
+_PORTFOLIO_METRICS_SQL = """
+    WITH overdue AS (
+        SELECT account_id, COUNT(*) AS overdue_tasks
+        FROM tasks
+        WHERE account_id IS NOT NULL
+          AND status IN ('todo', 'in-progress')
+          AND due_date < :now
+        GROUP BY account_id
+    ),
+    recent_activities AS (
+        SELECT account_id, COUNT(*) AS activities_30d, MAX(created_at) AS last_activity
+        FROM activities
+        WHERE created_at >= :since
+        GROUP BY account_id
+    )
+    SELECT
+        a.id,
+        a.name,
+        a.csm,
+        a.industry,
+        a.health_status,
+        a.mrr,
+        a.contract_end,
+        e.total_score,
+        COALESCE(o.overdue_tasks, 0) AS overdue_tasks,
+        COALESCE(r.activities_30d, 0) AS activities_30d,
+        r.last_activity
+    FROM accounts a
+    LEFT JOIN health_score_evaluations e ON e.id = a.latest_evaluation_id
+    LEFT JOIN overdue o ON o.account_id = a.id
+    LEFT JOIN recent_activities r ON r.account_id = a.id
+    WHERE (CAST(:csm AS text) IS NULL OR a.csm = CAST(:csm AS text))
+"""
+
+
+class PortfolioRiskService:
+    """Varredura de riscos e oportunidades de todo o portfólio"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def scan(
+        self,
+        csm: Optional[str] = None,
+        risk_type: Optional[str] = None,
+        severity: Optional[str] = None,
+        opportunity_type: Optional[str] = None,
+        include_without_risks: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Dict:
+        """
+        Avalia as regras para todas as accounts e retorna a lista ranqueada
+
+        Ranking: pontuação de risco (soma das severidades) desc, depois MRR desc.
+
+        Args:
+            csm: Apenas accounts do CSM
+            risk_type: Apenas accounts com esse tipo de risco
+            severity: Apenas accounts com pelo menos um risco dessa severidade
+            opportunity_type: Apenas accounts com esse tipo de oportunidade
+            include_without_risks: Inclui accounts sem nenhum risco
+        """
+        now = datetime.now(timezone.utc)
+        detected_at = datetime.now().isoformat()
+        today = datetime.now().date()
+
+        rows = self.db.execute(text(_PORTFOLIO_METRICS_SQL), {
+            "now": now,
+            "since": now - timedelta(days=30),
+            "csm": csm,
+        }).fetchall()
+
+        summary = {
+            "accounts": len(rows),
+            "at_risk": 0,
+            "by_risk_type": {},
+            "by_severity": {"high": 0, "medium": 0},
+            "by_opportunity_type": {},
+        }
+        results = []
+        for row in rows:
+            item = self._evaluate(row, now, today, detected_at)
+
+            if item["risks"]:
+                summary["at_risk"] += 1
+            for risk in item["risks"]:
+                summary["by_risk_type"][risk["type"]] = summary["by_risk_type"].get(risk["type"], 0) + 1
+                summary["by_severity"][risk["severity"]] = summary["by_severity"].get(risk["severity"], 0) + 1
+            for opportunity in item["opportunities"]:
+                summary["by_opportunity_type"][opportunity["type"]] = (
+                    summary["by_opportunity_type"].get(opportunity["type"], 0) + 1
+                )
+
+            if self._matches(item, risk_type, severity, opportunity_type, include_without_risks):
+                results.append(item)
+
+        results.sort(key=lambda item: (item["risk_score"], item["current_mrr"]), reverse=True)
+
+        return {
+            "summary": summary,
+            "total": len(results),
+            "accounts": results[offset:offset + limit],
+        }
+
+    def _evaluate(self, row, now: datetime, today, detected_at: str) -> Dict:
+        (account_id, name, csm, industry, health_status, mrr, contract_end,
+         total_score, overdue_tasks, activities_30d, last_activity) = row
+
+        current_mrr = float(mrr) if mrr else 0.0
+        current_score = total_score if total_score is not None else DEFAULT_HEALTH_SCORE
+        days_since = (now - last_activity).days if last_activity else None
+        days_to_renewal = (contract_end - today).days if contract_end else None
+
+        # Mesmo formato das seções do contexto de intelligence usadas pelas regras
+        context = {
+            "health": {"current_score": current_score},
+            "tasks": {"overdue": overdue_tasks},
+            "activities": {
+                "total_30d": activities_30d,
+                "days_since_last_interaction": days_since,
+            },
+            "financial": {
+                "current_mrr": current_mrr,
+                "days_to_renewal": days_to_renewal,
+            },
+        }
+        risks = detect_risks(context, detected_at)
+
+        return {
+            "account_id": account_id,
+            "name": name,
+            "csm": csm,
+            "industry": industry,
+            "health_status": health_status,
+            "health_score": current_score,
+            "current_mrr": current_mrr,
+            "risk_score": risk_score(risks),
+            "risks": risks,
+            "opportunities": detect_opportunities(context),
+            "metrics": {
+                "overdue_tasks": overdue_tasks,
+                "activities_30d": activities_30d,
+                "days_since_last_interaction": days_since,
+                "days_to_renewal": days_to_renewal,
+            },
+        }
+
+    @staticmethod
+    def _matches(
+        item: Dict,
+        risk_type: Optional[str],
+        severity: Optional[str],
+        opportunity_type: Optional[str],
+        include_without_risks: bool,
+    ) -> bool:
+        if not item["risks"] and not include_without_risks and not opportunity_type:
+            return False
+        if risk_type and not any(risk["type"] == risk_type for risk in item["risks"]):
+            return False
+        if severity and not any(risk["severity"] == severity for risk in item["risks"]):
+            return False
+        if opportunity_type and not any(o["type"] == opportunity_type for o in item["opportunities"]):
+            return False
+        return True
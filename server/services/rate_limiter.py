@@ -0,0 +1,185 @@
+"""
+Rate Limiter
+Token buckets de requisições por minuto (RPM) e tokens por minuto (TPM)
+para chamadas de LLM, ajustados pelas respostas do provedor (429 e
+cabeçalhos x-ratelimit-*)
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Duração dos cabeçalhos de reset ("20ms", "1s", "6m0s" ou segundos) em segundos"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Bucket com reposição contínua (per_minute / 60 por segundo)
+
+    A capacidade é um minuto de consumo. Um pedido maior que a capacidade
+    é limitado a ela (senão nunca seria atendido).
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Segundos até o pedido caber (0 = cabe agora)"""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+    def take(self, amount: float):
+        self._tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Devolve o que foi estimado a mais"""
+        self._refill(time.monotonic())
+        self._tokens = min(self.capacity, self._tokens + max(0.0, amount))
+
+    def set_rate(self, per_minute: float):
+        self._refill(time.monotonic())
+        self.rate = per_minute / 60.0
+
+    def sync(self, remaining: Optional[int], reset_seconds: Optional[float]):
+        """Alinha o bucket com o que o provedor informa nos cabeçalhos"""
+        if remaining is None:
+            return
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, float(remaining))
+        if remaining <= 0 and reset_seconds:
+            self.pause(reset_seconds)
+
+    def pause(self, seconds: float):
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    @property
+    def available(self) -> float:
+        self._refill(time.monotonic())
+        return self._tokens
+
+
+class AdaptiveRateLimiter:
+    """
+    Limite combinado de RPM e TPM para um provedor
+
+    Cada chamada reserva 1 requisição + os tokens estimados (prompt +
+    máximo de saída); a diferença para o uso real é devolvida depois.
+    Um 429 pausa os dois buckets (Retry-After ou reset) e reduz a taxa
+    pela metade; cada sucesso recupera 5% até a taxa configurada.
+    tpm=None limita só requisições.
+    Usado por um único event loop (sem lock: reserva sem await no meio).
+    """
+
+    def __init__(self, rpm: float, tpm: Optional[float] = None, min_factor: float = 0.25):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.min_factor = min_factor
+        self.factor = 1.0
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.rate_limited = 0
+        self.waited_seconds = 0.0
+
+    async def acquire(self, tokens: int = 0):
+        while True:
+            wait = self.requests.wait_time(1)
+            if self.tokens:
+                wait = max(wait, self.tokens.wait_time(tokens))
+            if wait <= 0:
+                self.requests.take(1)
+                if self.tokens:
+                    self.tokens.take(tokens)
+                return
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def refund(self, tokens: int):
+        if self.tokens:
+            self.tokens.refund(tokens)
+
+    def on_success(self):
+        if self.factor < 1.0:
+            self._set_factor(self.factor + 0.05)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        self.rate_limited += 1
+        self._set_factor(self.factor * 0.5)
+        pause = retry_after if retry_after else 60.0 / max(self.rpm * self.factor, 1.0)
+        self.requests.pause(pause)
+        if self.tokens:
+            self.tokens.pause(pause)
+        logger.warning(f"Rate limit do provedor: pausa de {pause:.1f}s, taxa em {self.factor:.0%}")
+
+    def observe_headers(self, headers: Mapping[str, str]):
+        """Cabeçalhos x-ratelimit-* (formato OpenAI) de uma resposta"""
+        self.requests.sync(
+            _header_int(headers, "x-ratelimit-remaining-requests"),
+            parse_duration(headers.get("x-ratelimit-reset-requests")),
+        )
+        if self.tokens:
+            self.tokens.sync(
+                _header_int(headers, "x-ratelimit-remaining-tokens"),
+                parse_duration(headers.get("x-ratelimit-reset-tokens")),
+            )
+
+    def on_response(self, headers: Mapping[str, str], rate_limited: bool):
+        """Callback on_response de llm_clients.chat (respostas e 429 do provedor)"""
+        if rate_limited:
+            self.on_rate_limited(parse_duration(headers.get("retry-after")))
+        else:
+            self.observe_headers(headers)
+
+    def _set_factor(self, factor: float):
+        self.factor = min(1.0, max(self.min_factor, factor))
+        self.requests.set_rate(self.rpm * self.factor)
+        if self.tokens:
+            self.tokens.set_rate(self.tpm * self.factor)
+
+    def stats(self) -> Dict:
+        return {
+            "rpm": round(self.rpm * self.factor, 1),
+            "tpm": round(self.tpm * self.factor) if self.tpm else None,
+            "rate_factor": round(self.factor, 2),
+            "rate_limited": self.rate_limited,
+            "waited_seconds": round(self.waited_seconds, 1),
+        }
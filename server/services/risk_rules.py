@@ -0,0 +1,120 @@
+"""
+Risk & Opportunity Rules
+Heurísticas de risco/oportunidade compartilhadas entre o contexto de uma
+account (AccountIntelligenceService) e a varredura do portfólio
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Peso de cada severidade no ranking do portfólio
+SEVERITY_WEIGHTS = {"high": 3, "medium": 2, "low": 1}
+
+RISK_TYPES = [
+    "low_health_score",
+    "overdue_tasks",
+    "low_engagement",
+    "no_recent_contact",
+    "renewal_approaching",
+]
+
+OPPORTUNITY_TYPES = ["upsell", "expansion"]
+
+
+def detect_risks(context: Dict, detected_at: Optional[str] = None) -> List[Dict]:
+    """
+    Detect risk signals based on heuristics
+
+    Args:
+        context: Dict com as seções health, tasks, activities e financial
+            (mesmo formato do contexto de build_account_context)
+        detected_at: Timestamp ISO a usar (default: agora)
+    """
+    detected_at = detected_at or datetime.now().isoformat()
+    risks = []
+    
+    # Health score declining
+    health = context.get("health", {})
+    if health.get("current_score", 100) < 70:
+        risks.append({
+            "type": "low_health_score",
+            "severity": "high" if health["current_score"] < 60 else "medium",
+            "description": f"Health score está em {health['current_score']}/100",
+            "detected_at": detected_at
+        })
+    
+    # Overdue tasks
+    tasks = context.get("tasks", {})
+    if tasks.get("overdue", 0) > 0:
+        severity = "high" if tasks["overdue"] > 3 else "medium"
+        risks.append({
+            "type": "overdue_tasks",
+            "severity": severity,
+            "description": f"{tasks['overdue']} task(s) atrasada(s)",
+            "detected_at": detected_at
+        })
+    
+    # Low activity
+    activities = context.get("activities", {})
+    if activities.get("total_30d", 0) < 5:
+        risks.append({
+            "type": "low_engagement",
+            "severity": "medium",
+            "description": f"Apenas {activities['total_30d']} interações nos últimos 30 dias",
+            "detected_at": detected_at
+        })
+    
+    # No recent interaction
+    days_since = activities.get("days_since_last_interaction")
+    if days_since and days_since > 14:
+        risks.append({
+            "type": "no_recent_contact",
+            "severity": "high",
+            "description": f"Última interação há {days_since} dias",
+            "detected_at": detected_at
+        })
+    
+    # Contract renewal approaching
+    financial = context.get("financial", {})
+    days_to_renewal = financial.get("days_to_renewal")
+    if days_to_renewal and 0 < days_to_renewal < 60:
+        risks.append({
+            "type": "renewal_approaching",
+            "severity": "medium",
+            "description": f"Renovação em {days_to_renewal} dias",
+            "detected_at": detected_at
+        })
+    
+    return risks
+
+
+def detect_opportunities(context: Dict) -> List[Dict]:
+    """Detect expansion opportunities"""
+    opportunities = []
+    
+    # High health score
+    health = context.get("health", {})
+    if health.get("current_score", 0) > 85:
+        opportunities.append({
+            "type": "upsell",
+            "description": "Cliente com alta satisfação - momento ideal para upsell",
+            "confidence": "high",
+            "estimated_value": None
+        })
+    
+    # High MRR with good engagement
+    financial = context.get("financial", {})
+    activities = context.get("activities", {})
+    if financial.get("current_mrr", 0) > 3000 and activities.get("total_30d", 0) > 10:
+        opportunities.append({
+            "type": "expansion",
+            "description": "Cliente engajado com alto MRR - potencial para expansion",
+            "confidence": "medium",
+            "estimated_value": financial["current_mrr"] * 0.3  # 30% expansion potential
+        })
+    
+    return opportunities
+
+
+def risk_score(risks: List[Dict]) -> int:
+    """Pontuação para ranking (soma dos pesos de severidade)"""
+    return sum(SEVERITY_WEIGHTS.get(risk["severity"], 0) for risk in risks)
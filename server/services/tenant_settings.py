@@ -0,0 +1,213 @@
+"""
+Tenant Settings Cache
+Settings dos tenants em cache por worker, invalidadas na atualização do
+tenant e, entre workers, via LISTEN/NOTIFY do Postgres
+"""
+import logging
+import select
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import Tenant
+
+logger = logging.getLogger(__name__)
+
+# Canal de notificação (payload: tenant_id)
+NOTIFY_CHANNEL = "tenant_settings_changed"
+
+# Rede de segurança caso uma notificação se perca (listener reconectando)
+SETTINGS_TTL_SECONDS = 300
+
+# Chave usada para o tenant padrão (o primeiro, como em get_default_tenant)
+_DEFAULT = "__default__"
+
+
+class AISettings(NamedTuple):
+    """Settings de IA do tenant (tenant.settings["ai"])"""
+
+    openai_api_key: Optional[str] = None
+    perplexity_api_key: Optional[str] = None
+    system_prompt: Optional[str] = None
+    creativity_level: float = 0.5
+
+    @classmethod
+    def from_settings(cls, tenant_settings: Optional[Dict]) -> "AISettings":
+        ai = (tenant_settings or {}).get("ai") or {}
+        creativity = ai.get("creativityLevel")
+        perplexity_key = str(ai.get("perplexityApiKey") or "").strip()
+        return cls(
+            openai_api_key=ai.get("openaiApiKey") or None,
+            perplexity_api_key=perplexity_key or None,
+            system_prompt=ai.get("systemPrompt") or None,
+            creativity_level=float(creativity) if creativity is not None else 0.5,
+        )
+
+    @property
+    def perplexity_enabled(self) -> bool:
+        """Chave Perplexity com cara de válida (mesma regra de /debug/perplexity-check)"""
+        return bool(self.perplexity_api_key and len(self.perplexity_api_key) > 10)
+
+
+class TenantSettings(NamedTuple):
+    tenant_id: str
+    settings: Dict
+    ai: AISettings
+
+
+class TenantSettingsCache:
+    """
+    Cache das settings por tenant (um por worker)
+
+    Guarda também "qual é o tenant padrão", que é o que quase todo o código
+    de IA usa. Uma atualização limpa o cache inteiro: são poucos tenants e
+    o padrão pode ser qualquer um deles.
+    """
+
+    def __init__(self, ttl: int = SETTINGS_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, tuple] = {}
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, db: Session, tenant_id: Optional[str] = None) -> Optional[TenantSettings]:
+        """Settings do tenant (ou do tenant padrão); None se não existe"""
+        key = str(tenant_id) if tenant_id else _DEFAULT
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+            version = self._version
+
+        query = db.query(Tenant.tenant_id, Tenant.settings)
+        if tenant_id:
+            query = query.filter(Tenant.tenant_id == tenant_id)
+        row = query.first()
+        value = TenantSettings(str(row[0]), row[1] or {}, AISettings.from_settings(row[1])) if row else None
+
+        with self._lock:
+            # Não grava o que foi lido antes de uma invalidação concorrente
+            if version == self._version:
+                self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def ai_settings(self, db: Session, tenant_id: Optional[str] = None) -> AISettings:
+        """Settings de IA do tenant (vazias se o tenant não existe)"""
+        tenant = self.get(db, tenant_id)
+        return tenant.ai if tenant else AISettings()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._version += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+def notify_tenant_settings_changed(db: Session, tenant_id: str):
+    """
+    Avisa os workers (entregue no commit da transação atual); o worker que
+    fez a alteração deve chamar tenant_settings_cache.invalidate() após o commit
+    """
+    db.execute(text("SELECT pg_notify(:channel, :tenant_id)"), {
+        "channel": NOTIFY_CHANNEL,
+        "tenant_id": str(tenant_id),
+    })
+
+
+class TenantSettingsListener:
+    """
+    Thread com uma conexão dedicada em LISTEN no canal de settings
+
+    Cada notificação invalida o cache do worker; ao reconectar também
+    invalida (notificações perdidas enquanto estava desconectado).
+    """
+
+    def __init__(self, cache: TenantSettingsCache, poll_seconds: float = 5):
+        self.cache = cache
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="tenant-settings-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=self.poll_seconds + 1)
+            self._thread = None
+
+    def _run(self):
+        from database import engine
+
+        driver = engine.dialect.driver
+        if driver not in ("psycopg2", "psycopg"):
+            logger.error(
+                f"Listener de settings de tenant desativado: driver {driver} sem suporte a LISTEN "
+                "(use postgresql+psycopg2 ou postgresql+psycopg); settings valem pelo TTL"
+            )
+            return
+
+        retry_delay = 1
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = engine.raw_connection()
+                dbapi_connection = connection.driver_connection
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                self.cache.invalidate()
+                retry_delay = 1
+
+                while not self._stop.is_set():
+                    tenant_ids = self._wait_notifications(driver, dbapi_connection)
+                    if tenant_ids:
+                        logger.info(f"Settings de tenant alteradas: {', '.join(sorted(tenant_ids))}")
+                        self.cache.invalidate()
+            except (AttributeError, TypeError) as e:
+                # Erro de programação/versão do driver: reconectar não resolve
+                logger.error(f"Listener de settings de tenant desativado ({driver}): {e}; settings valem pelo TTL")
+                return
+            except Exception as e:
+                logger.warning(f"Listener de settings de tenant desconectado ({e}); reconectando em {retry_delay}s")
+                self._stop.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+            finally:
+                if connection is not None:
+                    try:
+                        # Não devolve ao pool uma conexão em LISTEN/autocommit
+                        connection.invalidate()
+                    except Exception:
+                        pass
+
+    def _wait_notifications(self, driver: str, dbapi_connection) -> set:
+        """Espera até poll_seconds por notificações; retorna os tenant_ids recebidos"""
+        if driver == "psycopg":
+            # psycopg 3: gerador que termina ao fim do timeout
+            return {notify.payload for notify in dbapi_connection.notifies(timeout=self.poll_seconds)}
+
+        if select.select([dbapi_connection], [], [], self.poll_seconds) == ([], [], []):
+            return set()
+        dbapi_connection.poll()
+        tenant_ids = {notify.payload for notify in dbapi_connection.notifies}
+        dbapi_connection.notifies.clear()
+        return tenant_ids
+
+
+# Instâncias globais (uma por worker)
+tenant_settings_cache = TenantSettingsCache()
+tenant_settings_listener = TenantSettingsListener(tenant_settings_cache)
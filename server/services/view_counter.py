@@ -0,0 +1,108 @@
+"""
+Playbook View Counter
+Agrega incrementos de visualização em memória e persiste em lote
+"""
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from config import settings
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class PlaybookViewCounter:
+    """
+    Contador de visualizações por worker.
+
+    Cada visualização apenas incrementa um delta em memória; os deltas
+    acumulados são gravados em um único UPDATE a cada N segundos e no
+    shutdown, evitando contenção no lock da linha do playbook.
+    """
+
+    def __init__(self, flush_interval: int = 10):
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def increment(self, playbook_id: int, amount: int = 1) -> int:
+        """Registra visualizações pendentes e retorna o total pendente do playbook"""
+        with self._lock:
+            self._pending[playbook_id] = self._pending.get(playbook_id, 0) + amount
+            return self._pending[playbook_id]
+
+    def pending(self, playbook_id: int) -> int:
+        """Visualizações ainda não persistidas para o playbook"""
+        with self._lock:
+            return self._pending.get(playbook_id, 0)
+
+    def flush(self) -> int:
+        """
+        Persiste todos os deltas pendentes em um único UPDATE
+
+        Returns:
+            Número de playbooks atualizados
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch = self._pending
+            self._pending = {}
+
+        ids = list(batch.keys())
+        deltas = [batch[playbook_id] for playbook_id in ids]
+
+        db = SessionLocal()
+        try:
+            db.execute(text("""
+                UPDATE playbooks AS p
+                SET views = COALESCE(p.views, 0) + v.delta
+                FROM unnest(CAST(:ids AS integer[]), CAST(:deltas AS integer[])) AS v(id, delta)
+                WHERE p.id = v.id
+            """), {"ids": ids, "deltas": deltas})
+            db.commit()
+            logger.debug(f"Views persistidas para {len(ids)} playbook(s)")
+            return len(ids)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao persistir views de playbooks: {str(e)}")
+            # Devolver os deltas para a próxima tentativa
+            with self._lock:
+                for playbook_id, delta in batch.items():
+                    self._pending[playbook_id] = self._pending.get(playbook_id, 0) + delta
+            return 0
+        finally:
+            db.close()
+
+    async def _flush_loop(self):
+        """Loop de flush periódico"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.to_thread(self.flush)
+
+    def start(self):
+        """Inicia o flush periódico no event loop atual"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Interrompe o flush periódico e persiste o que estiver pendente"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+
+# Instância global (uma por worker)
+playbook_view_counter = PlaybookViewCounter(
+    flush_interval=settings.PLAYBOOK_VIEWS_FLUSH_INTERVAL
+)
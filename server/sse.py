@@ -0,0 +1,60 @@
+"""
+Server-Sent Events para respostas de IA em streaming
+"""
+import logging
+from typing import Any, AsyncIterator, Tuple
+
+import anyio
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # Desliga o buffering de proxies (nginx)
+    "X-Accel-Buffering": "no",
+}
+
+Event = Tuple[str, Any]
+
+
+def format_event(event: str, data: Any) -> bytes:
+    """Uma mensagem SSE (data em JSON, uma linha)"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+async def _stream(request: Request, events: AsyncIterator[Event]) -> AsyncIterator[bytes]:
+    # Primeiro byte imediato: o cliente sabe que a geração começou
+    yield format_event("start", {})
+    try:
+        async for event, data in events:
+            if await request.is_disconnected():
+                logger.info("Cliente desconectou; streaming cancelado")
+                break
+            yield format_event(event, data)
+    except Exception as e:
+        logger.error(f"Erro durante streaming: {str(e)}")
+        yield format_event("error", {"detail": str(e)})
+    finally:
+        # Fecha o gerador de origem (e a conexão com o provedor de IA),
+        # inclusive quando o Starlette cancela a resposta na desconexão
+        with anyio.CancelScope(shield=True):
+            await events.aclose()
+
+
+def sse_response(request: Request, events: AsyncIterator[Event]) -> StreamingResponse:
+    """
+    Resposta text/event-stream a partir de um gerador de (evento, dados)
+
+    Eventos: start, os do gerador (token, done, ...) e error. Quando o
+    cliente desconecta o gerador é fechado, cancelando a chamada em curso.
+    """
+    return StreamingResponse(
+        _stream(request, events),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
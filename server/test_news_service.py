@@ -0,0 +1,187 @@
+"""
+Tests for the Radar CS news storage (NewsService)
+
+Runs against an in-memory SQLite database with only the accounts,
+articles and account_news tables, counting the SQL statements issued.
+
+Run: python -m pytest test_news_service.py -q
+"""
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import and_, create_engine, desc, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Account, AccountNews, Article
+from services.news_articles import article_dedup_key, canonical_url
+from services.news_service import NewsService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    # NOW() of the raw upserts, in the format SQLAlchemy stores DateTime on SQLite
+    event.listen(engine, "connect", lambda conn, record: conn.create_function(
+        "NOW", 0, lambda: datetime.utcnow().isoformat(" ")
+    ))
+    Account.__table__.create(engine)
+    Article.__table__.create(engine)
+    AccountNews.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    _seed(session)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session.statements = statements
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _seed(session, accounts: int = 12, news_per_account: int = 4):
+    now = datetime.utcnow()
+    # Industry article shared by every account
+    shared = Article(
+        id=uuid4(), dedup_key=article_dedup_key("Setor em alta"), title="Setor em alta",
+        news_type="industry", category="negocios", published_date=now,
+    )
+    session.add(shared)
+    for i in range(accounts):
+        account_id = f"acc-{i:02d}"
+        session.add(Account(
+            id=account_id,
+            client_id="client-1",
+            name=f"Account {i}",
+            industry="tecnologia",
+            csm="ana" if i % 2 else "bruno",
+            health_score=50 + i,
+            status="Saudável",
+        ))
+        session.add(AccountNews(
+            id=uuid4(), account_id=account_id, article_id=shared.id,
+            relevance_score=(i * 13) % 100, insights="shared", created_at=now,
+        ))
+        for j in range(news_per_account):
+            article = Article(
+                id=uuid4(),
+                dedup_key=article_dedup_key(f"News {i}-{j}"),
+                title=f"News {i}-{j}",
+                summary="summary",
+                content="content",
+                news_type="company",
+                category="negocios",
+                published_date=now - timedelta(days=j),
+            )
+            session.add(article)
+            session.add(AccountNews(
+                id=uuid4(),
+                account_id=account_id,
+                article_id=article.id,
+                relevance_score=(j * 37 + i) % 100,
+                insights=f"insight {j}",
+                # One stale link per account (outside the 7-day window)
+                created_at=now - timedelta(days=10 if j == 0 else j),
+            ))
+    # Account without news must still be listed
+    session.add(Account(id="acc-empty", client_id="client-1", name="Empty", csm="ana"))
+    session.commit()
+
+
+def _news_by_csm_per_account(service: NewsService, csm_name=None):
+    """Straightforward implementation (one news query per account), used as reference"""
+    query = service.db.query(Account)
+    if csm_name and csm_name != "all":
+        query = query.filter(Account.csm == csm_name)
+    results = []
+    for account in query.all():
+        cutoff_date = datetime.utcnow() - timedelta(days=7)
+        news_items = service.db.query(AccountNews, Article).join(
+            Article, Article.id == AccountNews.article_id
+        ).filter(
+            and_(AccountNews.account_id == account.id, AccountNews.created_at >= cutoff_date)
+        ).order_by(desc(AccountNews.relevance_score), desc(Article.published_date)).all()
+        results.append({
+            "account": {
+                "id": account.id,
+                "name": account.name,
+                "industry": account.industry,
+                "csm": account.csm,
+                "health_score": account.health_score,
+                "status": account.status
+            },
+            "news_items": [service._news_item_to_dict(link, article) for link, article in news_items],
+            "total_news": len(news_items)
+        })
+    return results
+
+
+@pytest.mark.parametrize("csm_name", [None, "all", "ana", "nobody"])
+def test_get_news_by_csm_uses_constant_number_of_queries(db, csm_name):
+    service = NewsService(db)
+    db.statements.clear()
+
+    results = service.get_news_by_csm(csm_name)
+
+    assert len(db.statements) <= 2
+    if csm_name == "nobody":
+        assert results == []
+
+
+@pytest.mark.parametrize("csm_name", [None, "ana", "bruno"])
+def test_get_news_by_csm_matches_per_account_queries(db, csm_name):
+    service = NewsService(db)
+
+    assert service.get_news_by_csm(csm_name) == _news_by_csm_per_account(service, csm_name)
+
+
+def test_get_news_by_csm_per_account_limit(db):
+    service = NewsService(db)
+    full = {r["account"]["id"]: r["news_items"] for r in service.get_news_by_csm()}
+
+    limited = service.get_news_by_csm(per_account_limit=2)
+
+    for result in limited:
+        assert result["news_items"] == full[result["account"]["id"]][:2]
+        assert result["total_news"] == len(result["news_items"])
+
+
+def test_save_news_items_deduplicates_articles_across_accounts(db):
+    service = NewsService(db)
+    item = {
+        "title": "Nova regulação do setor",
+        "summary": "summary",
+        "news_type": "industry",
+        "relevance_score": 70,
+        "published_date": "2025-11-28T10:00:00Z",
+        "source_url": "https://www.example.com/noticia/?utm_source=x",
+        "insights": "insight",
+    }
+    # Accounts without old links (purging them uses Postgres-only SQL)
+    db.add_all([Account(id=f"new-{i}", client_id="client-1", name=f"New {i}") for i in range(2)])
+    db.commit()
+    articles_before = db.query(Article).count()
+
+    service._save_news_items("new-0", [item])
+    service._save_news_items("new-1", [dict(item, source_url="http://example.com/noticia", relevance_score=40)])
+    service._save_news_items("new-1", [dict(item, source_url="http://example.com/noticia", relevance_score=45)])
+
+    assert db.query(Article).count() == articles_before + 1
+    article = db.query(Article).filter(Article.dedup_key == article_dedup_key("", "https://example.com/noticia")).one()
+    links = sorted(
+        (link.account_id, link.relevance_score)
+        for link in db.query(AccountNews).filter(AccountNews.account_id.like("new-%")).all()
+        if link.article_id == article.id
+    )
+    assert links == [("new-0", 70), ("new-1", 45)]
+
+
+def test_article_dedup_key():
+    assert canonical_url("https://www.Example.com/a/?utm_medium=x&b=2&a=1#top") == "example.com/a?a=1&b=2"
+    assert canonical_url("not a url") is None
+    # Without URL the normalized title is the key
+    assert article_dedup_key("Ação da Empresa  sobe!") == article_dedup_key("acao da empresa sobe")
+    assert article_dedup_key("Same title", "https://a.com/1") != article_dedup_key("Same title", "https://a.com/2")